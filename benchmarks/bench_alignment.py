@@ -0,0 +1,52 @@
+"""Benchmark aligning many logger series onto a common grid.
+
+Compares reindexing every series onto the grid with pandas and concatenating the results with align, which
+writes every series into a preallocated 2-D block.
+
+Run with: python benchmarks/bench_alignment.py [n_series] [n_records]
+"""
+import sys
+import time
+
+import numpy as np
+from pandas import DataFrame, Series, Timedelta, concat, date_range
+
+from waterspy.alignment import align
+
+FREQ = Timedelta('15min')
+
+
+def per_series(items: dict, grid) -> DataFrame:
+    return concat({label: series.reindex(grid, method='nearest', tolerance=FREQ / 2)
+                   for label, series in items.items()}, axis=1)
+
+
+def timed(label: str, fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    print(f'{label:<28} {elapsed:8.3f} s')
+    return elapsed, result
+
+
+def main(n: int = 300, records: int = 100_000) -> None:
+    rng = np.random.default_rng(0)
+    items = {}
+    for i in range(n):
+        # loggers started at different minutes, each with a gap
+        index = date_range('2020-01-01', periods=records, freq=FREQ, tz='UTC') + Timedelta(minutes=int(i % 15))
+        keep = np.ones(records, dtype=bool)
+        gap = rng.integers(0, records - 500)
+        keep[gap:gap + 500] = False
+        items[f'PZ{i:03d}'] = Series(rng.normal(10, 1, keep.sum()), index=index[keep], name=f'PZ{i:03d}')
+
+    print(f'{n} series of {records} records')
+    new, block = timed('align (nearest)', align, list(items.values()), freq=FREQ)
+    timed('align (linear)', align, list(items.values()), freq=FREQ, method='linear')
+    old, expected = timed('per series (pandas)', per_series, items, block.grid)
+    np.testing.assert_array_equal(block.values, expected.to_numpy())
+    print(f'{"speed-up (nearest)":<28} {old / new:8.1f} x')
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
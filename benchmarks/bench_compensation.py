@@ -0,0 +1,63 @@
+"""Benchmark the barometric compensation of a network of loggers.
+
+Compares compensating one logger at a time with pandas' merge_asof against compensate_network, which matches every
+logger with one binary search and writes the heads of the whole network into shared arrays. The loggers record every
+15 minutes from staggered installation dates and the hourly barometric series has a week-long gap, so part of the
+records find no barometric record within the tolerance.
+
+Run with: python benchmarks/bench_compensation.py [n_loggers] [n_records]
+"""
+import sys
+import time
+
+import numpy as np
+from pandas import DataFrame, Series, Timedelta, Timestamp, concat, date_range, merge_asof
+
+from waterspy.compensation import compensate_network
+from waterspy.core.models import LoggerMeasurement, MeteoLoggerMeasurement
+
+
+def per_logger(measurements: list[LoggerMeasurement], baro: MeteoLoggerMeasurement) -> DataFrame:
+    heads = []
+    for m in measurements:
+        merged = merge_asof(m.timeseries.rename('p').to_frame(), baro.timeseries.rename('b').to_frame(),
+                            left_index=True, right_index=True, direction='nearest',
+                            tolerance=Timedelta('1h')).dropna()
+        water_column = (merged['p'] - merged['b']) / 100
+        heads.append(DataFrame({'station': m.station, 'logger': m.logger, 'timestamp': merged.index,
+                                'water_column': water_column.to_numpy(),
+                                'head': water_column.to_numpy() + (m.logger_alt or 0)}))
+    return concat(heads, ignore_index=True)
+
+
+def timed(label: str, fn, *args) -> tuple[float, DataFrame]:
+    start = time.perf_counter()
+    heads = fn(*args)
+    elapsed = time.perf_counter() - start
+    print(f'{label:<28} {elapsed:8.2f} s  {len(heads):,} heads')
+    return elapsed, heads
+
+
+def main(n_loggers: int = 300, n_records: int = 100_000) -> None:
+    rng = np.random.default_rng(0)
+    baro_index = date_range('2020-01-01 00:07', periods=n_records // 4 + 30 * 24, freq='1h', tz='UTC')
+    baro_index = baro_index[(baro_index < '2020-03-01') | (baro_index >= '2020-03-08')]
+    baro = MeteoLoggerMeasurement(timeseries=Series(1000 + rng.normal(0, 5, len(baro_index)), index=baro_index),
+                                  measurement_type='pressure', unit='cmH2O', station='BARO', logger='B1')
+    measurements = []
+    for i in range(n_loggers):
+        index = date_range(Timestamp('2020-01-01', tz='UTC') + Timedelta(minutes=15 * int(rng.integers(0, 2880))),
+                           periods=n_records, freq='15min')
+        measurements.append(LoggerMeasurement(timeseries=Series(1200 + rng.normal(0, 5, n_records), index=index),
+                                              measurement_type='pressure', unit='cmH2O', station=f'PZ{i}',
+                                              logger=f'L{i}', logger_alt=float(i)))
+
+    print(f'{n_loggers} loggers x {n_records} records')
+    old, expected = timed('per logger, merge_asof', per_logger, measurements, baro)
+    new, heads = timed('compensate_network', compensate_network, measurements, baro)
+    assert np.allclose(heads['head'].to_numpy(), expected['head'].to_numpy())
+    print(f'{"speed-up":<28} {old / new:8.1f} x')
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,53 @@
+"""Benchmark the completeness index of a logger network.
+
+Times the first indexing of the network, a monthly completeness report and an update without new records.
+
+Run with: python benchmarks/bench_completeness.py [n_series]
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+from pandas import Series, date_range
+
+from waterspy.completeness import CompletenessIndex
+
+N_RECORDS = 10_000
+
+
+def timed(label: str, fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - start
+    print(f'{label:<28} {elapsed:8.3f} s')
+    return elapsed, result
+
+
+def main(n: int = 1_000) -> None:
+    rng = np.random.default_rng(0)
+    index = date_range('2024-01-01', periods=N_RECORDS, freq='15min', tz='UTC')
+    measurements = []
+    for i in range(n):
+        # drop a few records and a random stretch to create gaps
+        keep = rng.random(N_RECORDS) > 0.01
+        gap = rng.integers(0, N_RECORDS - 200)
+        keep[gap:gap + 200] = False
+        measurements.append(SimpleNamespace(station=f'PZ{i:04d}', logger=f'L{i:04d}', measurement_type='pressure',
+                                            timeseries=Series(1.0, index=index[keep])))
+
+    print(f'{n} series of {N_RECORDS} records')
+    with tempfile.TemporaryDirectory() as directory:
+        completeness = CompletenessIndex(Path(directory) / 'qa.sqlite')
+        timed('first index', completeness.update, measurements)
+        _, report = timed('monthly report', completeness.completeness, 'MS')
+        _, summary = timed('update without new records', completeness.update, measurements)
+
+    assert not summary['records'].any()
+    print(f'{len(report)} periods, {report["completeness"].mean():.1f} % complete on average')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000)
@@ -0,0 +1,56 @@
+"""Benchmark the memory used by water quality measurements.
+
+Compares the pydantic Parameter/Analyte models with the slotted ParameterRecord/AnalyteRecord used by
+get_samples(validate=False), for samples holding 60 analytes each.
+
+Run with: python benchmarks/bench_measurement_memory.py [n_samples]
+"""
+import sys
+import time
+import tracemalloc
+
+from waterspy.core.waterquality.models import AnalysisSample, Analyte, AnalyteRecord
+
+N_ANALYTES = 60
+
+
+def payload(n_samples: int) -> list[dict]:
+    return [{'station': f'PZ{i % 100}', 'timestamp': '2024-01-01T00:00:00', 'method': 'ICP-MS',
+             'measurements': [{'value': 0.1 * j, 'unit': 'mg/L', 'parameter': f'analyte-{j}'}
+                              for j in range(N_ANALYTES)]} for i in range(n_samples)]
+
+
+def validated(data: list[dict]) -> list:
+    return [AnalysisSample(**{**sample, 'measurements': [Analyte(**m) for m in sample['measurements']]})
+            for sample in data]
+
+
+def records(data: list[dict]) -> list:
+    return [AnalysisSample.model_construct(**{**sample, 'measurements': [AnalyteRecord.from_dict(m)
+                                                                         for m in sample['measurements']]})
+            for sample in data]
+
+
+def measure(label: str, fn, data: list[dict]) -> float:
+    tracemalloc.start()
+    start = time.perf_counter()
+    samples = fn(data)
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    per_measurement = size / (len(samples) * N_ANALYTES)
+    print(f'{label:<24} {elapsed:8.2f} s  {size / 1e6:8.1f} MB  {per_measurement:8.0f} B/measurement')
+    return per_measurement
+
+
+def main(n: int = 10_000) -> None:
+    data = payload(n)
+    print(f'{n} samples x {N_ANALYTES} analytes')
+    old = measure('pydantic models', validated, data)
+    new = measure('slotted records', records, data)
+    print(f'{"reduction":<24} {old / new:8.1f} x')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
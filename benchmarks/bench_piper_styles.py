@@ -0,0 +1,46 @@
+"""Benchmark the assignment of Piper plot styles to labelled rows.
+
+Compares the row-wise assign_color/assign_marker that fmt_triangle_piper applied before with assign_styles, which
+resolves every unique label once.
+
+Run with: python benchmarks/bench_piper_styles.py [n_rows]
+"""
+import sys
+import time
+
+import numpy as np
+from pandas import Series
+
+from waterspy.plot import assign_color, assign_styles
+
+N_STATIONS = 300
+N_PATTERNS = 50
+
+
+def row_wise(labels: Series, patterns: dict) -> Series:
+    return labels.apply(assign_color, color_dict=patterns)
+
+
+def timed(label: str, fn, *args) -> tuple[float, Series]:
+    start = time.perf_counter()
+    styles = fn(*args)
+    elapsed = time.perf_counter() - start
+    print(f'{label:<28} {elapsed:8.3f} s')
+    return elapsed, styles
+
+
+def main(n: int = 100_000) -> None:
+    rng = np.random.default_rng(0)
+    labels = Series([f'PZ{i:03d}' for i in rng.integers(0, N_STATIONS, n)])
+    # the later patterns match more stations, so most labels are tested against many patterns
+    patterns = {f'^PZ{i % 10}{i // 10 % 10}': f'C{i % 10}' for i in range(N_PATTERNS)}
+
+    print(f'{n} rows, {N_STATIONS} stations, {N_PATTERNS} patterns')
+    old, expected = timed('row-wise', row_wise, labels, patterns)
+    new, styles = timed('once per unique label', assign_styles, labels, patterns)
+    assert styles.equals(expected)
+    print(f'{"speed-up":<28} {old / new:8.1f} x')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
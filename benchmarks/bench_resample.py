@@ -0,0 +1,48 @@
+"""Benchmark resampling many short series to a daily mean and maximum.
+
+Compares resampling every series with pandas, one at a time, with resample, which reduces the stacked records of
+all series at once.
+
+Run with: python benchmarks/bench_resample.py [n_series]
+"""
+import sys
+import time
+
+import numpy as np
+from pandas import DataFrame, Series, concat, date_range
+
+from waterspy.resample import resample
+
+N_RECORDS = 2_000
+
+
+def per_series(items: dict, freq: str) -> DataFrame:
+    frames = {label: series.resample(freq).agg(['mean', 'max']) for label, series in items.items()}
+    return concat(frames, axis=1).swaplevel(axis=1).sort_index(axis=1)
+
+
+def timed(label: str, fn, *args) -> tuple[float, DataFrame]:
+    start = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - start
+    print(f'{label:<28} {elapsed:8.3f} s')
+    return elapsed, result
+
+
+def main(n: int = 3_000, freq: str = 'D') -> None:
+    rng = np.random.default_rng(0)
+    starts = date_range('2024-01-01', periods=30, freq='D', tz='UTC')
+    items = {f'PZ{i:04d}': Series(rng.normal(10, 1, N_RECORDS),
+                                  index=date_range(starts[i % len(starts)], periods=N_RECORDS, freq='15min'))
+             for i in range(n)}
+
+    print(f'{n} series of {N_RECORDS} records to {freq} mean/max')
+    old, expected = timed('per series (pandas)', per_series, items, freq)
+    new, result = timed('stacked', resample, items, freq, ['mean', 'max'])
+    expected = expected.reindex(result.index)
+    np.testing.assert_allclose(result.sort_index(axis=1).to_numpy(), expected.to_numpy(), equal_nan=True)
+    print(f'{"speed-up":<28} {old / new:8.1f} x')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 3_000)
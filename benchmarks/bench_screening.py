@@ -0,0 +1,61 @@
+"""Benchmark screening a logger network for spikes, jumps and flat lines.
+
+Times screen with all three detectors for a small and a large spike window, against screening every series with
+pandas: rolling medians of the values and of their deviations from the median (the usual pandas approximation of
+the Hampel filter, which is cheaper than the exact MAD of every window), the rate of change and the runs of equal
+values.
+
+Run with: python benchmarks/bench_screening.py [n_series] [n_records]
+"""
+import sys
+import time
+
+import numpy as np
+from pandas import DataFrame, Series, date_range
+
+from waterspy.screening import screen
+
+
+def per_series_screen(items: list[Series], window: int) -> list[DataFrame]:
+    flags = []
+    for s in items:
+        median = s.rolling(window, center=True, min_periods=1).median()
+        deviation = (s - median).abs()
+        mad = deviation.rolling(window, center=True, min_periods=1).median()
+        spike = deviation > 3.5 * np.maximum(1.4826 * mad, 0.05)
+        rate = s.diff().abs() / (s.index.to_series().diff().dt.total_seconds() / 3600) > 1.0
+        runs = (s.diff() != 0).cumsum()
+        flat = runs.map(runs.value_counts()) >= 96
+        flags.append(DataFrame({'spike': spike, 'rate': rate, 'flat': flat, 'flagged': spike | rate | flat}))
+    return flags
+
+
+def timed(label: str, fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    print(f'{label:<36} {elapsed:8.3f} s')
+    return elapsed, result
+
+
+def main(n: int = 300, records: int = 100_000) -> None:
+    rng = np.random.default_rng(0)
+    index = date_range('2020-01-01', periods=records, freq='15min', tz='UTC')
+    items = []
+    for i in range(n):
+        values = np.cumsum(rng.normal(0, 0.01, records))
+        values[rng.integers(0, records, 20)] += 5
+        items.append(Series(values, index=index, name=f'PZ{i:03d}'))
+
+    print(f'{n} series of {records} records')
+    for window in [7, 97]:
+        old, expected = timed(f'per series pandas, window {window}', per_series_screen, items, window)
+        new, flags = timed(f'screen, window {window}', screen, items, window=window, min_scale=0.05, max_rate=1.0,
+                           flat_length=96)
+        print(f'{"":<36} {sum(int(f["flagged"].sum()) for f in flags):,} records flagged '
+              f'({sum(int(f["flagged"].sum()) for f in expected):,} by pandas)')
+        print(f'{"speed-up":<36} {old / new:8.1f} x')
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
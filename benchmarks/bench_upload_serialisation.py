@@ -0,0 +1,81 @@
+"""Benchmark the serialisation of manual groundwater level uploads.
+
+Compares the per-row payload construction that upload_manual_groundwater_levels used before (iterrows/items and
+json.dumps) with the streamed encoders it calls now: iter_timeseries_json for Series and iter_json_records for
+DataFrames. The streamed payloads are consumed chunk by chunk, as by a chunked upload.
+
+Run with: python benchmarks/bench_upload_serialisation.py [n_rows]
+"""
+import json
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+from pandas import DataFrame, Series, date_range
+
+from waterspy.core.utils.serializers import iso_timestamps, iter_json_records, iter_timeseries_json
+
+
+def per_row_series(ts: Series, station: str) -> bytes:
+    data = [{'timestamp': k.isoformat(), 'depth': v, 'station': station}
+            for k, v in ts.items() if isinstance(k, datetime)]
+    return json.dumps(data).encode()
+
+
+def per_row_frame(df: DataFrame, station: str) -> bytes:
+    df = df.copy()
+    df['timestamp'] = df['timestamp'].apply(
+        lambda x: x if isinstance(x, datetime) else datetime.strptime(x, '%Y-%m-%d %H:%M:%S'))
+    data = [{'timestamp': row['timestamp'].isoformat(), 'depth': row['depth'], 'comment': row['comment'],
+             'station': station} for _, row in df.iterrows()]
+    return json.dumps(data).encode()
+
+
+def streamed_series(ts: Series, station: str) -> list[bytes]:
+    # the body of upload_manual_groundwater_levels(stream=True) for a Series
+    return list(iter_timeseries_json(ts, value_name='depth', station=station))
+
+
+def streamed_frame(df: DataFrame, station: str) -> list[bytes]:
+    # the body of upload_manual_groundwater_levels(stream=True) for a DataFrame
+    from pandas import to_datetime
+    timestamps = to_datetime(df['timestamp'], format='%Y-%m-%d %H:%M:%S')
+    valid = timestamps.notna().to_numpy()
+    return list(iter_json_records(DataFrame({'timestamp': iso_timestamps(timestamps[valid]),
+                                             'depth': df['depth'].to_numpy()[valid],
+                                             'comment': df['comment'].to_numpy()[valid], 'station': station})))
+
+
+def timed(label: str, fn, *args) -> tuple[float, bytes]:
+    start = time.perf_counter()
+    payload = fn(*args)
+    elapsed = time.perf_counter() - start
+    chunks = payload if isinstance(payload, list) else [payload]
+    payload = b''.join(chunks)
+    print(f'{label:<28} {elapsed:8.2f} s  {len(payload) / 1e6:8.1f} MB  '
+          f'largest chunk {max(len(c) for c in chunks) / 1e6:.1f} MB')
+    return elapsed, payload
+
+
+def main(n: int = 1_000_000) -> None:
+    rng = np.random.default_rng(0)
+    index = date_range('1990-01-01', periods=n, freq='h', tz='UTC')
+    ts = Series(rng.normal(5, 1, n), index=index)
+    df = DataFrame({'timestamp': index.tz_localize(None).strftime('%Y-%m-%d %H:%M:%S'), 'depth': ts.to_numpy(),
+                    'comment': np.where(rng.random(n) < 0.01, 'dry', None)})
+
+    print(f'{n} rows')
+    old, expected = timed('series, per row', per_row_series, ts, 'PZ1')
+    new, payload = timed('series, streamed', streamed_series, ts, 'PZ1')
+    # the streamed encoder writes UTC as 'Z' where isoformat writes '+00:00'
+    assert json.loads(payload) == json.loads(expected.replace(b'+00:00"', b'Z"'))
+    print(f'{"speed-up":<28} {old / new:8.1f} x')
+    old, expected = timed('frame, per row', per_row_frame, df, 'PZ1')
+    new, payload = timed('frame, streamed', streamed_frame, df, 'PZ1')
+    assert json.loads(payload) == json.loads(expected)
+    print(f'{"speed-up":<28} {old / new:8.1f} x')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
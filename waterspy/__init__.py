@@ -0,0 +1,3 @@
+from waterspy.core.utils.profiling import profile
+
+__all__ = ['profile']
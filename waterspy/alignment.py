@@ -0,0 +1,150 @@
+"""Alignment of many logger series onto one common time grid.
+
+Reindexing every series of a campaign separately creates a temporary frame per series. Here the grid is computed
+once, a single 2-D array is preallocated, and every series is written into its column with a binary search
+(nearest record) or np.interp (linear interpolation), so the cost grows linearly with the number of records.
+"""
+from dataclasses import dataclass
+from typing import Literal, Optional
+
+import numpy as np
+from gensor.core.dataset import Dataset as GWLDataset
+from gensor.core.timeseries import Timeseries as GWLTimeseries
+from pandas import DataFrame, DatetimeIndex, Series, Timedelta, Timestamp, date_range
+
+from waterspy.completeness import infer_intervals
+from waterspy.core.models import LoggerMeasurement, series_of
+
+METADATA = ['station', 'logger', 'measurement_type', 'unit']
+
+
+@dataclass
+class AlignedBlock:
+    """Series aligned onto a common grid.
+
+    Attributes:
+        grid (DatetimeIndex): The common time axis (UTC).
+        values (np.ndarray): The aligned values, one row per grid timestamp and one column per series.
+        metadata (DataFrame): The station, logger, measurement type, unit and sampling interval of every column.
+
+    Methods:
+        to_frame: Return the block as a wide DataFrame.
+    """
+
+    grid: DatetimeIndex
+    values: np.ndarray
+    metadata: DataFrame
+
+    def __repr__(self):
+        return f'AlignedBlock({len(self.grid)} x {self.values.shape[1]})'
+
+    def to_frame(self, label: str | list[str] = 'station') -> DataFrame:
+        """Return the block as a wide DataFrame, with columns labelled by one or more metadata fields."""
+        columns = self.metadata[label] if isinstance(label, str) else self.metadata[label].apply(tuple, axis=1)
+        return DataFrame(self.values, index=self.grid, columns=list(columns))
+
+
+def align(items: list | GWLDataset,
+          freq: Optional[str | Timedelta] = None,
+          method: Literal['nearest', 'linear'] = 'nearest',
+          how: Literal['outer', 'inner'] = 'outer',
+          tolerance: float = 0.5,
+          start: Optional[str | Timestamp] = None,
+          end: Optional[str | Timestamp] = None) -> AlignedBlock:
+    """Align many series onto a common regular grid.
+
+    Args:
+        items (list | Dataset): Series or timeseries objects (e.g. LoggerMeasurement or the gensor Timeseries read
+            by gensor.read_from_csv), or a dataset of them (e.g. a LoggerDataset).
+        freq (str | Timedelta, optional): The spacing of the grid. Defaults to the median of the sampling intervals
+            of the series.
+        method (str): 'nearest' takes the nearest record, 'linear' interpolates between the records around a grid
+            timestamp. Defaults to 'nearest'.
+        how (str): 'outer' spans the grid from the first to the last record of all series, 'inner' only covers the
+            period all series have in common. Defaults to 'outer'.
+        tolerance (float): In units of the sampling interval of a series: the largest distance to the nearest
+            record, or for 'linear' the largest gap (plus one interval) that is interpolated. Grid timestamps
+            beyond it are NaN. Defaults to 0.5.
+        start (str | Timestamp, optional): The start of the grid. Defaults to the start given by `how`.
+        end (str | Timestamp, optional): The end of the grid. Defaults to the end given by `how`.
+
+    Returns:
+        AlignedBlock: The grid, the aligned values and the metadata of the series.
+
+    Example:
+        >>> block = align(dataset, freq='15min', method='linear')
+        >>> block.to_frame()
+    """
+    if method not in ['nearest', 'linear']:
+        raise ValueError(f"Invalid method: {method}. Must be 'nearest' or 'linear'")
+    if isinstance(items, GWLDataset):
+        items = [item for item in items.timeseries if item is not None]
+    # gensor timeseries name their metadata differently (location, sensor, variable)
+    items = [LoggerMeasurement.from_timeseries(item) if isinstance(item, GWLTimeseries) else item for item in items]
+
+    times, values = [], []
+    for item in items:
+        series = series_of(item)
+        if series.hasnans:
+            series = series.dropna()
+        index = DatetimeIndex(series.index)
+        index = index.tz_localize('UTC') if index.tz is None else index.tz_convert('UTC')
+        t, v = index.asi8, series.to_numpy(dtype='float64')
+        if not index.is_monotonic_increasing:
+            order = np.argsort(t, kind='stable')
+            t, v = t[order], v[order]
+        times.append(t)
+        values.append(v)
+
+    lengths = np.array([len(t) for t in times])
+    stacked = np.concatenate(times) if times else np.empty(0, dtype='int64')
+    intervals = infer_intervals(stacked, np.repeat(np.arange(len(times)), lengths), len(times))
+
+    if freq is None:
+        known = intervals[intervals > 0]
+        if not len(known):
+            raise ValueError('The sampling interval cannot be inferred. Specify freq.')
+        freq = Timedelta(int(np.median(known)))
+    step = Timedelta(freq)
+
+    non_empty = [t for t in times if len(t)]
+    firsts, lasts = [t[0] for t in non_empty], [t[-1] for t in non_empty]
+    if start is None:
+        start = Timestamp(min(firsts) if how == 'outer' else max(firsts), tz='UTC').floor(step)
+    if end is None:
+        end = Timestamp(max(lasts) if how == 'outer' else min(lasts), tz='UTC')
+    start, end = Timestamp(start), Timestamp(end)
+    start = start.tz_localize('UTC') if start.tzinfo is None else start
+    end = end.tz_localize('UTC') if end.tzinfo is None else end
+
+    grid = date_range(start, end, freq=step)
+    g = grid.asi8
+
+    # column-major, so that every series is written into contiguous memory
+    block = np.full((len(grid), len(times)), np.nan, order='F')
+    for column, (t, v, interval) in enumerate(zip(times, values, intervals)):
+        if not len(t):
+            continue
+        limit = tolerance * interval if interval else step.value * tolerance
+
+        right = np.searchsorted(t, g).clip(max=len(t) - 1)
+        left = (right - 1).clip(min=0)
+        if method == 'nearest':
+            closest = np.where(np.abs(g - t[left]) <= np.abs(t[right] - g), left, right)
+            block[:, column] = np.where(np.abs(t[closest] - g) <= limit, v[closest], np.nan)
+        else:
+            interpolated = np.interp(g, t, v, left=np.nan, right=np.nan)
+            # exact hits are always kept; otherwise the surrounding records must not be further apart than a gap
+            exact = t[right] == g
+            bracket = t[right] - t[left]
+            within = exact | (bracket <= (interval or step.value) + limit)
+            block[:, column] = np.where(within, interpolated, np.nan)
+
+    metadata = DataFrame([{field: getattr(item, field, None) for field in METADATA} for item in items],
+                         columns=METADATA)
+    for i, item in enumerate(items):
+        if isinstance(item, Series):
+            metadata.loc[i, 'station'] = item.name
+    metadata['interval'] = [Timedelta(int(i)) if i else None for i in intervals]
+
+    return AlignedBlock(grid=grid, values=block, metadata=metadata)
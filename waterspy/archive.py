@@ -0,0 +1,403 @@
+"""Local, memory-mapped archive of logger timeseries.
+
+Every series (station, logger, measurement type) is stored as two flat binary files: the timestamps as int64
+nanoseconds since epoch (UTC) and the values as float64. The files are opened as numpy memory maps, so a range
+query only touches the pages it needs, and new records are appended at the end of the files. The metadata of
+all series is kept in `index.json` in the archive directory.
+
+Appends write the values before the timestamps, and every append first truncates both files to the records they
+have in common, so an interrupted append never shifts later values against their timestamps. Records older than
+the archived ones are merged by writing a new pair of files, which replaces the old pair when the index is
+updated.
+"""
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Literal, Optional
+
+import numpy as np
+from pandas import DataFrame, DatetimeIndex, Series, Timestamp
+
+from waterspy.core.client import WatersyncClient
+from waterspy.core.models import LoggerMeasurement
+from waterspy.getters import get_groundwater_logger, get_meteo_logger
+
+INDEX_FILE = 'index.json'
+
+GETTERS = {
+    'groundwater': get_groundwater_logger,
+    'meteo': get_meteo_logger,
+}
+
+
+def _records(timeseries: Series) -> tuple[np.ndarray, np.ndarray]:
+    """The timestamps (int64 nanoseconds, UTC) and values of a Series, sorted by time without duplicated times."""
+    index = DatetimeIndex(timeseries.index)
+    index = index.tz_localize('UTC') if index.tz is None else index.tz_convert('UTC')
+    times = index.tz_localize(None).to_numpy(dtype='datetime64[ns]').view('int64')
+    values = np.asarray(timeseries.to_numpy(), dtype='float64')
+
+    order = np.argsort(times, kind='stable')
+    times, values = times[order], values[order]
+
+    if len(times):
+        keep = np.empty(len(times), dtype=bool)
+        keep[0] = True
+        np.not_equal(times[1:], times[:-1], out=keep[1:])
+        times, values = times[keep], values[keep]
+
+    return times, values
+
+
+def _server_time(timestamp: Timestamp) -> str:
+    # the API filters on whole seconds
+    return timestamp.floor('s').isoformat()
+
+
+def _to_ns(timestamp: Optional[str | Timestamp]) -> Optional[int]:
+    if timestamp is None:
+        return None
+    timestamp = Timestamp(timestamp)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.tz_localize('UTC')
+    return timestamp.value
+
+
+class LoggerArchive:
+    """
+    A directory holding memory-mapped logger timeseries.
+
+    Records are kept sorted by time: append_series only appends the records newer than the last archived timestamp
+    of a series, and fetch merges older records it downloads to fill the start of a requested range.
+
+    Attributes:
+        path (Path): The directory of the archive.
+
+    Properties:
+        series (DataFrame): The station, logger, measurement_type, unit and logger_alt of all archived series.
+
+    Methods:
+        append: Append a LoggerMeasurement to the archive.
+        append_series: Append a Series to the archive.
+        query: Read a range of a series as a LoggerMeasurement.
+        query_series: Read a range of a series as a Series.
+        last_timestamp: The last archived timestamp of a series.
+        fetch: Get a series, downloading only the records that are not archived yet.
+    """
+
+    def __init__(self, path: Path | str):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        index_path = self.path / INDEX_FILE
+        self._index: dict[str, dict] = json.loads(index_path.read_text()) if index_path.exists() else {}
+
+    def __repr__(self):
+        return f'LoggerArchive({self.path}, {len(self._index)} series)'
+
+    @staticmethod
+    def _key(station: str, logger: str, measurement_type: str) -> str:
+        return f'{station}|{logger}|{measurement_type}'
+
+    @property
+    def series(self) -> DataFrame:
+        columns = ['station', 'logger', 'measurement_type', 'unit', 'logger_alt']
+        return DataFrame([{c: entry.get(c) for c in columns} for entry in self._index.values()], columns=columns)
+
+    def _write_index(self) -> None:
+        tmp = self.path / f'{INDEX_FILE}.tmp'
+        tmp.write_text(json.dumps(self._index, indent=1))
+        os.replace(tmp, self.path / INDEX_FILE)
+
+    def _files(self, entry: dict) -> tuple[Path, Path]:
+        return self.path / f"{entry['file']}.time", self.path / f"{entry['file']}.value"
+
+    def _find(self, station: str, measurement_type: str, logger: Optional[str] = None) -> Optional[dict]:
+        if logger is not None:
+            return self._index.get(self._key(station, logger, measurement_type))
+
+        matches = [entry for entry in self._index.values()
+                   if entry['station'] == station and entry['measurement_type'] == measurement_type]
+        if len(matches) > 1:
+            raise ValueError(
+                f'Several loggers recorded {measurement_type} at {station}. Specify the logger.')
+        return matches[0] if matches else None
+
+    def _length(self, entry: dict) -> int:
+        time_file, value_file = self._files(entry)
+        if not time_file.exists() or not value_file.exists():
+            return 0
+        # an interrupted append can leave one file longer than the other
+        return min(time_file.stat().st_size, value_file.stat().st_size) // 8
+
+    def _open(self, entry: dict) -> tuple[np.ndarray, np.ndarray]:
+        time_file, value_file = self._files(entry)
+        n = self._length(entry)
+        if n == 0:
+            return np.empty(0, dtype='int64'), np.empty(0, dtype='float64')
+        return (np.memmap(time_file, dtype='int64', mode='r', shape=(n,)),
+                np.memmap(value_file, dtype='float64', mode='r', shape=(n,)))
+
+    def _truncate(self, entry: dict) -> None:
+        """Cut both files of a series to the records they have in common."""
+        n = self._length(entry)
+        for file in self._files(entry):
+            if file.exists() and file.stat().st_size != 8 * n:
+                os.truncate(file, 8 * n)
+
+    def first_timestamp(self,
+                        station: str,
+                        measurement_type: str,
+                        logger: Optional[str] = None) -> Optional[Timestamp]:
+        """The first archived timestamp of a series, or None if the series is not archived."""
+        entry = self._find(station, measurement_type, logger)
+        if entry is None:
+            return None
+        times, _ = self._open(entry)
+        return Timestamp(int(times[0]), tz='UTC') if len(times) else None
+
+    def last_timestamp(self,
+                       station: str,
+                       measurement_type: str,
+                       logger: Optional[str] = None) -> Optional[Timestamp]:
+        """The last archived timestamp of a series, or None if the series is not archived."""
+        entry = self._find(station, measurement_type, logger)
+        if entry is None:
+            return None
+        times, _ = self._open(entry)
+        return Timestamp(int(times[-1]), tz='UTC') if len(times) else None
+
+    def _entry(self,
+               key: str,
+               station: str,
+               logger: str,
+               measurement_type: str,
+               unit: Optional[str],
+               logger_alt: Optional[float]) -> dict:
+        entry = self._index.get(key)
+        if entry is None:
+            entry = {'station': station, 'logger': logger, 'measurement_type': measurement_type,
+                     'file': hashlib.sha1(key.encode()).hexdigest()[:16]}  # noqa: S324
+            self._index[key] = entry
+        entry['unit'] = unit if unit is not None else entry.get('unit')
+        entry['logger_alt'] = logger_alt if logger_alt is not None else entry.get('logger_alt')
+        return entry
+
+    def _prepend(self, measurement: LoggerMeasurement) -> int:
+        """Merge the records of a measurement that are older than the first archived record.
+
+        The merged series is written to a new pair of files, and the index is switched to them in one atomic
+        write, so an interruption leaves either the old or the new series.
+
+        Returns:
+            int: The number of merged records.
+        """
+        times, values = _records(measurement.timeseries)
+        key = self._key(measurement.station, measurement.logger, measurement.measurement_type)
+
+        with self._lock:
+            entry = self._entry(key, measurement.station, measurement.logger, measurement.measurement_type,
+                                measurement.unit, measurement.logger_alt)
+            archived_times, archived_values = self._open(entry)
+            if len(archived_times):
+                keep = times < archived_times[0]
+                times, values = times[keep], values[keep]
+            if not len(times):
+                return 0
+
+            old_files = self._files(entry)
+            generation = entry.get('generation', 0) + 1
+            new_entry = {**entry, 'generation': generation,
+                         'file': f"{hashlib.sha1(key.encode()).hexdigest()[:16]}-{generation}"}  # noqa: S324
+            time_file, value_file = self._files(new_entry)
+            with open(value_file, 'wb') as f:
+                f.write(values.tobytes())
+                f.write(np.asarray(archived_values).tobytes())
+            with open(time_file, 'wb') as f:
+                f.write(times.tobytes())
+                f.write(np.asarray(archived_times).tobytes())
+            del archived_times, archived_values
+
+            entry.update(new_entry)
+            self._write_index()
+            for file in old_files:
+                file.unlink(missing_ok=True)
+
+        return len(times)
+
+    def append_series(self,
+                      timeseries: Series,
+                      station: str,
+                      logger: str,
+                      measurement_type: str,
+                      unit: Optional[str] = None,
+                      logger_alt: Optional[float] = None) -> int:
+        """Append the records of a Series that are newer than the last archived record.
+
+        Args:
+            timeseries (Series): The values, indexed by timestamps. Naive timestamps are taken as UTC.
+            station (str): The station name.
+            logger (str): The logger serial number.
+            measurement_type (str): The type of measurement.
+            unit (str, optional): The unit of the values.
+            logger_alt (float, optional): The altitude of the logger.
+
+        Returns:
+            int: The number of appended records.
+        """
+        times, values = _records(timeseries)
+        key = self._key(station, logger, measurement_type)
+
+        with self._lock:
+            entry = self._entry(key, station, logger, measurement_type, unit, logger_alt)
+            self._truncate(entry)
+
+            archived, _ = self._open(entry)
+            if len(archived):
+                keep = times > archived[-1]
+                times, values = times[keep], values[keep]
+            del archived
+
+            time_file, value_file = self._files(entry)
+            with open(value_file, 'ab') as f:
+                f.write(values.tobytes())
+            with open(time_file, 'ab') as f:
+                f.write(times.tobytes())
+
+            self._write_index()
+
+        return len(times)
+
+    def append(self, measurement: LoggerMeasurement) -> int:
+        """Append the records of a LoggerMeasurement that are newer than the last archived record.
+
+        Returns:
+            int: The number of appended records.
+        """
+        return self.append_series(measurement.timeseries,
+                                  station=measurement.station,
+                                  logger=measurement.logger,
+                                  measurement_type=measurement.measurement_type,
+                                  unit=measurement.unit,
+                                  logger_alt=getattr(measurement, 'logger_alt', None))
+
+    def query_series(self,
+                     station: str,
+                     measurement_type: str,
+                     logger: Optional[str] = None,
+                     timestamp_start: Optional[str | Timestamp] = None,
+                     timestamp_end: Optional[str | Timestamp] = None) -> Series:
+        """Read the records between two timestamps (both inclusive) without loading the whole series.
+
+        Returns:
+            Series: The values with a UTC DatetimeIndex. Empty if the series is not archived.
+        """
+        entry = self._find(station, measurement_type, logger)
+        if entry is None:
+            return Series(dtype='float64', index=DatetimeIndex([], tz='UTC'))
+
+        times, values = self._open(entry)
+
+        start, end = _to_ns(timestamp_start), _to_ns(timestamp_end)
+        # binary search on the memory map only reads a handful of pages
+        i = np.searchsorted(times, start, side='left') if start is not None else 0
+        j = np.searchsorted(times, end, side='right') if end is not None else len(times)
+
+        index = DatetimeIndex(np.array(times[i:j]).view('datetime64[ns]')).tz_localize('UTC')
+        return Series(data=np.array(values[i:j]), index=index)
+
+    def query(self,
+              station: str,
+              measurement_type: str,
+              logger: Optional[str] = None,
+              timestamp_start: Optional[str | Timestamp] = None,
+              timestamp_end: Optional[str | Timestamp] = None) -> Optional[LoggerMeasurement]:
+        """Read the records between two timestamps (both inclusive) as a LoggerMeasurement.
+
+        Returns:
+            LoggerMeasurement: The archived records, or None if the series is not archived.
+        """
+        entry = self._find(station, measurement_type, logger)
+        if entry is None:
+            return None
+
+        return LoggerMeasurement(
+            timeseries=self.query_series(station, measurement_type, entry['logger'], timestamp_start, timestamp_end),
+            measurement_type=entry['measurement_type'],
+            unit=entry.get('unit'),
+            station=entry['station'],
+            logger=entry['logger'],
+            logger_alt=entry.get('logger_alt')
+        )
+
+    def fetch(self,
+              client: WatersyncClient,
+              station: str,
+              measurement_type: str,
+              logger: Optional[str] = None,
+              timestamp_start: Optional[str] = None,
+              timestamp_end: Optional[str] = None,
+              kind: Literal['groundwater', 'meteo'] = 'groundwater',
+              offline: bool = False) -> Optional[LoggerMeasurement]:
+        """Get a series through the archive.
+
+        Only the records that are not archived yet are downloaded with get_groundwater_logger or get_meteo_logger:
+        the records from the last archived timestamp on, and the records before the first archived one when the
+        requested range starts earlier than any previous download. The requested range is then read from the
+        archive.
+
+        Args:
+            client (WatersyncClient): The client to fetch data from.
+            station (str): The station name to filter by.
+            measurement_type (str): The type of measurement to filter by.
+            logger (str, optional): The logger to filter by. Defaults to None.
+            timestamp_start (str, optional): The start date to filter by. Defaults to None.
+            timestamp_end (str, optional): The end date to filter by. Defaults to None.
+            kind (str): Either 'groundwater' or 'meteo'. Defaults to 'groundwater'.
+            offline (bool): Only read from the archive, never contact the API. Defaults to False.
+
+        Returns:
+            LoggerMeasurement: The records in the requested range, or None if there are none.
+        """
+        if not offline:
+            def download(start: Optional[str], end: Optional[str]) -> Optional[LoggerMeasurement]:
+                measurement = GETTERS[kind](client=client, station=station, logger=logger,
+                                            measurement_type=measurement_type, timestamp_start=start,
+                                            timestamp_end=end)
+                return measurement if measurement is not None and len(measurement.timeseries) else None
+
+            entry = self._find(station, measurement_type, logger)
+            times, _ = self._open(entry) if entry is not None else (np.empty(0, dtype='int64'), None)
+            first = Timestamp(int(times[0]), tz='UTC') if len(times) else None
+            last = Timestamp(int(times[-1]), tz='UTC') if len(times) else None
+            del times
+
+            # the earliest start that was downloaded, None when the series was downloaded from its beginning;
+            # series appended without fetch are covered from their first record
+            requested = _to_ns(timestamp_start)
+            covered = requested
+            if first is not None:
+                covered = entry.get('start', first.value)
+                if covered is not None and (requested is None or requested < covered):
+                    # download up to the first archived record, so that the archive has no gaps
+                    head = download(timestamp_start, _server_time(first))
+                    if head is not None:
+                        self._prepend(head)
+                    covered = requested
+
+            # the records up to the last archived one are downloaded again and skipped when appending
+            start = _server_time(last) if last is not None else timestamp_start
+            if start is None or timestamp_end is None or _to_ns(start) <= _to_ns(timestamp_end):
+                tail = download(start, timestamp_end)
+                if tail is not None:
+                    self.append(tail)
+
+            entry = self._find(station, measurement_type, logger)
+            if entry is not None and ('start' not in entry or entry['start'] != covered):
+                with self._lock:
+                    entry['start'] = covered
+                    self._write_index()
+
+        return self.query(station, measurement_type, logger, timestamp_start, timestamp_end)
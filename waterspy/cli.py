@@ -0,0 +1,273 @@
+"""The `waterspy` command line tool for scheduled synchronisation jobs.
+
+    waterspy --config waterspy.toml pull [--stations PZ1 PZ2] [--start 2024-01-01] [--end 2024-02-01]
+    waterspy --config waterspy.toml push [FILES ...]
+
+The stations, date ranges and files are read from a TOML config file and can be overridden on the command line:
+
+    [client]
+    base_url = "https://watersync.example.com/api/"
+    project = "demo"
+    email = "user@example.com"      # the password is read from WATERSPY_PASSWORD or prompted once; the
+                                    # token is cached (see waterspy.core.token_cache). Without a terminal
+                                    # (e.g. under cron) nothing is prompted: a missing token or password is
+                                    # an error
+    workers = 8
+
+    [pull]
+    kind = "groundwater"            # or "meteo"
+    measurement_types = ["pressure"]
+    stations = ["PZ1", "PZ2"]
+    timestamp_start = "2024-01-01"
+    timestamp_end = "2024-02-01"
+    archive = "archive"             # optional: only download records newer than the local archive
+    output = "export"               # optional: write one CSV (or Parquet, format = "parquet") per series
+
+    [push]
+    files = ["incoming/*.csv"]      # van Essen CSV files (glob patterns)
+    stream = true
+    outbox = "outbox.sqlite"        # optional: queue the uploads durably before sending them
+    barometric = ["baro*"]          # station or logger patterns of the barometric loggers, whose records go to
+                                    # the meteo endpoint (default: stations and loggers starting with "baro",
+                                    # like van Essen's "Barodiver")
+
+    [push.screen]                   # optional: drop flagged records (see waterspy.screening.screen)
+    max_rate = 0.5
+    flat_length = 96
+
+Every command prints a throughput summary and exits with status 1 when some series (with an outbox: some records)
+could not be transferred.
+"""
+import argparse
+import fnmatch
+import glob
+import os
+import sys
+import time
+import tomllib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+from pydantic import SecretStr
+
+from waterspy.archive import LoggerArchive
+from waterspy.core.client import AuthenticationError, WatersyncClient
+from waterspy.core.models import LoggerMeasurement, MeteoLoggerMeasurement
+from waterspy.core.token_cache import token_cache
+from waterspy.core.utils.utils import load_from_csv
+from waterspy.outbox import UploadOutbox
+from waterspy.pipeline import fetch_logger_measurements
+from waterspy.screening import screen
+
+DEFAULT_CONFIG = 'waterspy.toml'
+DEFAULT_WORKERS = 4
+DEFAULT_BAROMETRIC = ['baro*']
+
+
+def load_config(path: Path | str) -> dict:
+    """Read a TOML config file.
+
+    Args:
+        path (Path | str): The config file.
+
+    Returns:
+        dict: The config, with the tables 'client', 'pull' and 'push' (empty when absent).
+    """
+    with open(path, 'rb') as f:
+        config = tomllib.load(f)
+
+    if 'base_url' not in config.get('client', {}) or 'project' not in config.get('client', {}):
+        raise ValueError(f'The [client] table of {path} must define base_url and project')
+
+    return {'pull': {}, 'push': {}, **config}
+
+
+def connect(config: dict) -> WatersyncClient:
+    """Create a client and log in, reusing the cached token of the user when there is one.
+
+    Without a terminal, the missing credentials cannot be prompted for, and AuthenticationError is raised instead.
+    """
+    settings = config['client']
+    client = WatersyncClient(base_url=settings['base_url'], project=settings['project'])
+
+    token = os.environ.get('WATERSPY_TOKEN')
+    if token:
+        client.token = SecretStr(token)
+        return client
+
+    email, password = settings.get('email'), os.environ.get('WATERSPY_PASSWORD')
+    if not sys.stdin.isatty():
+        users = [email] if email else token_cache.users(settings['base_url'])
+        cached = len(users) == 1 and token_cache.get(settings['base_url'], users[0])
+        if not cached and not (email and password):
+            raise AuthenticationError('No terminal to log in with: set WATERSPY_TOKEN, or the email of [client] and '
+                                      'WATERSPY_PASSWORD')
+
+    client.login(email, password)
+    return client
+
+
+def summarize(command: str, series: int, records: int, failed: int, seconds: float) -> dict:
+    """Print and return the throughput of a command."""
+    summary = {'command': command, 'series': series, 'records': records, 'failed': failed,
+               'seconds': round(seconds, 3), 'records_per_second': round(records / seconds) if seconds else 0}
+    print(f"{command}: {series} series, {records:,} records in {seconds:.1f} s "
+          f"({summary['records_per_second']:,} records/s), {failed} failed")
+    return summary
+
+
+def _write(measurement: LoggerMeasurement, output: Path, file_format: str) -> None:
+    name = f'{measurement.station}_{measurement.logger}_{measurement.measurement_type}'
+    if file_format == 'parquet':
+        from waterspy.exporters import to_parquet
+        to_parquet(measurement, output / f'{name}.parquet')
+    else:
+        measurement.timeseries.rename('value').to_csv(output / f'{name}.csv', index_label='timestamp')
+
+
+def pull(client: WatersyncClient, settings: dict, workers: int = DEFAULT_WORKERS) -> dict:
+    """Download the logger records of the configured stations.
+
+    With an `archive`, only the records newer than the archived ones are downloaded (see LoggerArchive.fetch),
+    otherwise all stations are downloaded and parsed in parallel (see fetch_logger_measurements).
+
+    Args:
+        client (WatersyncClient): The client to fetch data from.
+        settings (dict): The [pull] table of the config.
+        workers (int): The number of concurrent downloads. Defaults to 4.
+
+    Returns:
+        dict: The throughput summary.
+    """
+    started = time.perf_counter()
+    kind = settings.get('kind', 'groundwater')
+    stations = settings.get('stations', [])
+    measurement_types = settings.get('measurement_types') or [settings.get('measurement_type', 'pressure')]
+    start, end = settings.get('timestamp_start'), settings.get('timestamp_end')
+
+    measurements: list[LoggerMeasurement] = []
+    for measurement_type in measurement_types:
+        if settings.get('archive'):
+            archive = LoggerArchive(settings['archive'])
+
+            def fetch(station: str, measurement_type: str = measurement_type) -> Optional[LoggerMeasurement]:
+                return archive.fetch(client, station, measurement_type, timestamp_start=start, timestamp_end=end,
+                                     kind=kind)
+
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                measurements.extend(m for m in pool.map(fetch, stations) if m is not None)
+        else:
+            measurements.extend(fetch_logger_measurements(client, stations, measurement_type, kind=kind,
+                                                          timestamp_start=start, timestamp_end=end,
+                                                          io_workers=workers, processes=settings.get('processes')))
+
+    if settings.get('output'):
+        output = Path(settings['output'])
+        output.mkdir(parents=True, exist_ok=True)
+        for measurement in measurements:
+            _write(measurement, output, settings.get('format', 'csv'))
+
+    return summarize('pull', len(measurements), sum(len(m.timeseries) for m in measurements),
+                     len(stations) * len(measurement_types) - len(measurements), time.perf_counter() - started)
+
+
+def is_barometric(measurement: LoggerMeasurement, patterns: list[str]) -> bool:
+    """Whether the station or logger of a measurement matches one of the patterns (case-insensitive).
+
+    The van Essen files do not tell barometric loggers from groundwater loggers, so they are told apart by name.
+    """
+    names = [str(name).lower() for name in [measurement.station, measurement.logger] if name]
+    return any(fnmatch.fnmatchcase(name, pattern.lower()) for name in names for pattern in patterns)
+
+
+def push(client: WatersyncClient, settings: dict, workers: int = DEFAULT_WORKERS) -> dict:
+    """Upload the records of the configured van Essen CSV files.
+
+    Args:
+        client (WatersyncClient): The client to upload the data with.
+        settings (dict): The [push] table of the config.
+        workers (int): The number of files parsed and series uploaded at the same time. Defaults to 4.
+
+    Returns:
+        dict: The throughput summary. With an outbox, 'failed' counts the records that were not sent.
+    """
+    started = time.perf_counter()
+    files = sorted({file for pattern in settings.get('files', []) for file in glob.glob(pattern)})
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        measurements = [m for parsed in pool.map(load_from_csv, files) for m in parsed]
+    patterns = settings.get('barometric', DEFAULT_BAROMETRIC)
+    measurements = [MeteoLoggerMeasurement.from_timeseries(m) if is_barometric(m, patterns) else m
+                    for m in measurements]
+
+    if settings.get('screen'):
+        flags = screen(measurements, **settings['screen'])
+        masks = [flag['flagged'].to_numpy() for flag in flags]
+    else:
+        masks = [None] * len(measurements)
+    records = sum(len(m.timeseries) - (int(mask.sum()) if mask is not None else 0)
+                  for m, mask in zip(measurements, masks))
+
+    if settings.get('outbox'):
+        outbox = UploadOutbox(client, settings['outbox'])
+        for m, mask in zip(measurements, masks):
+            outbox.put_measurement(m if mask is None else m.model_copy(update={'ts': m.timeseries[~mask]}))
+        # records that could not be sent stay queued for the next run
+        counts = outbox.flush()
+        failed = counts['failed'] + counts['retry']
+    else:
+        def upload(item: tuple) -> bool:
+            measurement, mask = item
+            response = measurement.upload(client, stream=settings.get('stream', True), mask=mask)
+            return response is not None and response.status_code in [200, 201]
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            failed = sum(not ok for ok in pool.map(upload, zip(measurements, masks)))
+
+    return summarize('push', len(measurements), records, failed, time.perf_counter() - started)
+
+
+def parser() -> argparse.ArgumentParser:
+    """The argument parser of the `waterspy` command."""
+    main_parser = argparse.ArgumentParser(prog='waterspy', description='Bulk synchronisation with the Watersync API.')
+    main_parser.add_argument('-c', '--config', default=DEFAULT_CONFIG, help=f'TOML config file ({DEFAULT_CONFIG})')
+    main_parser.add_argument('-w', '--workers', type=int, help='number of concurrent transfers')
+    commands = main_parser.add_subparsers(dest='command', required=True)
+
+    pull_parser = commands.add_parser('pull', help='download logger records')
+    pull_parser.add_argument('--stations', nargs='+', help='stations to download')
+    pull_parser.add_argument('--start', dest='timestamp_start', help='start of the date range')
+    pull_parser.add_argument('--end', dest='timestamp_end', help='end of the date range')
+    pull_parser.add_argument('--output', help='directory for the downloaded series')
+
+    push_parser = commands.add_parser('push', help='upload logger records from van Essen CSV files')
+    push_parser.add_argument('files', nargs='*', help='CSV files or glob patterns')
+
+    return main_parser
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Run the `waterspy` command.
+
+    Returns:
+        int: The exit status: 0 on success, 1 when some series failed.
+    """
+    args = parser().parse_args(argv)
+    config = load_config(args.config)
+    workers = args.workers or config['client'].get('workers', DEFAULT_WORKERS)
+
+    # command line options override the config file
+    settings = dict(config[args.command])
+    overrides = {key: value for key, value in vars(args).items()
+                 if key not in ['config', 'workers', 'command'] and value}
+    settings.update(overrides)
+
+    client = connect(config)
+    summary = (pull if args.command == 'pull' else push)(client, settings, workers=workers)
+
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
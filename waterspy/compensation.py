@@ -0,0 +1,178 @@
+"""Barometric compensation of a whole network of groundwater loggers at once.
+
+The groundwater loggers are non-vented pressure transducers, so the barometric pressure has to be subtracted from
+their records before they can be turned into heads. Compensating the loggers one pair at a time spends most of its
+time resampling and aligning pandas objects. Here every logger is matched with the nearest records of its barometric
+station by a single binary search against the midpoints between the barometric timestamps, and its water columns and
+heads are written straight into arrays that hold the whole network, so that no intermediate frame is built.
+"""
+from typing import Optional
+
+import numpy as np
+from pandas import Categorical, DataFrame, DatetimeIndex, Timedelta, factorize
+
+from gensor.core.timeseries import Timeseries as GWLTimeseries
+
+from waterspy.core.models import LoggerMeasurement, MeteoLoggerMeasurement
+
+# conversion factors of the supported pressure units to cmH2O
+UNITS_CMH2O = {
+    'cmh2o': 1.0,
+    'mh2o': 100.0,
+    'mbar': 1.0197162,
+    'hpa': 1.0197162,
+    'kpa': 10.197162,
+    'pa': 0.010197162,
+}
+
+
+def to_cmh2o(unit: Optional[str]) -> float:
+    """The factor converting a pressure unit to cmH2O. Records without a unit are assumed to be in cmH2O.
+
+    Args:
+        unit (str): The unit, e.g. 'cmH2O', 'mbar' or 'kPa'.
+
+    Returns:
+        float: The conversion factor.
+    """
+    if unit is None:
+        return 1.0
+    key = unit.lower().replace(' ', '')
+    if key not in UNITS_CMH2O:
+        raise ValueError(f'Invalid pressure unit: {unit}. Must be one of {list(UNITS_CMH2O)}')
+    return UNITS_CMH2O[key]
+
+
+def _timestamps(timeseries) -> np.ndarray:
+    """The timestamps of a series as int64 nanoseconds in UTC. Naive timestamps are taken as UTC."""
+    index = DatetimeIndex(timeseries.index)
+    if index.tz is None:
+        index = index.tz_localize('UTC')
+    return index.asi8
+
+
+def nearest(times: np.ndarray, reference: np.ndarray, tolerance: int) -> np.ndarray:
+    """Find the nearest reference time of every time, like merge_asof(direction='nearest').
+
+    Args:
+        times (np.ndarray): The times to match (int64).
+        reference (np.ndarray): The sorted reference times (int64).
+        tolerance (int): The largest accepted distance.
+
+    Returns:
+        np.ndarray: The position of the nearest reference time, or -1 where none lies within the tolerance.
+    """
+    if not len(reference):
+        return np.full(len(times), -1)
+
+    # a time belongs to the reference time whose midpoints enclose it; times on a midpoint go to the earlier one
+    midpoints = reference[:-1] + (reference[1:] - reference[:-1]) // 2
+    closest = np.searchsorted(midpoints, times)
+
+    return np.where(np.abs(reference[closest] - times) <= tolerance, closest, -1)
+
+
+def compensate_network(measurements: list[LoggerMeasurement],
+                       barometric: MeteoLoggerMeasurement | list[MeteoLoggerMeasurement],
+                       pairing: Optional[dict[str, str]] = None,
+                       tolerance: str | Timedelta = '1h',
+                       threshold_wc: Optional[float] = None) -> DataFrame:
+    """Compensate the pressure records of many groundwater loggers with barometric records.
+
+    Every record is matched with the nearest record of the barometric station paired with its station. Both
+    series are converted to cmH2O, and the water column (in m) is added to the altitude of the logger.
+
+    Args:
+        measurements (list[LoggerMeasurement]): The pressure records of the groundwater loggers. gensor
+            Timeseries (e.g. read by gensor.read_from_csv) are accepted too.
+        barometric (MeteoLoggerMeasurement | list[MeteoLoggerMeasurement]): The barometric pressure records, as
+            MeteoLoggerMeasurement or gensor Timeseries.
+        pairing (dict[str, str], optional): Groundwater station -> barometric station. Not needed when there is
+            only one barometric station.
+        tolerance (str | Timedelta): The largest time difference between a record and its barometric record.
+            Records without a barometric record within the tolerance are dropped. Defaults to '1h'.
+        threshold_wc (float, optional): Drop records whose absolute water column (m) does not exceed the
+            threshold, e.g. when the logger was out of the water. Defaults to None.
+
+    Returns:
+        DataFrame: The station, logger, timestamp (UTC), water column (m) and head (m asl) of every compensated
+            record, in long form.
+
+    Note:
+        Loggers without an altitude get the water column above the logger as head.
+
+    Example:
+        >>> heads = compensate_network(measurements, [baro_north, baro_south],
+        ...                            pairing={'PZ1': 'BARO-N', 'PZ2': 'BARO-S'})
+        >>> heads.pivot(index='timestamp', columns='station', values='head')
+    """
+    if not isinstance(barometric, list):
+        barometric = [barometric]
+    # gensor timeseries (e.g. read by gensor.read_from_csv) keep their metadata under the gensor names
+    measurements = [LoggerMeasurement.from_timeseries(m) if isinstance(m, GWLTimeseries) else m
+                    for m in measurements]
+    barometric = [MeteoLoggerMeasurement.from_timeseries(b) if isinstance(b, GWLTimeseries) else b
+                  for b in barometric]
+    baro_stations = [b.station for b in barometric]
+
+    if pairing is None:
+        if len(barometric) != 1:
+            raise ValueError('A pairing of groundwater and barometric stations is required for more than one '
+                             'barometric station')
+        pairing = {m.station: baro_stations[0] for m in measurements}
+
+    unpaired = sorted({m.station for m in measurements if pairing.get(m.station) not in baro_stations})
+    if unpaired:
+        raise ValueError(f'No barometric station paired with: {unpaired}')
+
+    # per barometric station: the sorted timestamps and the pressure in cmH2O
+    references = []
+    for baro in barometric:
+        series = baro.timeseries.dropna()
+        baro_times = _timestamps(series)
+        order = np.argsort(baro_times, kind='stable')
+        references.append((baro_times[order], series.to_numpy(dtype='float64')[order] * to_cmh2o(baro.unit)))
+
+    # the kept records of every logger are written one after another into arrays sized for the whole network
+    size = sum(len(m.timeseries) for m in measurements)
+    times = np.empty(size, dtype='int64')
+    water_column = np.empty(size)
+    head = np.empty(size)
+    lengths = np.zeros(len(measurements), dtype='int64')
+
+    tolerance = Timedelta(tolerance).value
+    stop = 0
+    for i, m in enumerate(measurements):
+        baro_times, baro_values = references[baro_stations.index(pairing[m.station])]
+        logger_times = _timestamps(m.timeseries)
+        matched = nearest(logger_times, baro_times, tolerance)
+        baro_pressure = baro_values[matched] if len(baro_values) else np.zeros(len(matched))
+        baro_pressure[matched < 0] = np.nan
+
+        # cmH2O -> mH2O
+        logger_wc = (m.timeseries.to_numpy(dtype='float64') * to_cmh2o(m.unit) - baro_pressure) / 100
+        valid = ~np.isnan(logger_wc)
+        if threshold_wc is not None:
+            valid &= np.abs(logger_wc) > threshold_wc
+
+        start, stop = stop, stop + int(valid.sum())
+        if stop - start == len(valid):
+            times[start:stop] = logger_times
+            water_column[start:stop] = logger_wc
+        else:
+            times[start:stop] = logger_times[valid]
+            water_column[start:stop] = logger_wc[valid]
+        np.add(water_column[start:stop], float(m.logger_alt or 0), out=head[start:stop])
+        lengths[i] = stop - start
+
+    # the labels are built from per-measurement codes, which is much cheaper than factorising millions of strings
+    station_codes, station_names = factorize(np.array([m.station for m in measurements], dtype=object))
+    logger_codes, logger_names = factorize(np.array([m.logger for m in measurements], dtype=object))
+
+    return DataFrame({
+        'station': Categorical.from_codes(np.repeat(station_codes, lengths), categories=station_names),
+        'logger': Categorical.from_codes(np.repeat(logger_codes, lengths), categories=logger_names),
+        'timestamp': DatetimeIndex(times[:stop], tz='UTC'),
+        'water_column': water_column[:stop],
+        'head': head[:stop],
+    })
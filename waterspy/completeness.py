@@ -0,0 +1,393 @@
+"""Gap detection and completeness of logger timeseries across a whole network.
+
+The records of all series are stacked into one array, so the sampling intervals, gaps, duplicate timestamps and
+daily record counts of thousands of series are found with a handful of array operations. The results are kept in
+a small SQLite index. Updating the index only scans the records newer than the last indexed record of a series,
+and completeness reports for any period length are computed from the daily counts without touching the raw data.
+"""
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from pandas import DataFrame, DatetimeIndex, Series, Timedelta, Timestamp, date_range, read_sql_query
+
+from gensor.core.dataset import Dataset as GWLDataset
+from gensor.core.timeseries import Timeseries as GWLTimeseries
+
+from waterspy.core.models import LoggerMeasurement, series_of
+from waterspy.resample import resample
+
+DAY = Timedelta(days=1).value
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS series (
+    key TEXT PRIMARY KEY,
+    station TEXT NOT NULL,
+    logger TEXT,
+    measurement_type TEXT,
+    interval INTEGER,
+    first INTEGER NOT NULL,
+    last INTEGER NOT NULL,
+    records INTEGER NOT NULL,
+    duplicates INTEGER NOT NULL,
+    last_records INTEGER NOT NULL DEFAULT 1
+);
+CREATE TABLE IF NOT EXISTS gaps (
+    key TEXT NOT NULL,
+    start INTEGER NOT NULL,
+    stop INTEGER NOT NULL,
+    missing INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS gaps_key ON gaps (key, start);
+CREATE TABLE IF NOT EXISTS daily (
+    key TEXT NOT NULL,
+    day INTEGER NOT NULL,
+    records INTEGER NOT NULL,
+    PRIMARY KEY (key, day)
+);
+"""
+
+
+def _utc_ns(index) -> np.ndarray:
+    """Timestamps as int64 nanoseconds in UTC. Naive timestamps are taken as UTC."""
+    index = DatetimeIndex(index)
+    if index.tz is None:
+        index = index.tz_localize('UTC')
+    return index.asi8
+
+
+def _to_utc(timestamp: str | Timestamp) -> Timestamp:
+    timestamp = Timestamp(timestamp)
+    return timestamp.tz_localize('UTC') if timestamp.tzinfo is None else timestamp.tz_convert('UTC')
+
+
+def _group_starts(codes: np.ndarray) -> np.ndarray:
+    return np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if len(codes) else np.empty(0, dtype='int64')
+
+
+def infer_intervals(times: np.ndarray, codes: np.ndarray, n_series: int) -> np.ndarray:
+    """Infer the nominal sampling interval of many stacked series at once.
+
+    The interval is the median of the positive differences between consecutive records of a series, which is not
+    affected by gaps or occasional extra records.
+
+    Args:
+        times (np.ndarray): The timestamps (int64), sorted within each series.
+        codes (np.ndarray): The series of every record, sorted.
+        n_series (int): The number of series.
+
+    Returns:
+        np.ndarray: The interval of every series in nanoseconds, 0 for series with fewer than two distinct
+            timestamps.
+    """
+    diffs = np.diff(times)
+    keep = (codes[1:] == codes[:-1]) & (diffs > 0)
+    diffs, diff_codes = diffs[keep], codes[1:][keep]
+
+    intervals = np.zeros(n_series, dtype='int64')
+    if not len(diffs):
+        return intervals
+
+    order = np.lexsort((diffs, diff_codes))
+    diffs, diff_codes = diffs[order], diff_codes[order]
+    starts = _group_starts(diff_codes)
+    counts = np.diff(np.r_[starts, len(diffs)])
+    intervals[diff_codes[starts]] = diffs[starts + (counts - 1) // 2]
+
+    return intervals
+
+
+def infer_interval(timeseries: Series) -> Optional[Timedelta]:
+    """Infer the nominal sampling interval of a series (see infer_intervals).
+
+    Returns:
+        Timedelta: The interval, or None if the series has fewer than two distinct timestamps.
+    """
+    times = np.sort(_utc_ns(timeseries.index))
+    interval = infer_intervals(times, np.zeros(len(times), dtype='int64'), 1)[0]
+    return Timedelta(int(interval)) if interval else None
+
+
+def scan(times: np.ndarray,
+         codes: np.ndarray,
+         intervals: np.ndarray,
+         counted: Optional[np.ndarray] = None,
+         tolerance: float = 1.5) -> dict[str, DataFrame]:
+    """Find the gaps, duplicate timestamps and daily record counts of stacked series.
+
+    Args:
+        times (np.ndarray): The timestamps (int64 nanoseconds, UTC), sorted within each series.
+        codes (np.ndarray): The series of every record, sorted.
+        intervals (np.ndarray): The sampling interval of every series in nanoseconds (0 if unknown).
+        counted (np.ndarray, optional): Which records are new. Records that are not counted (e.g. the last indexed
+            record of a series) are only used to find the gap before the first new record.
+        tolerance (float): A gap is a difference between consecutive records of more than tolerance times the
+            interval. Defaults to 1.5.
+
+    Returns:
+        dict[str, DataFrame]: 'gaps' (code, start, end, missing), 'duplicates' (code, timestamp) and 'daily'
+            (code, day, records).
+    """
+    if counted is None:
+        counted = np.ones(len(times), dtype=bool)
+
+    diffs = np.diff(times)
+    same = codes[1:] == codes[:-1]
+    interval = intervals[codes[1:]]
+
+    duplicate = np.r_[False, same & (diffs == 0)] & counted
+    gap = same & (interval > 0) & (diffs > tolerance * interval)
+
+    gaps = DataFrame({
+        'code': codes[1:][gap],
+        'start': times[:-1][gap],
+        'end': times[1:][gap],
+        'missing': np.rint(diffs[gap] / interval[gap]).astype('int64') - 1,
+    })
+    duplicates = DataFrame({'code': codes[duplicate], 'timestamp': times[duplicate]})
+
+    # records per day, without duplicates
+    unique = counted & ~duplicate
+    days, day_codes = times[unique] // DAY * DAY, codes[unique]
+    starts = np.flatnonzero(np.r_[True, (days[1:] != days[:-1]) | (day_codes[1:] != day_codes[:-1])]) \
+        if len(days) else np.empty(0, dtype='int64')
+    daily = DataFrame({
+        'code': day_codes[starts],
+        'day': days[starts],
+        'records': np.diff(np.r_[starts, len(days)]),
+    })
+
+    return {'gaps': gaps, 'duplicates': duplicates, 'daily': daily}
+
+
+class CompletenessIndex:
+    """
+    An SQLite index of the sampling interval, gaps, duplicates and daily record counts of logger series.
+
+    Attributes:
+        path (Path): The SQLite database.
+        tolerance (float): A gap is a difference between consecutive records of more than tolerance times the
+            sampling interval.
+
+    Properties:
+        series (DataFrame): The interval, first and last record, and number of records and duplicates per series.
+
+    Methods:
+        update: Index the records of LoggerMeasurements that are newer than the indexed records.
+        gaps: The gaps of the indexed series.
+        completeness: The completeness of the indexed series per period.
+    """
+
+    def __init__(self, path: Path | str = 'waterspy-completeness.sqlite', tolerance: float = 1.5):
+        self.path = Path(path)
+        self.tolerance = tolerance
+
+        with closing(self._connect()) as db, db:
+            db.executescript(SCHEMA)
+            # indexes created before the number of records at the last timestamp was kept
+            if 'last_records' not in [row[1] for row in db.execute('PRAGMA table_info(series)')]:
+                db.execute('ALTER TABLE series ADD COLUMN last_records INTEGER NOT NULL DEFAULT 1')
+
+    def __repr__(self):
+        return f'CompletenessIndex({self.path})'
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    @staticmethod
+    def _key(measurement: LoggerMeasurement) -> str:
+        return f'{measurement.station}|{measurement.logger}|{measurement.measurement_type}'
+
+    @property
+    def series(self) -> DataFrame:
+        with closing(self._connect()) as db:
+            frame = read_sql_query('SELECT * FROM series ORDER BY key', db)
+        frame['interval'] = frame['interval'].astype('timedelta64[ns]')
+        for column in ['first', 'last']:
+            frame[column] = DatetimeIndex(frame[column].astype('int64')).tz_localize('UTC')
+        return frame.set_index('key')
+
+    def update(self, measurements: list[LoggerMeasurement] | GWLDataset) -> DataFrame:
+        """Index the records that are newer than the last indexed record of every series.
+
+        The sampling interval of a series is inferred when it is indexed for the first time. Records at the
+        timestamp of the last indexed record are duplicates when there are more of them than were indexed.
+
+        Args:
+            measurements (list[LoggerMeasurement] | Dataset): The series to index. gensor Timeseries (e.g. read
+                by gensor.read_from_csv) and datasets of them (e.g. a LoggerDataset) are accepted too.
+
+        Returns:
+            DataFrame: The number of new records, gaps and duplicates per series.
+        """
+        if isinstance(measurements, GWLDataset):
+            measurements = [m for m in measurements.timeseries if m is not None]
+        # gensor timeseries name their metadata differently (location, sensor, variable)
+        measurements = [LoggerMeasurement.from_timeseries(m) if isinstance(m, GWLTimeseries) else m
+                        for m in measurements]
+        keys = [self._key(m) for m in measurements]
+
+        with closing(self._connect()) as db, db:
+            known = {row[0]: row[1:] for row in db.execute('SELECT key, interval, first, last, records, duplicates, '
+                                                           'last_records FROM series')}
+
+            # stack the new records, each series preceded by its last indexed record
+            times, codes, counted = [], [], []
+            for code, (key, m) in enumerate(zip(keys, measurements)):
+                t = np.sort(_utc_ns(series_of(m).dropna().index))
+                previous = known.get(key)
+                if previous is not None:
+                    # the records at the last indexed timestamp beyond the indexed ones are new duplicates
+                    at_last = int(np.count_nonzero(t == previous[2]))
+                    t = np.r_[np.full(max(at_last - previous[5], 0), previous[2], dtype='int64'), t[t > previous[2]]]
+                    times.append(np.array([previous[2]], dtype='int64'))
+                    codes.append(np.array([code]))
+                    counted.append(np.zeros(1, dtype=bool))
+                times.append(t)
+                codes.append(np.full(len(t), code))
+                counted.append(np.ones(len(t), dtype=bool))
+
+            times = np.concatenate(times) if times else np.empty(0, dtype='int64')
+            codes = np.concatenate(codes) if codes else np.empty(0, dtype='int64')
+            counted = np.concatenate(counted) if counted else np.empty(0, dtype=bool)
+
+            intervals = infer_intervals(times, codes, len(keys))
+            for code, key in enumerate(keys):
+                if key in known and known[key][0]:
+                    intervals[code] = known[key][0]
+
+            result = scan(times, codes, intervals, counted, self.tolerance)
+            gaps, duplicates, daily = result['gaps'], result['duplicates'], result['daily']
+
+            code_keys = np.array(keys, dtype=object)
+            db.executemany('INSERT INTO gaps (key, start, stop, missing) VALUES (?, ?, ?, ?)',
+                           zip(code_keys[gaps['code']], gaps['start'].tolist(), gaps['end'].tolist(),
+                               gaps['missing'].tolist()))
+            db.executemany('INSERT INTO daily (key, day, records) VALUES (?, ?, ?) '
+                           'ON CONFLICT (key, day) DO UPDATE SET records = records + excluded.records',
+                           zip(code_keys[daily['code']], daily['day'].tolist(), daily['records'].tolist()))
+
+            new = np.bincount(codes[counted], minlength=len(keys))
+            n_duplicates = np.bincount(duplicates['code'], minlength=len(keys))
+            n_gaps = np.bincount(gaps['code'], minlength=len(keys))
+
+            # the first and last new record of every series
+            new_times, new_codes = times[counted], codes[counted]
+            starts = _group_starts(new_codes)
+            ends = np.r_[starts[1:], len(new_codes)] - 1 if len(starts) else starts
+            first_new = dict(zip(new_codes[starts].tolist(), new_times[starts].tolist()))
+            last_new = dict(zip(new_codes[starts].tolist(), new_times[ends].tolist()))
+            # the number of records at the last timestamp
+            last_times = np.full(len(keys), -1, dtype='int64')
+            last_times[new_codes[starts]] = new_times[ends]
+            at_last = np.bincount(new_codes[new_times == last_times[new_codes]], minlength=len(keys))
+
+            for code, (key, m) in enumerate(zip(keys, measurements)):
+                if not new[code]:
+                    continue
+                previous = known.get(key)
+                if previous is not None and last_new[code] == previous[2]:
+                    at_last[code] += previous[5]
+                db.execute('INSERT OR REPLACE INTO series VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', (
+                    key, m.station, m.logger, m.measurement_type, int(intervals[code]) or None,
+                    previous[1] if previous else first_new[code], last_new[code],
+                    (previous[3] if previous else 0) + int(new[code]) - int(n_duplicates[code]),
+                    (previous[4] if previous else 0) + int(n_duplicates[code]), int(at_last[code])))
+
+        return DataFrame({'key': keys, 'records': new - n_duplicates, 'gaps': n_gaps,
+                          'duplicates': n_duplicates}).set_index('key')
+
+    def gaps(self, key: Optional[str] = None, min_missing: int = 1) -> DataFrame:
+        """The gaps of the indexed series.
+
+        Args:
+            key (str, optional): The series ('station|logger|measurement_type'). Defaults to all series.
+            min_missing (int): Only return gaps of at least this many missing records. Defaults to 1.
+
+        Returns:
+            DataFrame: The series, the last record before and the first record after every gap, and the number of
+                missing records.
+        """
+        query = 'SELECT key, start, stop AS "end", missing FROM gaps WHERE missing >= ?'
+        params: list = [min_missing]
+        if key is not None:
+            query += ' AND key = ?'
+            params.append(key)
+
+        with closing(self._connect()) as db:
+            frame = read_sql_query(query + ' ORDER BY key, start', db, params=params)
+        for column in ['start', 'end']:
+            frame[column] = DatetimeIndex(frame[column].astype('int64')).tz_localize('UTC')
+        return frame
+
+    def completeness(self,
+                     freq: str = 'MS',
+                     timestamp_start: Optional[str | Timestamp] = None,
+                     timestamp_end: Optional[str | Timestamp] = None) -> DataFrame:
+        """The completeness of the indexed series per period, computed from the daily record counts.
+
+        The periods are pandas' resample buckets, labelled like pandas (e.g. 'MS' by their first and 'W' by their
+        last day). The expected number of records of a period is the part of it between the first and the last
+        record of a series (and within the requested range) divided by the sampling interval, so partial first
+        and last periods are complete when no records are missing.
+
+        Args:
+            freq (str): The period, a multiple of a day (e.g. 'D', 'W', 'MS', 'ME', 'YS'). Defaults to 'MS'.
+            timestamp_start (str | Timestamp, optional): The start of the range to report, at day resolution.
+            timestamp_end (str | Timestamp, optional): The end of the range to report, at day resolution (the
+                whole day is included).
+
+        Returns:
+            DataFrame: The records, expected records and completeness (%) per series and period.
+        """
+        with closing(self._connect()) as db:
+            daily = read_sql_query('SELECT key, day, records FROM daily ORDER BY key, day', db)
+            series = read_sql_query('SELECT key, interval, first, last FROM series WHERE interval IS NOT NULL', db)
+
+        start = _to_utc(timestamp_start).floor('D').value if timestamp_start is not None else None
+        end = (_to_utc(timestamp_end).floor('D') + Timedelta(days=1)).value if timestamp_end is not None else None
+
+        series = series.set_index('key')
+        daily = daily[daily['key'].isin(series.index)]
+        if start is not None:
+            daily = daily[daily['day'] >= start]
+        if end is not None:
+            daily = daily[daily['day'] < end]
+        items = {key: Series(group['records'].to_numpy(dtype='float64'),
+                             index=DatetimeIndex(group['day'].astype('int64')).tz_localize('UTC'))
+                 for key, group in daily.groupby('key', sort=False)}
+        if not items:
+            return DataFrame(columns=['key', 'period', 'records', 'expected', 'completeness'])
+
+        records = resample(items, freq, how='sum')
+        periods = records.index
+
+        # the first and last day of every period, binned like the records
+        days = date_range(Timestamp(daily['day'].min(), tz='UTC'), Timestamp(daily['day'].max(), tz='UTC'), freq='D')
+        bounds = Series(days.asi8, index=days).resample(freq).agg(['min', 'max']).reindex(periods)
+        period_start = bounds['min'].to_numpy('int64')[:, None]
+        period_end = bounds['max'].to_numpy('int64')[:, None] + DAY
+
+        # the part of every period between the first and the last record of a series, within the range
+        interval = series.loc[records.columns, 'interval'].to_numpy('int64')
+        first = series.loc[records.columns, 'first'].to_numpy('int64')
+        last = series.loc[records.columns, 'last'].to_numpy('int64') + interval
+        if start is not None:
+            first = np.maximum(first, start)
+        if end is not None:
+            last = np.minimum(last, end)
+        covered = np.minimum(period_end, last[None, :]) - np.maximum(period_start, first[None, :])
+        active = covered > 0
+
+        expected = DataFrame(covered / interval[None, :], index=periods, columns=records.columns)
+        report = DataFrame({
+            'records': records.where(active).stack(),
+            'expected': expected.where(active).stack(),
+        })
+        report.index.names = ['period', 'key']
+        report = report.reset_index()[['key', 'period', 'records', 'expected']]
+        report['completeness'] = (100 * report['records'] / report['expected']).clip(upper=100)
+
+        return report.sort_values(['key', 'period']).reset_index(drop=True)
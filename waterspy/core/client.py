@@ -1,13 +1,22 @@
 import requests
+import requests.adapters
+import threading
+import weakref
 from pandas import Series, to_datetime
 from getpass import getpass
 # typing
-from pydantic import (BaseModel, SecretStr,
+from pydantic import (BaseModel, SecretStr, PrivateAttr,
                       field_validator, EmailStr, ConfigDict)
-from typing import Optional
+from typing import Any, Callable, Optional
 from dataclasses import field
 # api endpoints
-from .constants import API_ENDPOINTS
+from .constants import API_ENDPOINTS, HTTP_POOL_MAXSIZE
+from .token_cache import token_cache
+from .utils.profiling import stage
+
+
+class AuthenticationError(Exception):
+    """The API rejected the token and the client cannot log in again without asking for credentials."""
 
 
 class WatersyncResponse(BaseModel):
@@ -29,6 +38,8 @@ class WatersyncResponse(BaseModel):
 
     response: requests.Response
 
+    _content: Any = PrivateAttr(default=None)
+
     @property
     def status_code(self) -> int:
         return self.response.status_code
@@ -43,12 +54,16 @@ class WatersyncResponse(BaseModel):
 
     @property
     def content(self) -> dict | str:
-        if self.status_code == 200:
-            return self.response.json()
-        elif self.status_code in [204, 404]:
-            return "No content found."
-        else:
-            return self.fail
+        # decode once; coalesced requests share this response between callers
+        if self._content is None:
+            if self.status_code == 200:
+                with stage('json_decode'):
+                    self._content = self.response.json()
+            elif self.status_code in [204, 404]:
+                self._content = "No content found."
+            else:
+                self._content = self.fail
+        return self._content
 
     @property
     def timeseries(self) -> Series:
@@ -59,7 +74,106 @@ class WatersyncResponse(BaseModel):
         if not isinstance(values, list) or not isinstance(timestamps, list):
             raise Exception("Timeseries data not found.")
 
-        return Series(data=values, index=to_datetime(timestamps, utc=True))
+        with stage('timestamps'):
+            index = to_datetime(timestamps, utc=True)
+
+        with stage('frame'):
+            return Series(data=values, index=index)
+
+
+class _InFlightCall:
+    """A GET request that is currently being executed by one of the threads."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[WatersyncResponse] = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalesces identical requests that are in flight at the same time.
+
+    The first caller for a given key (the leader) executes the request, all callers arriving while it is
+    running wait for it and receive the very same WatersyncResponse object. Once the request is finished the
+    key is released, so later calls hit the API again - nothing is cached beyond the lifetime of the call.
+
+    Methods:
+        do: Execute the function or join the in-flight call with the same key.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict[tuple, _InFlightCall] = {}
+
+    def do(self, key: tuple, fn: Callable[[], WatersyncResponse]) -> WatersyncResponse:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _InFlightCall()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result
+
+
+_in_flight = SingleFlight()
+_login_lock = threading.Lock()
+
+# (base url, token) -> the client that logged in with the token, which can log in again when it is rejected
+_token_owners: 'weakref.WeakValueDictionary[tuple[str, str], WatersyncClient]' = weakref.WeakValueDictionary()
+
+
+def _base(base_url: str) -> str:
+    return base_url if base_url.endswith('/') else f'{base_url}/'
+
+
+_sessions: dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(base_url: str) -> requests.Session:
+    """
+    Returns the session shared by all requests to the given base url.
+
+    The session keeps a pool of HTTP connections (see HTTP_POOL_MAXSIZE) that is reused by every thread, so
+    concurrent requests do not open a new connection each time.
+
+    Args:
+        base_url (str): The base url of the API.
+
+    Returns:
+        requests.Session: The shared session.
+    """
+    with _sessions_lock:
+        session = _sessions.get(base_url)
+        if session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=HTTP_POOL_MAXSIZE, pool_maxsize=HTTP_POOL_MAXSIZE)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _sessions[base_url] = session
+        return session
+
+
+def _is_stream(data: Any) -> bool:
+    return data is not None and not isinstance(data, (bytes, str, dict, list))
 
 
 class WatersyncRequest(BaseModel):
@@ -69,6 +183,10 @@ class WatersyncRequest(BaseModel):
     Some of the basic information (base_url, endpoint, project) can be unpacked from 
     a WaterDataClient object.
 
+    Request objects are immutable: the headers and params passed in are copied on creation and the
+    authentication info is added to fresh copies when the request is sent. A single request can therefore be
+    sent from many threads at once.
+
     Attributes:
         base_url (str): The base url of the API.
         endpoint (str): The endpoint of the API.
@@ -77,6 +195,9 @@ class WatersyncRequest(BaseModel):
         data (dict | list): The data to be sent with the request.
         headers (dict): The headers to be sent with the request.
         params (dict): The parameters to be sent with the request.
+        body (bytes | Iterator[bytes]): A JSON document sent as is instead of data. An iterator of bytes is
+            streamed with chunked transfer encoding and can only be sent once (see waterspy.core.utils.serializers).
+        coalesce (bool): Whether identical GET requests in flight at the same time should share one call.
 
     Properties:
         full_url (str): The full url of the request.
@@ -87,6 +208,9 @@ class WatersyncRequest(BaseModel):
         delete: Make a DELETE request to the API.
         patch: Make a PATCH request to the API.
     """
+
+    model_config = ConfigDict(frozen=True)
+
     base_url: str
     endpoint: str
     project: Optional[str] = None
@@ -94,6 +218,8 @@ class WatersyncRequest(BaseModel):
     data: Optional[dict | list] = {}
     headers: dict = {}
     params: dict = {}
+    body: Any = field(default=None, repr=False)  # bytes or an iterator of bytes
+    coalesce: bool = True
 
     @field_validator('base_url')
     def ensure_trailing_slash_in_base_url(cls, v):
@@ -113,41 +239,70 @@ class WatersyncRequest(BaseModel):
             return f"{v}/"
         return v
 
+    @field_validator('headers', 'params')
+    def copy_mapping(cls, v):
+        # the caller keeps ownership of the dictionary it passed in
+        return dict(v)
+
     @property
     def full_url(self):
         return f'{self.base_url}{self.endpoint}'
 
-    def _include_auth_info(self):
+    def _auth_headers(self) -> dict:
+        headers = dict(self.headers)
         if self.token:
-            self.headers['Authorization'] = f'Token {self.token.get_secret_value()}'
+            headers['Authorization'] = f'Token {self.token.get_secret_value()}'
+        return headers
 
+    def _auth_params(self) -> dict:
+        params = dict(self.params)
         if self.project:
-            self.params['project'] = self.project
+            params['project'] = self.project
+        return params
+
+    def _send(self, method: str, headers: Optional[dict] = None, renew: bool = True, **kwargs) -> WatersyncResponse:
+        with stage('http'):
+            response = get_session(self.base_url).request(
+                method, self.full_url, params=self._auth_params(), headers={**self._auth_headers(), **(headers or {})},
+                **kwargs)
+
+        # a rejected token (e.g. a cached one that expired) is renewed by the client that logged in with it, and
+        # the request is sent once more; a streamed body cannot be sent twice
+        if renew and response.status_code == 401 and self.token and not _is_stream(kwargs.get('data')):
+            owner = _token_owners.get((self.base_url, self.token.get_secret_value()))
+            if owner is not None:
+                token = owner._renew_token(self.token.get_secret_value())
+                return self.model_copy(update={'token': token})._send(method, headers=headers, renew=False, **kwargs)
+
+        return WatersyncResponse(response=response)
 
     def post(self) -> WatersyncResponse:
-        self._include_auth_info()
+        if self.body is not None:
+            return self._send('POST', data=self.body, headers={'Content-Type': 'application/json'})
 
-        response = requests.post(
-            self.full_url, json=self.data, params=self.params, headers=self.headers)
+        return self._send('POST', json=self.data)
 
-        return WatersyncResponse(response=response)
+    def _coalescing_key(self) -> tuple:
+        token = self.token.get_secret_value() if self.token else None
+        params = tuple(sorted((str(k), str(v)) for k, v in self._auth_params().items()))
+        return (self.full_url, params, token)
 
-    def get(self) -> WatersyncResponse:
-        self._include_auth_info()
+    def _get_decoded(self) -> WatersyncResponse:
+        response = self._send('GET')
+        # decode in the leader so that all waiting callers share the decoded content
+        response.content  # noqa: B018
+        return response
 
-        response = requests.get(
-            self.full_url, params=self.params, headers=self.headers)
-
-        return WatersyncResponse(response=response)
+    def get(self) -> WatersyncResponse:
+        if not self.coalesce:
+            return self._send('GET')
 
-    def delete(self):
-        self._include_auth_info()
+        return _in_flight.do(self._coalescing_key(), self._get_decoded)
 
-        return NotImplementedError("DELETE method not implemented yet.")
+    def delete(self) -> WatersyncResponse:
+        return self._send('DELETE')
 
     def patch(self):
-        self._include_auth_info()
-
         return NotImplementedError("PATCH method not implemented yet.")
 
 
@@ -159,27 +314,68 @@ class WatersyncClient(BaseModel):
         base_url (str): The base url of the API.
         project (str): The project name.
         token (SecretStr): The token needed to authenticate with the API.
+        coalesce (bool): Whether identical GET requests in flight at the same time should share one call.
+            Callers receive the same decoded content and must not mutate it. Default is True.
 
     Methods:
-        login: Obtain a token from the API.
+        login: Obtain a token from the API, or reuse the cached token of the user.
+        logout: Forget the token and remove it from the token cache.
+
+    Note:
+        A client can be shared between threads. Requests are built from a snapshot of the client (see
+        model_dump), logging in is serialised by a lock and all requests to the same base url reuse one pooled
+        session (see get_session).
+
+        When the API rejects the token of a client that logged in (status 401), the client logs in again with the
+        credentials given to login and the request is sent once more. A client that logged in with a cached token
+        and no password raises AuthenticationError instead of prompting, so that unattended jobs fail fast.
     """
     base_url: str
     project: str
     token: Optional[SecretStr] = field(default=None, repr=False)
+    coalesce: bool = True
+
+    _email: Optional[str] = PrivateAttr(default=None)
+    _password: Optional[SecretStr] = PrivateAttr(default=None)
+    _cache: bool = PrivateAttr(default=True)
+    _renew_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def _use_token(self, email: str, token: str) -> None:
+        self.token = SecretStr(token)
+        self._email = email
+        _token_owners[(_base(self.base_url), token)] = self
 
     def login(self,
               email: Optional[EmailStr] = None,
-              password: Optional[str] = None):
+              password: Optional[str] = None,
+              cache: bool = True):
         """
-        Obtain a token from the API.
+        Obtain a token from the API, or reuse the cached token of the user.
 
         Args:
-            email (str): The email of the user. If not provided a prompt will appear. Default is None.
-            password (str): The password of the user. If not provided a prompt will appear. Default is None.
+            email (str): The email of the user. If not provided, the only user with a cached token for the base url
+                is used, otherwise a prompt will appear. Default is None.
+            password (str): The password of the user. If not provided a prompt will appear, unless a cached token
+                is used. Default is None.
+            cache (bool): Whether to reuse a cached token and to cache the obtained token (see
+                waterspy.core.token_cache). Default is True.
 
         Returns:
             None
         """
+        if password:
+            self._password = SecretStr(password)
+        self._cache = cache
+
+        if cache:
+            if not email:
+                users = token_cache.users(self.base_url)
+                email = users[0] if len(users) == 1 else None
+            token = token_cache.get(self.base_url, email) if email else None
+            if token:
+                self._use_token(email, token)
+                print("Using cached token.")
+                return
 
         email = input("Enter your email: ") if not email else email
         password = getpass(
@@ -191,10 +387,43 @@ class WatersyncClient(BaseModel):
             data={'email': email, 'password': password}
         )
 
-        response = request.post()
-
-        if response.status_code == 200 and isinstance(response.content, dict):
-            self.token = SecretStr(response.content['token'])
-            print("Login successful.")
-        else:
-            raise Exception(response.fail)
+        with _login_lock:
+            response = request.post()
+
+            if response.status_code == 200 and isinstance(response.content, dict):
+                self._use_token(email, response.content['token'])
+                self._password = SecretStr(password)
+                if cache:
+                    token_cache.set(self.base_url, email, response.content['token'])
+                print("Login successful.")
+            else:
+                raise Exception(response.fail)
+
+    def logout(self):
+        """Forget the token and remove it from the token cache."""
+        if self._email:
+            token_cache.delete(self.base_url, self._email)
+        self.token = None
+
+    def _renew_token(self, rejected: str) -> SecretStr:
+        """Log in again after the API rejected a token, once for all threads that were rejected."""
+        with self._renew_lock:
+            if self.token is not None and self.token.get_secret_value() != rejected:
+                # another thread already logged in again
+                return self.token
+
+            print("Token rejected, logging in again.")
+            if self._email and self._cache:
+                cached = token_cache.get(self.base_url, self._email)
+                if cached and cached != rejected:
+                    # another process logged in in the meantime
+                    self._use_token(self._email, cached)
+                    return self.token
+            if self._email:
+                token_cache.delete(self.base_url, self._email)
+
+            if not self._email or self._password is None:
+                raise AuthenticationError(f'The API rejected the token for {self.base_url} and no password is '
+                                          'available to log in again. Log in with a password or provide a new token.')
+            self.login(self._email, self._password.get_secret_value(), cache=self._cache)
+            return self.token
@@ -3,6 +3,7 @@
 API_ENDPOINTS = {
     "login": "auth/token/login/",
     "groundwater-logger-measurements": "groundwater/loggerrecords/",
+    "groundwater-logger-measurements-delete": "groundwater/loggerrecords/bulkdelete/",
     "groundwater-manual-measurements": "groundwater/manualmeasurements/",
     "meteo-logger-measurements": "meteo/loggerrecords/",
     "subirrigation-logger-records": "subirri/loggerrecords/",
@@ -23,3 +24,9 @@ API_ENDPOINTS = {
         "waterquality-analytes": "waterquality/analytes/",
         "waterquality-methods": "waterquality/methods/"},
 }
+
+# maximum number of pooled HTTP connections kept per base url and shared by all threads
+HTTP_POOL_MAXSIZE = 32
+
+# the file in which tokens are cached between processes; overridden by the WATERSPY_TOKEN_CACHE environment variable
+TOKEN_CACHE_PATH = '~/.cache/waterspy/tokens.json'
@@ -1,21 +1,166 @@
 """Models getting basic data from WaterSync API."""
 from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Optional, Literal
+from functools import cached_property
+from typing import Any, ClassVar, Optional, Literal
+import numpy as np
+import requests
+from pandas import DataFrame, DatetimeIndex, Series, concat, to_datetime
+from pandas.api.types import is_datetime64_any_dtype
 from gensor.core.timeseries import Timeseries as GWLTimeseries
+from gensor.core.base import BaseTimeseries
 from gensor.core.dataset import Dataset as GWLDataset
 from waterspy.core.client import WatersyncClient, WatersyncRequest
 from waterspy.core.utils.handle_errors import handle_errors
-from pydantic import BaseModel, field_serializer, field_validator
+from waterspy.core.utils.profiling import stage
+from waterspy.core.utils.serializers import DEFAULT_CHUNK_SIZE, iter_timeseries_json
+from pydantic import BaseModel, TypeAdapter, ValidationError, field_serializer, field_validator
 from shapely.geometry import Point, mapping
 from waterspy.core.waterquality.models import *
 
 
+class BulkUploadResult(BaseModel):
+    """The outcome of uploading one item with bulk_upload.
+
+    Attributes:
+        index (int): The position of the item in the uploaded list.
+        item (str): A short description of the item.
+        ok (bool): Whether the item was saved.
+        status_code (int, optional): The status code of the request that carried the item.
+        message (str, optional): The validation error or the failure returned by the API.
+    """
+    index: int
+    item: str
+    ok: bool
+    status_code: Optional[int] = None
+    message: Optional[str] = None
+
+
+class BulkUploadReport(BaseModel):
+    """Per-item report of a bulk upload.
+
+    Attributes:
+        results (list[BulkUploadResult]): One result per uploaded item, in the order of the items.
+
+    Properties:
+        succeeded (list[BulkUploadResult]): The items that were saved.
+        failed (list[BulkUploadResult]): The items that failed validation or were rejected by the API.
+
+    Methods:
+        to_frame: The report as a DataFrame.
+    """
+    results: list[BulkUploadResult]
+
+    def __repr__(self):
+        return f'BulkUploadReport({len(self.succeeded)} uploaded, {len(self.failed)} failed)'
+
+    @property
+    def succeeded(self) -> list[BulkUploadResult]:
+        return [result for result in self.results if result.ok]
+
+    @property
+    def failed(self) -> list[BulkUploadResult]:
+        return [result for result in self.results if not result.ok]
+
+    def to_frame(self) -> DataFrame:
+        return DataFrame([result.model_dump() for result in self.results])
+
+
+def _validate(items: list, model: type[BaseModel]) -> tuple[list[tuple[int, Any]], dict[int, BulkUploadResult]]:
+    """Validate every item once: the valid (position, model) pairs and a failed result per invalid item."""
+    valid, failed = [], {}
+    with stage('validation'):
+        for i, item in enumerate(items):
+            try:
+                valid.append((i, model.model_validate(item)))
+            except ValidationError as e:
+                message = '; '.join(f"{'.'.join(str(loc) for loc in error['loc'])}: {error['msg']}"
+                                   for error in e.errors())
+                failed[i] = BulkUploadResult(index=i, item=repr(item), ok=False, message=message)
+    return valid, failed
+
+
+def bulk_upload(items: list,
+                client: WatersyncClient,
+                endpoint: str,
+                model: Optional[type[BaseModel]] = None,
+                batch_size: int = 100,
+                max_workers: int = 4) -> BulkUploadReport:
+    """Validate a list of models and post them to one endpoint in batches.
+
+    Invalid items are reported and skipped, the valid ones are sent as JSON lists of at most batch_size items,
+    with up to max_workers batches in flight at the same time. A batch that cannot be sent (e.g. a connection
+    error) is reported as failed without stopping the other batches.
+
+    Args:
+        items (list): Model instances or dictionaries.
+        client (WatersyncClient): The client to upload the data with.
+        endpoint (str): The endpoint to post the batches to.
+        model (type[BaseModel], optional): The model to validate the items with. Defaults to the type of the first
+            item.
+        batch_size (int): The maximum number of items per request. Defaults to 100.
+        max_workers (int): The maximum number of concurrent requests. Defaults to 4.
+
+    Returns:
+        BulkUploadReport: The outcome for every item.
+    """
+    if not items:
+        return BulkUploadReport(results=[])
+
+    model = model or type(items[0])
+    valid, results = _validate(items, model)
+
+    batches = [valid[start:start + batch_size] for start in range(0, len(valid), batch_size)]
+
+    def post_batch(batch: list[tuple[int, Any]]) -> list[BulkUploadResult]:
+        request = WatersyncRequest(
+            **client.model_dump(),
+            endpoint=endpoint,
+            data=[item._upload_payload() if hasattr(item, '_upload_payload') else item.model_dump(exclude_none=True)
+                  for _, item in batch]
+        )
+        try:
+            response = request.post()
+        except requests.RequestException as e:
+            return [BulkUploadResult(index=i, item=repr(items[i]), ok=False, message=str(e)) for i, _ in batch]
+
+        ok = response.status_code in [200, 201]
+        return [BulkUploadResult(index=i, item=repr(items[i]), ok=ok, status_code=response.status_code,
+                                 message=None if ok else response.fail)
+                for i, _ in batch]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for batch_results in pool.map(post_batch, batches):
+            results.update({result.index: result for result in batch_results})
+
+    return BulkUploadReport(results=[results[i] for i in sorted(results)])
+
+
+class BulkUploadMixin:
+    """Adds a bulk_upload classmethod to models that are posted to a single endpoint (ENDPOINT)."""
+
+    ENDPOINT: ClassVar[str]
+
+    def _upload_payload(self) -> dict:
+        return self.model_dump(exclude_none=True)  # type: ignore[attr-defined]
+
+    @classmethod
+    def bulk_upload(cls,
+                    items: list,
+                    client: WatersyncClient,
+                    batch_size: int = 100,
+                    max_workers: int = 4) -> BulkUploadReport:
+        """Validate and upload many objects in batches. See bulk_upload for the arguments."""
+        return bulk_upload(items, client, endpoint=cls.ENDPOINT, model=cls,
+                           batch_size=batch_size, max_workers=max_workers)
+
+
 class Option(BaseModel):
     target: str
     object: dict
 
-    OPTIONS: dict = {
+    OPTIONS: ClassVar[dict] = {
         'units': {"endpoint": 'base/units', "fields": ["unit"]},
         'analytes': {"endpoint": 'waterquality/analytes', "fields": ["analyte", "detail"]},
         'parameters': {"endpoint": 'waterquality/parameters', "fields": ["parameter"]},
@@ -57,8 +202,43 @@ class Option(BaseModel):
 
         return response
 
+    def _upload_payload(self) -> dict:
+        return self.object
 
-class Project(BaseModel):
+    @classmethod
+    def bulk_upload(cls,
+                    items: list,
+                    client: WatersyncClient,
+                    batch_size: int = 100,
+                    max_workers: int = 4) -> BulkUploadReport:
+        """Validate and upload many options, grouped by target. See bulk_upload for the arguments.
+
+        Options that are invalid or have an unknown target are reported as failed, like the invalid items of
+        bulk_upload.
+        """
+        valid, failed = _validate(items, cls)
+
+        results = list(failed.values())
+        targets: dict[str, list[int]] = {}
+        for i, option in valid:
+            if option.target in cls.OPTIONS:
+                targets.setdefault(option.target, []).append(i)
+            else:
+                results.append(BulkUploadResult(index=i, item=repr(items[i]), ok=False,
+                                                message=f'Invalid target specified: {option.target}'))
+
+        options = dict(valid)
+        for target, positions in targets.items():
+            report = bulk_upload([options[i] for i in positions], client, endpoint=cls.OPTIONS[target]['endpoint'],
+                                 model=cls, batch_size=batch_size, max_workers=max_workers)
+            for result in report.results:
+                i = positions[result.index]
+                results.append(result.model_copy(update={'index': i, 'item': repr(items[i])}))
+
+        return BulkUploadReport(results=sorted(results, key=lambda result: result.index))
+
+
+class Project(BulkUploadMixin, BaseModel):
 
     name: str
     description: Optional[str] = None
@@ -67,15 +247,15 @@ class Project(BaseModel):
     end_date: Optional[str] = None
     is_active: Optional[str] = None
 
+    ENDPOINT: ClassVar[str] = 'base/projects'
+
     @handle_errors
     def upload(self,
                client: WatersyncClient):
 
-        endpoint = 'base/projects'
-
         request = WatersyncRequest(
             **client.model_dump(),
-            endpoint=endpoint,
+            endpoint=self.ENDPOINT,
             data=self.model_dump(exclude_none=True)
         )
 
@@ -110,7 +290,7 @@ class StationDetail(BaseModel):
         return v
 
 
-class Station(BaseModel):
+class Station(BulkUploadMixin, BaseModel):
 
     class Config:
         arbitrary_types_allowed = True
@@ -124,6 +304,8 @@ class Station(BaseModel):
     institution: Optional[str] = None
     detail: Optional[StationDetail] = None
 
+    ENDPOINT: ClassVar[str] = 'base/station'
+
     @field_serializer('geom')
     def serialize_geom(self, value):
         geom_mapping = mapping(value)
@@ -135,11 +317,9 @@ class Station(BaseModel):
     def upload(self,
                client: WatersyncClient):
 
-        endpoint = 'base/station'
-
         request = WatersyncRequest(
             **client.model_dump(),
-            endpoint=endpoint,
+            endpoint=self.ENDPOINT,
             data=self.model_dump(exclude_none=True)
         )
 
@@ -152,7 +332,7 @@ class Station(BaseModel):
         return response
 
 
-class Logger(BaseModel):
+class Logger(BulkUploadMixin, BaseModel):
     identifier: str
     available: Optional[bool] = None
     owner: Optional[list] = None
@@ -160,14 +340,14 @@ class Logger(BaseModel):
     model: Optional[dict] = None
     comment: Optional[str] = None
 
+    ENDPOINT: ClassVar[str] = 'logger/loggers'
+
     def upload(self,
                client: WatersyncClient):
 
-        endpoint = 'logger/loggers'
-
         request = WatersyncRequest(
             **client.model_dump(),
-            endpoint=endpoint,
+            endpoint=self.ENDPOINT,
             data=[self.model_dump(exclude_none=True)]
         )
 
@@ -180,7 +360,7 @@ class Logger(BaseModel):
         return response
 
 
-class LoggerDeployment(BaseModel):
+class LoggerDeployment(BulkUploadMixin, BaseModel):
     logger: str
     station: str
     deployed_at: Optional[str] = None
@@ -190,18 +370,18 @@ class LoggerDeployment(BaseModel):
     logger_altitude: Optional[float] = None
     comment: Optional[str] = None
 
+    ENDPOINT: ClassVar[str] = 'logger/loggers'
+
     def upload(self,
                client: WatersyncClient):
 
-        endpoint = 'logger/loggers'
-
         request = WatersyncRequest(
             **client.model_dump(),
-            endpoint=endpoint,
+            endpoint=self.ENDPOINT,
             data=[self.model_dump(exclude_none=True)]
         )
 
-        print(f'Logger with sn {self.identifier} saved!')
+        print(f'Logger {self.logger} deployed at {self.station} saved!')
 
         response = request.post()
 
@@ -210,6 +390,24 @@ class LoggerDeployment(BaseModel):
         return response
 
 
+def series_of(item: Any, value: str = 'timeseries') -> Series:
+    """The Series held by an item: the item itself, its `value` attribute, or the records of a gensor Timeseries.
+
+    Args:
+        item: A Series, a timeseries object (e.g. LoggerMeasurement) or a gensor Timeseries, which keeps its records
+            in `ts` instead of `timeseries`.
+        value (str): The attribute holding the series. Defaults to 'timeseries'.
+
+    Returns:
+        Series: The series.
+    """
+    if isinstance(item, Series):
+        return item
+    if value == 'timeseries' and isinstance(item, GWLTimeseries):
+        return item.ts
+    return getattr(item, value)
+
+
 class LoggerDataset(GWLDataset):
     """Class to store a collection of timeseries.
 
@@ -220,9 +418,18 @@ class LoggerDataset(GWLDataset):
 
     Methods:
         align: Aligns the timeseries to a common time axis.
+        to_grid: Aligns all timeseries onto one regular grid in a single 2-D array (see waterspy.alignment.align).
         plot: Plots the timeseries data.
     """
 
+    def to_grid(self, freq=None, method: Literal['nearest', 'linear'] = 'nearest', **kwargs):
+        from waterspy.alignment import align  # waterspy.alignment imports this module
+        return align(self, freq=freq, method=method, **kwargs)
+
+
+# the field annotations of gensor's Dataset refer to BaseTimeseries, which is not in the namespace of this module
+LoggerDataset.model_rebuild(_types_namespace={'BaseTimeseries': BaseTimeseries})
+
 
 @dataclass
 class Timeseries:
@@ -234,11 +441,35 @@ class Timeseries:
     timeseries: Series
 
 
+def _manual_depths(timeseries: Series | DataFrame) -> Series:
+    """The measured depths below the TOC, indexed by timestamp.
+
+    Args:
+        timeseries (Series | DataFrame): A Series of depths indexed by timestamps, or a DataFrame with timestamp and
+            depth columns as accepted by upload_manual_groundwater_levels. Timestamps given as strings must be
+            formatted as '%Y-%m-%d %H:%M:%S'; records without a timestamp are skipped.
+
+    Returns:
+        Series: The depths.
+    """
+    if isinstance(timeseries, Series):
+        return timeseries
+    if not isinstance(timeseries, DataFrame):
+        raise ValueError("Invalid timeseries type")
+
+    timestamps = timeseries['timestamp'] if is_datetime64_any_dtype(timeseries['timestamp']) else to_datetime(
+        timeseries['timestamp'], format='%Y-%m-%d %H:%M:%S')
+    valid = timestamps.notna().to_numpy()
+    return Series(timeseries['depth'].to_numpy(dtype='float64')[valid], index=DatetimeIndex(timestamps[valid]),
+                  name='depth')
+
+
 @dataclass
 class GWLevelManualMeasurement(Timeseries):
     """
     Stores the manual groundwater level measurements. The main timeseries represents the groundwater levels measured
-    from the top of casing (TOC) to the groundwater level.
+    from the top of casing (TOC) to the groundwater level, either as a Series indexed by timestamps or as a
+    DataFrame with timestamp, depth and comment columns.
 
     Attributes:
         station (str): The station name.
@@ -252,43 +483,162 @@ class GWLevelManualMeasurement(Timeseries):
     Note:
         The API and this particular function will have to change eventually to account for cases when the TOC is not
         constant.
+
+        The derived series are computed on first access and cached. Assigning timeseries, toc_altitude or
+        toc_height clears the cache; call invalidate after changing the timeseries in place.
     """
 
     station: str
     toc_altitude: float
     toc_height: float
 
+    # the attributes the derived series are computed from
+    _INPUTS: ClassVar[tuple[str, ...]] = ('timeseries', 'toc_altitude', 'toc_height')
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        if name in self._INPUTS:
+            self.invalidate()
+
+    def invalidate(self) -> None:
+        """Clear the cached groundwater_depth and groundwater_elevation."""
+        self.__dict__.pop('groundwater_depth', None)
+        self.__dict__.pop('groundwater_elevation', None)
+
     def __repr__(self):
         return self.station
 
-    @property
+    @cached_property
     def groundwater_depth(self) -> Series:
-        return self.timeseries.sub(self.toc_height)
+        return _manual_depths(self.timeseries).sub(self.toc_height)
 
-    @property
+    @cached_property
     def groundwater_elevation(self) -> Series:
-        return self.timeseries.sub(self.toc_altitude)
+        return _manual_depths(self.timeseries).sub(self.toc_altitude)
 
 
-@dataclass
-class MeteoLoggerMeasurement(GWLTimeseries):
-    """Subclass of Timeseries for meteo data.
+def groundwater_levels(measurements: list[GWLevelManualMeasurement]) -> DataFrame:
+    """Compute the groundwater depth and elevation of many stations at once.
+
+    The manual measurements are aligned on the union of their timestamps and the TOC corrections are subtracted
+    from the whole frame in one operation.
+
+    Args:
+        measurements (list[GWLevelManualMeasurement]): The measurements, one per station. Their timeseries can be
+            Series or DataFrames, as for GWLevelManualMeasurement.
+
+    Returns:
+        DataFrame: The groundwater depth and elevation, indexed by timestamp, with ('depth' | 'elevation', station)
+            columns. Repeated measurements at the same timestamp of a station are averaged.
     """
+    stations = [m.station for m in measurements]
+    series = [_manual_depths(m.timeseries) for m in measurements]
+    series = [s if s.index.is_unique else s.groupby(level=0).mean() for s in series]
+    wide = concat(series, axis=1, keys=stations).sort_index()
+
+    values = wide.to_numpy(dtype='float64')
+    toc_height = np.array([m.toc_height for m in measurements], dtype='float64')
+    toc_altitude = np.array([m.toc_altitude for m in measurements], dtype='float64')
+
+    return concat({
+        'depth': DataFrame(values - toc_height, index=wide.index, columns=stations),
+        'elevation': DataFrame(values - toc_altitude, index=wide.index, columns=stations),
+    }, axis=1)
 
 
-@dataclass
 class LoggerMeasurement(GWLTimeseries):
     """Subclass of PiezometerTimeseries for logger data.
 
     The reason why this is separated from the logger is that the manula measurement also need to be stored
     somewhere, and they are not associated with a logger.
+
+    The records are kept in the gensor fields (ts, variable, unit, location, sensor, sensor_alt); the object can also
+    be created with, and read through, the names used by the API (timeseries, measurement_type, unit, station,
+    logger, logger_alt). Unlike gensor, any measurement type and unit of the API is accepted. Timestamps without a
+    timezone are taken as UTC.
+
+    Attributes:
+        barometric (bool): Whether the records come from a barometric (meteo) logger. Default is False.
     """
 
-    logger_alt: Optional[float] = None
+    variable: str
+    unit: Optional[str] = None
+    barometric: bool = False
+
+    # the names used by the API -> the gensor fields
+    FIELDS: ClassVar[dict[str, str]] = {
+        'timeseries': 'ts',
+        'measurement_type': 'variable',
+        'station': 'location',
+        'logger': 'sensor',
+        'logger_alt': 'sensor_alt',
+    }
+
+    def __init__(self, **data: Any):
+        data = {self.FIELDS.get(key, key): value for key, value in data.items()}
+        if isinstance(data.get('ts'), Series):
+            ts = data['ts']
+            index = DatetimeIndex(ts.index)
+            index = index.tz_localize('UTC') if index.tz is None else index.tz_convert('UTC')
+            data['ts'] = Series(ts.to_numpy(dtype='float64'), index=index, name=ts.name)
+        super().__init__(**data)
+
+    @classmethod
+    def from_timeseries(cls, timeseries: GWLTimeseries) -> LoggerMeasurement:
+        """Wrap a gensor Timeseries (e.g. read by gensor.read_from_csv) without copying or validating its records again.
+
+        Args:
+            timeseries (Timeseries): The gensor timeseries. Instances of the class are returned unchanged.
+
+        Returns:
+            LoggerMeasurement: The records and metadata of the timeseries.
+        """
+        if isinstance(timeseries, cls):
+            return timeseries
+        return cls.model_construct(**{name: getattr(timeseries, name) for name in GWLTimeseries.model_fields})
+
+    @property
+    def timeseries(self) -> Series:
+        return self.ts
+
+    @property
+    def measurement_type(self) -> str:
+        return self.variable
+
+    @property
+    def station(self) -> Optional[str]:
+        return self.location
+
+    @property
+    def logger(self) -> Optional[str]:
+        return self.sensor
+
+    @property
+    def logger_alt(self) -> Optional[float]:
+        return self.sensor_alt
 
     @handle_errors
     def upload(self,
-               client: WatersyncClient):
+               client: WatersyncClient,
+               stream: bool = False,
+               chunk_size: int = DEFAULT_CHUNK_SIZE,
+               mask: Optional[Series | np.ndarray] = None):
+        """Upload the records to the API.
+
+        Args:
+            client (WatersyncClient): The client to upload the data with.
+            stream (bool): Encode the records on the fly from the underlying arrays and send them with chunked
+                transfer encoding, so that the memory use does not grow with the size of the series. Default is False.
+            chunk_size (int): The number of records encoded at a time when streaming.
+            mask (Series | np.ndarray, optional): Boolean flags of the records that are not uploaded, one per record,
+                e.g. the 'flagged' column returned by waterspy.screening.screen. Default is None.
+        """
+        timeseries = self.timeseries
+        if mask is not None:
+            mask = np.asarray(mask, dtype=bool)
+            if len(mask) != len(timeseries):
+                raise ValueError(f'The mask has {len(mask)} flags for {len(timeseries)} records')
+            timeseries = timeseries[~mask]
 
         params = {
             'station': self.station,
@@ -299,11 +649,17 @@ class LoggerMeasurement(GWLTimeseries):
 
         endpoint = 'meteo/loggerrecords' if self.barometric else 'groundwater/loggerrecords'
 
+        if stream:
+            payload = {'body': iter_timeseries_json(timeseries, chunk_size=chunk_size)}
+        else:
+            with stage('serialize'):
+                payload = {'body': b''.join(iter_timeseries_json(timeseries, chunk_size=chunk_size))}
+
         request = WatersyncRequest(
             **client.model_dump(),
             endpoint=endpoint,
             params=params,
-            data=self.ts_to_dict()
+            **payload
         )
 
         print(f'Uploading timeseries: {self}')
@@ -318,6 +674,13 @@ class LoggerMeasurement(GWLTimeseries):
         return response
 
 
+class MeteoLoggerMeasurement(LoggerMeasurement):
+    """Subclass of LoggerMeasurement for meteo data.
+    """
+
+    barometric: bool = True
+
+
 @dataclass
 class SubirriTimeseries(Timeseries):
     """Subclass of Timeseries for Subirri data.
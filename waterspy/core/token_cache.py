@@ -0,0 +1,91 @@
+"""A cache of API tokens shared by the processes of a user.
+
+Short-lived processes (cron jobs, worker pools) would otherwise log in on every start. The tokens are stored in a
+JSON file keyed by base url and user email, which only the owner can read and write (mode 0600, in a directory
+with mode 0700). A cache file that other users can read is ignored, and the file is replaced atomically so that
+concurrent processes never read a partly written cache.
+"""
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+from .constants import TOKEN_CACHE_PATH
+
+
+def _key(base_url: str, email: str) -> str:
+    return f"{base_url.rstrip('/')}/|{email.lower()}"
+
+
+class TokenCache:
+    """
+    Tokens cached in a file, keyed by base url and user email.
+
+    Attributes:
+        path (Path): The cache file. Defaults to the WATERSPY_TOKEN_CACHE environment variable or TOKEN_CACHE_PATH,
+            read on every access so that the variable can be set after waterspy is imported.
+
+    Methods:
+        get: The cached token of a user.
+        set: Cache the token of a user.
+        delete: Remove the token of a user from the cache.
+        users: The users with a cached token for a base url.
+    """
+
+    def __init__(self, path: Optional[Path | str] = None):
+        self._path = path
+        self._lock = threading.Lock()
+
+    @property
+    def path(self) -> Path:
+        path = self._path or os.environ.get('WATERSPY_TOKEN_CACHE') or TOKEN_CACHE_PATH
+        return Path(path).expanduser()
+
+    def __repr__(self):
+        return f'TokenCache({self.path})'
+
+    def _read(self) -> dict[str, str]:
+        path = self.path
+        try:
+            if os.name == 'posix' and path.stat().st_mode & 0o077:
+                print(f'Ignoring the token cache {path}: it is accessible by other users.')
+                return {}
+            return json.loads(path.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _write(self, tokens: dict[str, str]) -> None:
+        path = self.path
+        path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        tmp = path.with_name(f'{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(tokens, f)
+        os.replace(tmp, path)
+
+    def get(self, base_url: str, email: str) -> Optional[str]:
+        """The cached token of a user, or None."""
+        return self._read().get(_key(base_url, email))
+
+    def set(self, base_url: str, email: str, token: str) -> None:
+        """Cache the token of a user."""
+        with self._lock:
+            tokens = self._read()
+            tokens[_key(base_url, email)] = token
+            self._write(tokens)
+
+    def delete(self, base_url: str, email: str) -> None:
+        """Remove the token of a user from the cache."""
+        with self._lock:
+            tokens = self._read()
+            if tokens.pop(_key(base_url, email), None) is not None:
+                self._write(tokens)
+
+    def users(self, base_url: str) -> list[str]:
+        """The emails of the users with a cached token for a base url."""
+        prefix = _key(base_url, '')
+        return [key[len(prefix):] for key in self._read() if key.startswith(prefix)]
+
+
+token_cache = TokenCache()
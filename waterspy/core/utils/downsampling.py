@@ -0,0 +1,132 @@
+"""Downsampling of long timeseries for plotting.
+
+A screen cannot show more points than it has pixels, so plotting years of high-frequency logger data mostly
+costs time. The methods below pick a subset of the points that keeps the shape of the line:
+
+- `lttb` (Largest-Triangle-Three-Buckets, Steinarsson 2013) keeps the points that span the largest triangles
+  with their neighbours and gives the closest visual match for a given number of points.
+- `minmax` keeps the minimum and the maximum of every bucket, so no spike is lost.
+"""
+from typing import Literal, Optional
+
+import numpy as np
+from pandas import DatetimeIndex, Series
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Select n_out points with the Largest-Triangle-Three-Buckets algorithm.
+
+    Args:
+        x (np.ndarray): The sorted x coordinates (e.g. int64 timestamps).
+        y (np.ndarray): The y coordinates, without missing values.
+        n_out (int): The number of points to keep, at least 3.
+
+    Returns:
+        np.ndarray: The indices of the selected points, in increasing order.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+
+    # the first and last points are always kept, the rest is split into n_out - 2 buckets
+    edges = np.linspace(1, n - 1, n_out - 1).astype('int64')
+    selected = np.empty(n_out, dtype='int64')
+    selected[0], selected[-1] = 0, n - 1
+
+    # the average point of every bucket, used as the third corner of the triangle
+    sums_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1)
+    sums_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1)
+    counts = np.diff(edges)
+    avg_x = np.append(sums_x / counts, x[-1])
+    avg_y = np.append(sums_y / counts, y[-1])
+
+    a = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        cx, cy = avg_x[i + 1], avg_y[i + 1]
+        area = np.abs((x[a] - cx) * (y[start:stop] - y[a]) - (x[a] - x[start:stop]) * (cy - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+
+    return selected
+
+
+def minmax(y: np.ndarray, n_out: int) -> np.ndarray:
+    """Select the minimum and maximum of n_out // 2 equally sized buckets.
+
+    Args:
+        y (np.ndarray): The y coordinates, without missing values.
+        n_out (int): The maximum number of points to keep.
+
+    Returns:
+        np.ndarray: The indices of the selected points, in increasing order.
+    """
+    n = len(y)
+    n_buckets = n_out // 2
+    if n_out >= n or n_buckets < 1:
+        return np.arange(n)
+
+    size = -(-n // n_buckets)
+    padded = np.full(n_buckets * size, np.nan)
+    padded[:n] = y
+    blocks = padded.reshape(n_buckets, size)
+
+    offsets = np.arange(n_buckets) * size
+    lows = offsets + np.argmin(np.where(np.isnan(blocks), np.inf, blocks), axis=1)
+    highs = offsets + np.argmax(np.where(np.isnan(blocks), -np.inf, blocks), axis=1)
+
+    return np.unique(np.concatenate([lows, highs]).clip(max=n - 1))
+
+
+def downsample(timeseries: Series,
+               n_out: int,
+               method: Literal['lttb', 'minmax'] = 'lttb') -> Series:
+    """Reduce a timeseries to about n_out points for plotting.
+
+    Missing values are dropped. Series that are already short enough are returned unchanged.
+
+    Args:
+        timeseries (Series): The timeseries, indexed by timestamps or numbers.
+        n_out (int): The number of points to keep, typically the width of the plot in pixels.
+        method (str): 'lttb' or 'minmax'. Defaults to 'lttb'.
+
+    Returns:
+        Series: The selected points of the timeseries.
+    """
+    if method not in ['lttb', 'minmax']:
+        raise ValueError(f"Invalid downsampling method: {method}. Must be 'lttb' or 'minmax'")
+
+    timeseries = timeseries.dropna()
+    if len(timeseries) <= n_out:
+        return timeseries
+
+    timeseries = timeseries.sort_index()
+    y = timeseries.to_numpy(dtype='float64')
+
+    if method == 'lttb':
+        index = timeseries.index
+        x = index.asi8 if isinstance(index, DatetimeIndex) else index.to_numpy(dtype='float64')
+        selected = lttb(x, y, n_out)
+    else:
+        selected = minmax(y, n_out)
+
+    return timeseries.iloc[selected]
+
+
+def pixel_width(figure_width: float, dpi: Optional[float] = None) -> int:
+    """The width of a figure in pixels, i.e. the number of points worth plotting along the x axis.
+
+    Args:
+        figure_width (float): The width of the figure in inches.
+        dpi (float, optional): The resolution of the figure. Defaults to matplotlib's 'figure.dpi'.
+
+    Returns:
+        int: The width in pixels.
+    """
+    if dpi is None:
+        from matplotlib import rcParams
+        dpi = rcParams['figure.dpi']
+    return int(figure_width * dpi)
@@ -0,0 +1,263 @@
+"""Profiling of the major stages of waterspy.
+
+The slow parts of a sync job are usually in a handful of places: the HTTP requests, decoding the JSON responses,
+parsing timestamps, validating pydantic models, building pandas objects and encoding upload payloads. These
+places are marked with `stage`, which costs next to nothing unless a `profile` is active. Inside a profile, the
+time spent in every stage is recorded per thread, including stages nested in others (e.g. the encoding of a
+streamed upload happens inside its HTTP request).
+
+Stages:
+    http: Sending a request and receiving the response.
+    json_decode: Decoding a JSON response body.
+    timestamps: Parsing timestamps.
+    validation: Validating (or constructing) pydantic models.
+    frame: Building Series and DataFrames.
+    serialize: Encoding upload payloads.
+
+Example:
+    >>> import waterspy
+    >>> with waterspy.profile(memory=True, output='sync.speedscope.json'):
+    ...     get_samples(client, 'parameters', 'groundwater')
+
+The `.speedscope.json` files can be opened on https://www.speedscope.app, `.folded` files hold folded stacks for
+flamegraph.pl or inferno.
+"""
+import json
+import threading
+import time
+import tracemalloc
+from contextlib import ContextDecorator, nullcontext
+from pathlib import Path
+from typing import Optional
+
+from pandas import DataFrame
+
+STAGES = ['http', 'json_decode', 'timestamps', 'validation', 'frame', 'serialize']
+
+# the profiles that are currently recording
+_active: list['profile'] = []
+_active_lock = threading.Lock()
+_local = threading.local()
+
+_NULL = nullcontext()
+
+
+class _Stage:
+    """A stage being timed in the current thread."""
+
+    __slots__ = ('name', 'start', 'children', 'memory')
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        stack = getattr(_local, 'stack', None)
+        if stack is None:
+            stack = _local.stack = []
+        stack.append(self)
+        self.children = 0
+        self.memory = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        stack = _local.stack
+        path = tuple(stage.name for stage in stack)
+        stack.pop()
+
+        duration = end - self.start
+        if stack:
+            stack[-1].children += duration
+        memory = tracemalloc.get_traced_memory()[0] - self.memory if tracemalloc.is_tracing() else 0
+
+        for active in list(_active):
+            active._record(path, self.start, end, duration - self.children, memory)
+        return False
+
+
+def stage(name: str):
+    """Mark a stage of the work for the active profiles.
+
+    Args:
+        name (str): The stage, one of STAGES.
+
+    Returns:
+        A context manager timing the stage, or a no-op when no profile is active.
+
+    Example:
+        >>> with stage('json_decode'):
+        ...     content = response.json()
+    """
+    if not _active:
+        return _NULL
+    return _Stage(name)
+
+
+class profile(ContextDecorator):  # noqa: N801
+    """
+    Record the time spent in the stages of waterspy, as a context manager or a decorator.
+
+    Attributes:
+        output (Path | str, optional): A file to write the recorded stages to: a speedscope profile, or folded
+            stacks when the suffix is '.folded' or '.txt'.
+        memory (bool): Trace the memory allocations with tracemalloc: the net memory allocated per stage and the
+            lines that allocated the most while profiling. Slows down the profiled code considerably.
+        report (bool): Print the report at the end.
+        top (int): The number of allocating lines in the report.
+
+    Properties:
+        stats (DataFrame): The calls, total and own time (and memory) per stage.
+        allocations (DataFrame): The lines that allocated the most memory (with memory=True).
+
+    Methods:
+        report_text: The report as text.
+        save: Write the recorded stages to a speedscope or folded stacks file.
+
+    Note:
+        The stages of all threads of the process are recorded, so with concurrent requests the time of the stages
+        can add up to more than the elapsed time. Work done in other processes (e.g. the parsing processes of
+        fetch_logger_measurements) is not recorded.
+
+    Example:
+        >>> @waterspy.profile(output='push.folded')
+        ... def push():
+        ...     ...
+    """
+
+    def __init__(self,
+                 output: Optional[Path | str] = None,
+                 memory: bool = False,
+                 report: bool = True,
+                 top: int = 10):
+        self.output = output
+        self.memory = memory
+        self.report = report
+        self.top = top
+        self.elapsed = 0
+        self._lock = threading.Lock()
+        self._stats: dict[tuple, list[int]] = {}
+        self._events: list[tuple] = []
+        self._allocations: list = []
+
+    def __enter__(self):
+        self._stats, self._events, self._allocations = {}, [], []
+        self._tracing = self.memory and not tracemalloc.is_tracing()
+        if self._tracing:
+            tracemalloc.start()
+        self._snapshot = tracemalloc.take_snapshot() if self.memory else None
+
+        self._start = time.perf_counter_ns()
+        with _active_lock:
+            _active.append(self)
+        return self
+
+    def __exit__(self, *exc):
+        with _active_lock:
+            _active.remove(self)
+        self.elapsed = time.perf_counter_ns() - self._start
+
+        if self._snapshot is not None:
+            difference = tracemalloc.take_snapshot().compare_to(self._snapshot, 'lineno')
+            self._allocations = [stat for stat in difference if stat.size_diff > 0][:self.top]
+            self._snapshot = None
+        if self._tracing:
+            tracemalloc.stop()
+
+        if self.output is not None:
+            self.save(self.output)
+        if self.report:
+            print(self.report_text())
+        return False
+
+    def _record(self, path: tuple, start: int, end: int, own: int, memory: int) -> None:
+        with self._lock:
+            entry = self._stats.get(path)
+            if entry is None:
+                entry = self._stats[path] = [0, 0, 0, 0]
+            entry[0] += 1
+            entry[1] += end - start
+            entry[2] += own
+            entry[3] += memory
+            self._events.append((threading.get_ident(), path, start - self._start, end - self._start))
+
+    @property
+    def stats(self) -> DataFrame:
+        stats = DataFrame([{
+            'stage': ' > '.join(path),
+            'calls': calls,
+            'total_s': total / 1e9,
+            'own_s': own / 1e9,
+            'share': own / self.elapsed if self.elapsed else 0.0,
+            'memory_mb': memory / 2**20,
+        } for path, (calls, total, own, memory) in self._stats.items()],
+            columns=['stage', 'calls', 'total_s', 'own_s', 'share', 'memory_mb'])
+        if not self.memory:
+            stats = stats.drop(columns='memory_mb')
+        return stats.sort_values('own_s', ascending=False).set_index('stage')
+
+    @property
+    def allocations(self) -> DataFrame:
+        return DataFrame([{
+            'line': str(stat.traceback),
+            'size_mb': stat.size_diff / 2**20,
+            'count': stat.count_diff,
+        } for stat in self._allocations], columns=['line', 'size_mb', 'count'])
+
+    def report_text(self) -> str:
+        """The report: the elapsed time, the time per stage and (with memory=True) the top allocating lines."""
+        lines = [f'waterspy profile: {self.elapsed / 1e9:.3f} s elapsed']
+        if self._stats:
+            lines.append(self.stats.to_string(float_format=lambda x: f'{x:.3f}'))
+        else:
+            lines.append('No stages recorded.')
+        if self._allocations:
+            lines.append('Top allocations:')
+            lines.append(self.allocations.to_string(index=False, float_format=lambda x: f'{x:.3f}'))
+        return '\n'.join(lines)
+
+    def save(self, path: Path | str) -> None:
+        """Write the recorded stages to a file.
+
+        Args:
+            path (Path | str): A '.folded' or '.txt' file gets folded stacks (the own time per stack in
+                microseconds, for flamegraph.pl or inferno), any other file a speedscope profile.
+        """
+        path = Path(path)
+        if path.suffix in ['.folded', '.txt']:
+            path.write_text(''.join(f"{';'.join(stack)} {own // 1000}\n"
+                                    for stack, (_, _, own, _) in self._stats.items()))
+            return
+        path.write_text(json.dumps(self._speedscope()))
+
+    def _speedscope(self) -> dict:
+        names = {name for _, stack, _, _ in self._events for name in stack}
+        frames = [name for name in STAGES if name in names] + sorted(names - set(STAGES))
+        frame = {name: i for i, name in enumerate(frames)}
+
+        threads: dict[int, list[tuple]] = {}
+        for thread, stack, start, end in self._events:
+            depth = len(stack)
+            # open parents before children and close children before parents at equal times
+            threads.setdefault(thread, []).extend([(start, 1, depth, 'O', frame[stack[-1]]),
+                                                   (max(end, start + 1), 0, -depth, 'C', frame[stack[-1]])])
+
+        profiles = []
+        for i, (thread, events) in enumerate(threads.items()):
+            events.sort()
+            profiles.append({
+                'type': 'evented',
+                'name': f'thread {i} ({thread})',
+                'unit': 'nanoseconds',
+                'startValue': 0,
+                'endValue': self.elapsed,
+                'events': [{'type': kind, 'frame': f, 'at': at} for at, _, _, kind, f in events],
+            })
+
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'shared': {'frames': [{'name': name} for name in frames]},
+            'profiles': profiles,
+            'name': 'waterspy',
+            'exporter': 'waterspy',
+        }
@@ -1,9 +1,20 @@
 from waterspy.core.models import LoggerMeasurement
 from gensor import read_from_csv as _load_from_csv
+from gensor.core.timeseries import Timeseries as GWLTimeseries
 from pathlib import Path
 
 
-def load_from_csv(path: Path) -> list[LoggerMeasurement]:
+def load_from_csv(path: Path | str) -> list[LoggerMeasurement]:
+    """Read the timeseries of a van Essen CSV file (or of all CSV files in a directory).
 
-    return _load_from_csv(path=path,
-                          file_format='vanessen')
+    Args:
+        path (Path | str): The file or directory.
+
+    Returns:
+        list[LoggerMeasurement]: The timeseries of the file, empty when it holds none.
+    """
+    parsed = _load_from_csv(path=Path(path),
+                            file_format='vanessen')
+    timeseries = [parsed] if isinstance(parsed, GWLTimeseries) else [ts for ts in parsed if ts is not None]
+
+    return [LoggerMeasurement.from_timeseries(ts) for ts in timeseries]
@@ -3,11 +3,13 @@ from __future__ import annotations
 from ast import Param
 from pandas import Series, DataFrame, concat, Timestamp
 from waterspy.core.client import WatersyncClient, WatersyncRequest
+from waterspy.core.utils.profiling import stage
 from typing import Any, List, Optional
 from datetime import datetime
-from pydantic import BaseModel, Field, model_validator
+from pydantic import BaseModel, Field, SerializationInfo, field_serializer, model_validator
 from itertools import product
 from waterspy.core.fields import AnalysisResult
+from waterspy.core.validators import handle_if_below_detection_limit
 
 
 class Measurement(BaseModel):
@@ -75,6 +77,65 @@ class Analyte(Measurement):
         return hco3_mg_per_L
 
 
+class MeasurementRecord:
+    """Lightweight measurement without validation.
+
+    Records have the attribute interface of the pydantic measurements (value, unit, parameter) but use
+    `__slots__`, so they take a fraction of the memory. Use them for large read-only collections, e.g.
+    get_samples(validate=False).
+
+    Methods:
+        from_dict: Create a record from a measurement returned by the API.
+        to_dict: Return the record as a dictionary, like model_dump.
+    """
+    __slots__ = ('value', 'unit', 'parameter')
+    _ALIASES: dict = {}
+
+    def __init__(self, value: float, unit: str, parameter: str):
+        self.value = value
+        self.unit = unit
+        self.parameter = parameter
+
+    def __repr__(self):
+        return f'{type(self).__name__}(value={self.value!r}, unit={self.unit!r}, parameter={self.parameter!r})'
+
+    def __eq__(self, other):
+        return type(self) is type(other) and \
+            (self.value, self.unit, self.parameter) == (other.value, other.unit, other.parameter)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> MeasurementRecord:
+        return cls(float(data['value']), data['unit'], data['parameter'])
+
+    def to_dict(self, by_alias: bool = False) -> dict:
+        record = {'value': self.value, 'unit': self.unit, 'parameter': self.parameter}
+        if by_alias:
+            record = {self._ALIASES.get(k, k): v for k, v in record.items()}
+        return record
+
+
+class ParameterRecord(MeasurementRecord):
+    """Slotted counterpart of Parameter."""
+    __slots__ = ()
+
+
+class AnalyteRecord(MeasurementRecord):
+    """Slotted counterpart of Analyte. from_dict applies the same conversions as the Analyte validators."""
+    __slots__ = ()
+    _ALIASES = {'parameter': 'analyte'}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> AnalyteRecord:
+        value, unit, parameter = data['value'], data['unit'], data['parameter']
+
+        if unit in ['μg/L', 'µg/L']:
+            value, unit = value / 1000.0, 'mg/L'
+        if parameter == 'Alkalinity':
+            value, unit, parameter = Analyte.alkalinity_to_hco3(value), 'mg/L', 'HCO3'
+
+        return cls(handle_if_below_detection_limit(float(value)), unit, parameter)
+
+
 class Sample(BaseModel):
     """Sample base model for water quality data.
 
@@ -94,6 +155,12 @@ class Sample(BaseModel):
     measurements: list
     comment: Optional[str] = None
 
+    @field_serializer('measurements', mode='wrap')
+    def serialize_measurements(self, measurements: list, handler, info: SerializationInfo):
+        # records are plain objects that pydantic cannot serialise by itself
+        return handler([m.to_dict(by_alias=info.by_alias) if isinstance(m, MeasurementRecord) else m
+                        for m in measurements])
+
     def filter_measurements(self, parameters: str | list) -> Sample | None:
         """Pop the measurements for the given parameters.
 
@@ -276,19 +343,20 @@ class SampleTimeseries(BaseModel):
             wide_df: The wide dataframe of the timeseries.
         """
 
-        ts_list = self.timeseries_list()
-
-        wide_df = concat(ts_list, axis=1)
+        with stage('frame'):
+            ts_list = self.timeseries_list()
+            wide_df = concat(ts_list, axis=1)
 
         return wide_df
 
     def long_ts(self) -> DataFrame:
         """Stack the timeseries into a long form DataFrame"""
 
-        ts_list = self.timeseries_list()
-        keys = [tuple(ts.name.split('-')) for ts in ts_list]
-        long_df = concat(ts_list, axis=0, keys=keys, names=[
-                         'station', 'parameter', 'timestamp'])
+        with stage('frame'):
+            ts_list = self.timeseries_list()
+            keys = [tuple(ts.name.split('-')) for ts in ts_list]
+            long_df = concat(ts_list, axis=0, keys=keys, names=[
+                             'station', 'parameter', 'timestamp'])
 
         return long_df
 
@@ -298,10 +366,13 @@ class SampleTimeseries(BaseModel):
         endpoint = 'waterquality/parametersamples' if self._return_type(
         ) == ParameterSample else 'waterquality/analyticalsamples'
 
+        with stage('serialize'):
+            data = self.model_dump(exclude_none=True, mode='json')['samples']
+
         request = WatersyncRequest(
             **client.model_dump(),
             endpoint=endpoint,
-            data=self.model_dump(exclude_none=True, mode='json')['samples']
+            data=data
         )
 
         response = request.post()
@@ -2,8 +2,9 @@
 from waterspy.core.waterquality.models import SampleTimeseries
 import seaborn as sns
 import matplotlib.pyplot as plt
-from typing import Optional
-from pandas import Timestamp, DataFrame, Categorical
+from typing import Literal, Optional
+from pandas import Timestamp, DataFrame, Categorical, concat
+from waterspy.core.utils.downsampling import downsample, pixel_width
 
 
 def boxplots(sample_ts: SampleTimeseries,
@@ -90,6 +91,7 @@ def lineplot(sample_ts: SampleTimeseries,
              title: str,
              vline: Optional[Timestamp] = None,
              hline: Optional[float] = None,
+             downsample_method: Optional[Literal['lttb', 'minmax']] = 'lttb',
              **kwargs) -> None:
     """Plot a lineplot of the samples.
 
@@ -101,12 +103,21 @@ def lineplot(sample_ts: SampleTimeseries,
         title (str): The title of the plot.
         vline (Optional[Timestamp], optional): A vertical line to plot. Defaults to None.
         hline (Optional[float], optional): A horizontal line to plot. Defaults to None.
+        downsample_method (Optional[str], optional): How series with more points than the figure has pixels
+            are reduced before plotting ('lttb' or 'minmax'). None plots every point. Defaults to 'lttb'.
     """
 
-    df_long = sample_ts.long_ts().reset_index(
-    ).sort_values(by=['station', 'timestamp'])
+    figsize = (12, 4)
+
+    df_long = sample_ts.long_ts()
+    if downsample_method:
+        n_out = pixel_width(figsize[0])
+        df_long = concat({key: downsample(ts.droplevel(['station', 'parameter']), n_out, method=downsample_method)
+                          for key, ts in df_long.groupby(level=['station', 'parameter'])},
+                         names=['station', 'parameter', 'timestamp'])
+    df_long = df_long.reset_index().sort_values(by=['station', 'timestamp'])
 
-    plt.figure(figsize=(12, 4))  # Create a new figure
+    plt.figure(figsize=figsize)  # Create a new figure
     ax = sns.lineplot(data=df_long, x='timestamp',
                       y=0, hue='station', style='station', markers=True, dashes=False)
 
@@ -1,4 +1,20 @@
-from waterspy.core.client import WatersyncClient
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional
+
+from pandas import DataFrame, Timedelta, Timestamp, date_range
+
+from waterspy.core.client import WatersyncClient, WatersyncRequest, WatersyncResponse
+from waterspy.core.constants import API_ENDPOINTS
+
+
+def deleted_count(response: WatersyncResponse) -> Optional[int]:
+    """Returns the number of deleted records reported by the API, if any."""
+    content = response.content
+    if isinstance(content, dict):
+        for key in ['deleted', 'count']:
+            if isinstance(content.get(key), int):
+                return content[key]
+    return None
 
 
 def delete_logger_records(client: WatersyncClient,
@@ -6,7 +22,7 @@ def delete_logger_records(client: WatersyncClient,
                           station: str | None = None,
                           logger: str | None = None,
                           timestamp_start: str | None = None,
-                          timestamp_end: str | None = None) -> None:
+                          timestamp_end: str | None = None) -> WatersyncResponse:
     """
     Deletes logger groundwater level measurements for the given filters.
 
@@ -23,10 +39,15 @@ def delete_logger_records(client: WatersyncClient,
     timestamp_end : str | None, optional
         The end date of the data to delete. If not provided, data up to the current date will be deleted.
 
+    Returns
+    -------
+    WatersyncResponse
+        The response of the API.
+
     Raises
     ------
     Exception
-        If the deletion operation fails.
+        If neither station nor logger is provided.
     """
 
     if not station and not logger:
@@ -43,7 +64,133 @@ def delete_logger_records(client: WatersyncClient,
 
     params = {k: v for k, v in params.items() if v is not None}
 
-    response = client.delete_data(
-        endpoint='groundwater/loggerrecords/bulkdelete', params=params)
+    request = WatersyncRequest(
+        **client.model_dump(),
+        endpoint=API_ENDPOINTS['groundwater-logger-measurements-delete'],
+        params=params
+    )
+
+    response = request.delete()
 
     print(response)
+
+    return response
+
+
+def _split_range(timestamp_start: str | None,
+                 timestamp_end: str | None,
+                 window: str | Timedelta | None) -> list[tuple[str | None, str | None]]:
+    """Split a time range into consecutive windows. Open ranges are not split."""
+    if window is None or timestamp_start is None or timestamp_end is None:
+        return [(timestamp_start, timestamp_end)]
+
+    start, end = Timestamp(timestamp_start), Timestamp(timestamp_end)
+    if start > end:
+        raise ValueError(f'timestamp_start {timestamp_start} is after timestamp_end {timestamp_end}')
+    bounds = list(date_range(start, end, freq=Timedelta(window)))
+    if bounds[-1] < end:
+        bounds.append(end)
+    if len(bounds) == 1:
+        return [(start.isoformat(), end.isoformat())]
+
+    return [(a.isoformat(), b.isoformat()) for a, b in zip(bounds[:-1], bounds[1:])]
+
+
+def bulk_delete_logger_records(client: WatersyncClient,
+                               filters: list[dict],
+                               window: str | Timedelta | None = '30D',
+                               max_workers: int = 4,
+                               progress: bool = True) -> DataFrame:
+    """
+    Deletes logger records for many station/logger/measurement_type combinations.
+
+    Long time ranges are split into windows so that every request stays small, and the requests are sent with a
+    bounded number of threads.
+
+    Parameters
+    ----------
+    client : WatersyncClient
+        The client used to make requests to the WaterSync API.
+    filters : list[dict]
+        The series to delete. Each dictionary takes the arguments of delete_logger_records: measurement_type,
+        station and/or logger, and optionally timestamp_start and timestamp_end.
+    window : str | Timedelta | None, optional
+        The length of the windows, e.g. '30D'. Ranges without start or end are sent as a single request.
+        None disables the splitting. Default is '30D'.
+    max_workers : int, optional
+        The maximum number of concurrent requests. Default is 4.
+    progress : bool, optional
+        Print the progress after every request. Default is True.
+
+    Returns
+    -------
+    DataFrame
+        One row per filter with the number of requests, failed requests and deleted records (None when the API
+        does not report the count).
+
+    Raises
+    ------
+    ValueError
+        If a filter has no measurement_type, no station and no logger, or starts after it ends. The filters are
+        checked before any request is sent.
+    """
+
+    for f in filters:
+        if not f.get('measurement_type') or not (f.get('station') or f.get('logger')):
+            raise ValueError(f'Each filter needs a measurement_type and a station and/or logger: {f}')
+
+    jobs = [(i, start, end)
+            for i, f in enumerate(filters)
+            for start, end in _split_range(f.get('timestamp_start'), f.get('timestamp_end'), window)]
+
+    def delete(job: tuple[int, str | None, str | None]) -> WatersyncResponse:
+        i, start, end = job
+        params = {
+            'logger': filters[i].get('logger'),
+            'station': filters[i].get('station'),
+            'measurement_type': filters[i]['measurement_type'],
+            'timestamp_start': start,
+            'timestamp_end': end
+        }
+        request = WatersyncRequest(
+            **client.model_dump(),
+            endpoint=API_ENDPOINTS['groundwater-logger-measurements-delete'],
+            params={k: v for k, v in params.items() if v is not None}
+        )
+        return request.delete()
+
+    summary = [{'station': f.get('station'),
+                'logger': f.get('logger'),
+                'measurement_type': f['measurement_type'],
+                'timestamp_start': f.get('timestamp_start'),
+                'timestamp_end': f.get('timestamp_end'),
+                'requests': 0,
+                'failed': 0,
+                'deleted': None} for f in filters]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(delete, job): job for job in jobs}
+        for done, future in enumerate(as_completed(futures), start=1):
+            i = futures[future][0]
+            row = summary[i]
+            row['requests'] += 1
+
+            try:
+                response = future.result()
+            except Exception as e:
+                row['failed'] += 1
+                message = str(e)
+            else:
+                if response.status_code in [200, 202, 204]:
+                    count = deleted_count(response)
+                    if count is not None:
+                        row['deleted'] = (row['deleted'] or 0) + count
+                    message = 'ok'
+                else:
+                    row['failed'] += 1
+                    message = response.fail
+
+            if progress:
+                print(f"[{done}/{len(jobs)}] {row['station'] or row['logger']} - {row['measurement_type']}: {message}")
+
+    return DataFrame(summary)
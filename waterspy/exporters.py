@@ -0,0 +1,221 @@
+"""Export timeseries and samples to Apache Arrow tables and Parquet files.
+
+The descriptive attributes of the objects (station, logger, unit, ...) are stored in the schema metadata under
+the `waterspy` key, so a table or file can be turned back into the same object with from_arrow/read_parquet.
+
+This module requires the optional pyarrow dependency (`pip install waterspy[arrow]`).
+"""
+import json
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+from pandas import DataFrame, DatetimeIndex, Series
+
+from waterspy.core.models import (AnalysisSample, Analyte, GWLevelManualMeasurement, LoggerMeasurement,
+                                  MeteoLoggerMeasurement, Parameter, ParameterSample, Sample, SampleTimeseries,
+                                  SubirriTimeseries)
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover
+    pa = None
+    pq = None
+
+METADATA_KEY = b'waterspy'
+
+# subclasses are exported as the nearest class in this table (see _exported_class)
+TIMESERIES_FIELDS = {
+    LoggerMeasurement: ['station', 'logger', 'measurement_type', 'unit', 'logger_alt'],
+    MeteoLoggerMeasurement: ['station', 'logger', 'measurement_type', 'unit', 'logger_alt'],
+    GWLevelManualMeasurement: ['station', 'toc_altitude', 'toc_height'],
+    SubirriTimeseries: ['measurement_type', 'logger', 'subirri_location', 'unit'],
+}
+
+SAMPLE_MODELS = {
+    'Sample': (Sample, Parameter),
+    'ParameterSample': (ParameterSample, Parameter),
+    'AnalysisSample': (AnalysisSample, Analyte),
+}
+
+SAMPLE_COLUMNS = ['sample', 'station', 'timestamp', 'institution', 'comment', 'method', 'parameter', 'value',
+                 'unit']
+
+Exportable = LoggerMeasurement | MeteoLoggerMeasurement | GWLevelManualMeasurement | SubirriTimeseries | \
+    SampleTimeseries
+
+
+def _require_pyarrow() -> None:
+    if pa is None:
+        raise ImportError("pyarrow is required for Arrow/Parquet export. Install it with 'pip install waterspy[arrow]'.")
+
+
+def _exported_class(obj: Any) -> Optional[type]:
+    """The first class in the MRO of the object with an entry in TIMESERIES_FIELDS."""
+    return next((cls for cls in type(obj).__mro__ if cls in TIMESERIES_FIELDS), None)
+
+
+def _timeseries_to_arrow(obj: Any) -> 'pa.Table':
+    cls = _exported_class(obj)
+    metadata = {'class': cls.__name__, **{f: getattr(obj, f, None) for f in TIMESERIES_FIELDS[cls]}}
+
+    if isinstance(obj.timeseries, DataFrame):
+        # manual measurements can come with extra columns (e.g. comments)
+        table = pa.Table.from_pandas(obj.timeseries, preserve_index=False)
+        metadata['frame'] = True
+    else:
+        series = obj.timeseries
+        index = series.index if isinstance(series.index, DatetimeIndex) else DatetimeIndex(series.index)
+        # float64 values and the datetime64 index are wrapped without copying
+        table = pa.table({
+            'timestamp': pa.array(index),
+            'value': pa.array(np.asarray(series.to_numpy(), dtype='float64')),
+        })
+
+    return table.replace_schema_metadata({METADATA_KEY: json.dumps(metadata, default=str)})
+
+
+def _samples_to_arrow(obj: SampleTimeseries) -> 'pa.Table':
+    columns: dict[str, list] = {name: [] for name in SAMPLE_COLUMNS}
+
+    for i, sample in enumerate(obj.samples):
+        for measurement in sample.measurements:
+            columns['sample'].append(i)
+            columns['station'].append(sample.station)
+            columns['timestamp'].append(sample.timestamp)
+            columns['institution'].append(sample.institution)
+            columns['comment'].append(sample.comment)
+            columns['method'].append(getattr(sample, 'method', None))
+            columns['parameter'].append(measurement.parameter)
+            columns['value'].append(measurement.value)
+            columns['unit'].append(measurement.unit)
+
+    sample_class = type(obj.samples[0]).__name__ if obj.samples else 'Sample'
+    metadata = {'class': 'SampleTimeseries', 'sample_class': sample_class}
+
+    table = pa.table({
+        'sample': pa.array(columns['sample'], type=pa.int32()),
+        'station': pa.array(columns['station'], type=pa.string()).dictionary_encode(),
+        'timestamp': pa.array(columns['timestamp'], type=pa.timestamp('us', tz='UTC')),
+        'institution': pa.array(columns['institution'], type=pa.string()).dictionary_encode(),
+        'comment': pa.array(columns['comment'], type=pa.string()),
+        'method': pa.array(columns['method'], type=pa.string()).dictionary_encode(),
+        'parameter': pa.array(columns['parameter'], type=pa.string()).dictionary_encode(),
+        'value': pa.array(columns['value'], type=pa.float64()),
+        'unit': pa.array(columns['unit'], type=pa.string()).dictionary_encode(),
+    })
+
+    return table.replace_schema_metadata({METADATA_KEY: json.dumps(metadata)})
+
+
+def to_arrow(obj: Exportable) -> 'pa.Table':
+    """Convert a timeseries or a SampleTimeseries to an Arrow table.
+
+    Timeseries become a table with `timestamp` and `value` columns. A SampleTimeseries becomes a long table with
+    one row per measurement; sample timestamps are stored in UTC, and timestamps without a timezone are taken as
+    UTC. Subclasses of the supported classes are exported as the supported class they derive from.
+
+    Args:
+        obj: A LoggerMeasurement, MeteoLoggerMeasurement, GWLevelManualMeasurement, SubirriTimeseries or
+            SampleTimeseries.
+
+    Returns:
+        pa.Table: The table, with the attributes of the object in the schema metadata.
+    """
+    _require_pyarrow()
+
+    if isinstance(obj, SampleTimeseries):
+        return _samples_to_arrow(obj)
+    if _exported_class(obj) is not None:
+        return _timeseries_to_arrow(obj)
+
+    raise TypeError(f'Cannot export {type(obj).__name__} to Arrow.')
+
+
+def _timeseries_from_arrow(table: 'pa.Table', metadata: dict) -> Any:
+    cls = next(c for c in TIMESERIES_FIELDS if c.__name__ == metadata['class'])
+    kwargs = {f: metadata.get(f) for f in TIMESERIES_FIELDS[cls]}
+
+    if metadata.get('frame'):
+        timeseries = table.to_pandas()
+    else:
+        index = DatetimeIndex(table.column('timestamp').to_pandas())
+        timeseries = Series(data=table.column('value').to_numpy(), index=index)
+
+    return cls(timeseries=timeseries, **kwargs)
+
+
+def _samples_from_arrow(table: 'pa.Table', metadata: dict) -> SampleTimeseries:
+    sample_model, measurement_model = SAMPLE_MODELS[metadata['sample_class']]
+    frame = table.to_pandas()
+    for column in ['station', 'institution', 'comment', 'method', 'parameter', 'unit']:
+        frame[column] = frame[column].astype(object).where(frame[column].notna(), None)
+
+    samples = []
+    for _, group in frame.groupby('sample', sort=True):
+        first = group.iloc[0]
+        # the data was validated when the samples were created, so the models are constructed directly
+        measurements = [measurement_model.model_construct(value=value, unit=unit, parameter=parameter)
+                        for parameter, value, unit in zip(group['parameter'], group['value'], group['unit'])]
+        fields = {
+            'station': first['station'],
+            'timestamp': first['timestamp'].to_pydatetime(),
+            'institution': first['institution'],
+            'comment': first['comment'],
+            'measurements': measurements,
+        }
+        if sample_model is AnalysisSample:
+            fields['method'] = first['method']
+        samples.append(sample_model.model_construct(**fields))
+
+    return SampleTimeseries(samples=samples)
+
+
+def from_arrow(table: 'pa.Table') -> Exportable:
+    """Rebuild the object that was exported with to_arrow.
+
+    Args:
+        table (pa.Table): A table created by to_arrow (or read from a file written by to_parquet).
+
+    Returns:
+        The LoggerMeasurement, MeteoLoggerMeasurement, GWLevelManualMeasurement, SubirriTimeseries or
+        SampleTimeseries stored in the table.
+    """
+    _require_pyarrow()
+
+    raw = (table.schema.metadata or {}).get(METADATA_KEY)
+    if raw is None:
+        raise ValueError('The table was not created by waterspy: missing waterspy metadata.')
+
+    metadata = json.loads(raw)
+
+    if metadata['class'] == 'SampleTimeseries':
+        return _samples_from_arrow(table, metadata)
+
+    return _timeseries_from_arrow(table, metadata)
+
+
+def to_parquet(obj: Exportable, path: Path | str, **kwargs) -> None:
+    """Write a timeseries or a SampleTimeseries to a Parquet file.
+
+    Args:
+        obj: The object to write (see to_arrow).
+        path (Path | str): The path of the file.
+        **kwargs: Additional keyword arguments for pyarrow.parquet.write_table (e.g. compression).
+    """
+    _require_pyarrow()
+    pq.write_table(to_arrow(obj), path, **kwargs)
+
+
+def read_parquet(path: Path | str) -> Exportable:
+    """Read an object written with to_parquet.
+
+    Args:
+        path (Path | str): The path of the file.
+
+    Returns:
+        The object stored in the file.
+    """
+    _require_pyarrow()
+    return from_arrow(pq.read_table(path))
@@ -1,10 +1,15 @@
 from waterspy.core.client import WatersyncClient, WatersyncRequest, WatersyncResponse
 from waterspy.core.models import (LoggerMeasurement, GWLevelManualMeasurement,
-                                     SampleTimeseries, SubirriTimeseries, Parameter, ParameterSample, Analyte, AnalysisSample)
+                                     SampleTimeseries, SubirriTimeseries, Parameter, ParameterSample, Analyte, AnalysisSample,
+                                     ParameterRecord, AnalyteRecord)
 from pandas import DataFrame
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from functools import wraps
-from typing import Optional, Literal
+from typing import Iterator, Optional, Literal
+from urllib.parse import parse_qs, urlsplit
 from waterspy.core.constants import API_ENDPOINTS
+from waterspy.core.utils.profiling import stage
 
 
 def get_options(client: WatersyncClient,
@@ -34,7 +39,93 @@ def get_options(client: WatersyncClient,
 
     response = request.get()
 
-    return DataFrame(response.content)
+    with stage('frame'):
+        return DataFrame(response.content)
+
+
+def get_page(client: WatersyncClient,
+             endpoint: str,
+             params: dict) -> list | dict:
+    """Fetch one page of a list endpoint.
+
+    Args:
+        client (WatersyncClient): The client to fetch data from.
+        endpoint (str): The endpoint to fetch.
+        params (dict): The query parameters, including the page, offset or cursor.
+
+    Returns:
+        list | dict: The decoded content of the response.
+    """
+    request = WatersyncRequest(
+        **client.model_dump(),
+        endpoint=endpoint,
+        params=params
+    )
+
+    response = request.get()
+
+    if response.status_code != 200:
+        raise Exception(response.fail)
+
+    return response.content
+
+
+def iter_pages(client: WatersyncClient,
+               endpoint: str,
+               params: dict,
+               max_workers: int = 4) -> Iterator[list]:
+    """Fetch all pages of a list endpoint, yielding the results page by page, in order.
+
+    Unpaginated responses are yielded as a single page. For paginated responses (a dict with 'results' and
+    'next'), the remaining pages are prefetched while the caller processes the current one: page number and
+    limit/offset pagination with a 'count' are fetched in parallel, cursor pagination one page ahead.
+
+    Args:
+        client (WatersyncClient): The client to fetch data from.
+        endpoint (str): The endpoint to fetch.
+        params (dict): The query parameters.
+        max_workers (int): The maximum number of pages fetched concurrently. Defaults to 4.
+
+    Yields:
+        list: The results of a page.
+    """
+    content = get_page(client, endpoint, params)
+
+    if not isinstance(content, dict) or 'results' not in content:
+        yield content
+        return
+
+    yield content['results']
+    if not content.get('next'):
+        return
+
+    following = {k: v[-1] for k, v in parse_qs(urlsplit(content['next']).query).items()}
+    count, page_size = content.get('count'), len(content['results'])
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        if count is not None and page_size and 'page' in following:
+            pages = [{'page': page} for page in range(2, -(-count // page_size) + 1)]
+        elif count is not None and page_size and 'offset' in following:
+            limit = int(following.get('limit', page_size))
+            pages = [{'offset': offset, 'limit': limit} for offset in range(int(following['offset']), count, limit)]
+        else:
+            pages = None
+
+        if pages is not None:
+            futures = [pool.submit(get_page, client, endpoint, {**params, **page}) for page in pages]
+            for future in futures:
+                yield future.result()['results']
+            return
+
+        # cursor pagination: the next page is only known once the current one arrived
+        future = pool.submit(get_page, client, endpoint, {**params, **following})
+        while future is not None:
+            content = future.result()
+            future = None
+            if content.get('next'):
+                following = {k: v[-1] for k, v in parse_qs(urlsplit(content['next']).query).items()}
+                future = pool.submit(get_page, client, endpoint, {**params, **following})
+            yield content['results']
 
 
 def get_samples(client: WatersyncClient,
@@ -42,7 +133,36 @@ def get_samples(client: WatersyncClient,
                 sample_type: Literal['groundwater', 'wastewater', 'surfacewater'],
                 stations: str | list[str] | None = None,
                 timestamp_start: str | None = None,
-                timestamp_end: str | None = None) -> SampleTimeseries:
+                timestamp_end: str | None = None,
+                validate: bool = True,
+                page_size: Optional[int] = None,
+                stations_per_query: int = 50,
+                max_workers: int = 4) -> SampleTimeseries:
+    """Fetches water quality samples from the API.
+
+    Paginated responses are followed automatically, with the next pages prefetched in parallel, and long station
+    lists are split into concurrent sub-queries. Samples are built as the pages arrive, so the raw content of at
+    most a few pages is held in memory at a time.
+
+    Args:
+        client (WatersyncClient): The client to fetch data from.
+        what (str): 'parameters' or 'analytes'.
+        sample_type (str): 'groundwater', 'wastewater' or 'surfacewater'.
+        stations (str | list[str], optional): The station(s) to filter by. Defaults to None.
+        timestamp_start (str, optional): The start date to filter by. Defaults to None.
+        timestamp_end (str, optional): The end date to filter by. Defaults to None.
+        validate (bool): Build validated pydantic measurements. With False, the measurements are stored as slotted
+            records (ParameterRecord/AnalyteRecord) and the samples are constructed without validation, which is
+            faster and uses much less memory for large requests. Defaults to True.
+        page_size (int, optional): The number of samples per page requested from the API. Defaults to the page size
+            of the server.
+        stations_per_query (int): The maximum number of stations in one query. Defaults to 50.
+        max_workers (int): The maximum number of concurrent sub-queries, and of pages prefetched per sub-query.
+            Defaults to 4.
+
+    Returns:
+        SampleTimeseries: The samples.
+    """
 
     if what not in ['parameters', 'analytes']:
         raise ValueError(
@@ -54,53 +174,79 @@ def get_samples(client: WatersyncClient,
         stations = [stations]
 
     params = {
-        'stations': ','.join(stations) if stations else None,
         'timestamp_start': timestamp_start,
         'timestamp_end': timestamp_end,
         'sample_type': sample_type,
         'what': what,
+        'page_size': page_size,
     }
 
     params = {k: v for k, v in params.items() if v is not None}
 
-    request = WatersyncRequest(
-        **client.model_dump(),
-        endpoint=endpoint,
-        params=params
-    )
-
-    response = request.get()
-
-    data = response.content
+    if stations:
+        queries = [{**params, 'stations': ','.join(stations[i:i + stations_per_query])}
+                   for i in range(0, len(stations), stations_per_query)]
+    else:
+        queries = [params]
 
     def determine_models(what) -> tuple:
+        if not validate:
+            return (ParameterRecord, ParameterSample) if what == 'parameters' else (
+                AnalyteRecord, AnalysisSample)
         return (Parameter, ParameterSample) if what == 'parameters' else (
             Analyte, AnalysisSample)
 
     def generate_analyte_objects(data: dict) -> list:
-        measurements_data = data.pop('measurements', [])
+        measurements_data = data.get('measurements', [])
 
         # Create measurement objects
+        if not validate:
+            return [models[0].from_dict(measurement) for measurement in measurements_data]
+
         measurements = [models[0](**measurement)
                         for measurement in measurements_data]
 
         return measurements
 
-    for sample in data:
-        sample['station'] = sample.pop('content_object')
+    def generate_samples(data: list) -> list:
+        # the decoded content may be shared with other callers (request coalescing), so it is not mutated here
+        samples = []
+        for sample in data:
 
-    models = determine_models(what)
+            measurements = generate_analyte_objects(sample)
+
+            sample_with_measurements = {**{k: v for k, v in sample.items() if k != 'content_object'},
+                                        'station': sample['content_object'],
+                                        'measurements': measurements}
+
+            if validate:
+                samples.append(models[1](**sample_with_measurements))
+            else:
+                sample_with_measurements['timestamp'] = datetime.fromisoformat(sample_with_measurements['timestamp'])
+                samples.append(models[1].model_construct(**sample_with_measurements))
 
-    samples = []
-    for sample in data:
+        return samples
 
-        measurements = generate_analyte_objects(sample)
+    def run_query(query: dict) -> list:
+        samples = []
+        for page in iter_pages(client, endpoint, query, max_workers=max_workers):
+            with stage('validation'):
+                samples.extend(generate_samples(page))
+        return samples
 
-        sample_with_measurements = {**sample, 'measurements': measurements}
+    models = determine_models(what)
+
+    if len(queries) == 1:
+        samples = run_query(queries[0])
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            samples = [sample for result in pool.map(run_query, queries) for sample in result]
 
-        samples.append(models[1](**sample_with_measurements))
+    if not validate:
+        return SampleTimeseries.model_construct(samples=samples)
 
-    return SampleTimeseries(measurements=samples)
+    with stage('validation'):
+        return SampleTimeseries(samples=samples)
 
 
 def fetch_timeseries(endpoint):
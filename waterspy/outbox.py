@@ -0,0 +1,267 @@
+"""Durable local queue for uploads made without a reliable connection.
+
+Uploads are written to an SQLite database and acknowledged immediately. A background thread (or an explicit
+call to flush) sends them to the API later. Pending uploads for the same series (same endpoint and parameters)
+are merged into large batches, and uploads that fail because of the connection or the server are retried with
+an exponential backoff. Uploads rejected by the API (4xx) are kept in the database, marked as failed; the
+uploads merged with them are sent again without them.
+"""
+import json
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Optional
+
+from pandas import DataFrame
+from requests import RequestException
+
+from waterspy.core.client import WatersyncClient, WatersyncRequest
+from waterspy.core.models import LoggerMeasurement, ParameterSample, SampleTimeseries
+from waterspy.core.utils.serializers import iter_timeseries_json
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    endpoint TEXT NOT NULL,
+    params TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    payload BLOB NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS outbox_pending ON outbox (status, endpoint, params, id);
+"""
+
+
+class UploadOutbox:
+    """
+    An SQLite-backed write-ahead queue for uploads.
+
+    Attributes:
+        client (WatersyncClient): The client used to send the uploads.
+        path (Path): The SQLite database.
+        batch_size (int): The maximum number of records sent in one request.
+        flush_interval (float): Seconds between two flushes of the background worker.
+        max_backoff (float): The maximum delay in seconds between retries after a failure.
+
+    Properties:
+        pending (DataFrame): The number of queued uploads and records per endpoint and status.
+
+    Methods:
+        put: Queue a JSON array of records for an endpoint.
+        put_measurement: Queue the records of a LoggerMeasurement.
+        put_samples: Queue the samples of a SampleTimeseries.
+        flush: Send the queued uploads.
+        start: Start the background worker.
+        stop: Stop the background worker, optionally flushing one last time.
+    """
+
+    def __init__(self,
+                 client: WatersyncClient,
+                 path: Path | str = 'waterspy-outbox.sqlite',
+                 batch_size: int = 50_000,
+                 flush_interval: float = 30.0,
+                 max_backoff: float = 600.0):
+        self.client = client
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_backoff = max_backoff
+
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+
+        with closing(self._connect()) as db, db:
+            db.execute('PRAGMA journal_mode=WAL')
+            db.executescript(SCHEMA)
+
+    def __repr__(self):
+        return f'UploadOutbox({self.path})'
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _connect(self) -> sqlite3.Connection:
+        # one connection per operation keeps the outbox usable from any thread
+        return sqlite3.connect(self.path, timeout=30)
+
+    @property
+    def pending(self) -> DataFrame:
+        with closing(self._connect()) as db:
+            rows = db.execute('SELECT endpoint, status, COUNT(*), SUM(n) FROM outbox '
+                              'GROUP BY endpoint, status').fetchall()
+        return DataFrame(rows, columns=['endpoint', 'status', 'uploads', 'records'])
+
+    def put(self,
+            endpoint: str,
+            payload: bytes | list,
+            params: Optional[dict] = None,
+            n: Optional[int] = None) -> int:
+        """Queue a JSON array of records for an endpoint.
+
+        Args:
+            endpoint (str): The endpoint to post the records to.
+            payload (bytes | list): The records, either encoded as a JSON array or as a list.
+            params (dict, optional): The query parameters of the upload. Uploads with the same endpoint and
+                parameters are merged when they are sent.
+            n (int, optional): The number of records in an encoded payload. Counted from the payload if omitted.
+
+        Returns:
+            int: The id of the queued upload.
+        """
+        if isinstance(payload, list):
+            n, payload = len(payload), json.dumps(payload).encode()
+        elif n is None:
+            n = len(json.loads(payload))
+
+        with closing(self._connect()) as db, db:
+            cursor = db.execute(
+                'INSERT INTO outbox (endpoint, params, n, payload, created) VALUES (?, ?, ?, ?, ?)',
+                (endpoint, json.dumps(params or {}, sort_keys=True), n, payload, time.time()))
+        return cursor.lastrowid
+
+    def put_measurement(self, measurement: LoggerMeasurement) -> int:
+        """Queue the records of a LoggerMeasurement (see LoggerMeasurement.upload)."""
+        params = {
+            'station': measurement.station,
+            'logger': measurement.logger,
+            'measurement_type': measurement.measurement_type,
+            'unit': measurement.unit
+        }
+        endpoint = 'meteo/loggerrecords' if measurement.barometric else 'groundwater/loggerrecords'
+
+        return self.put(endpoint, b''.join(iter_timeseries_json(measurement.timeseries)), params,
+                        n=int(measurement.timeseries.index.notna().sum()))
+
+    def put_samples(self, samples: SampleTimeseries, sample_type: Optional[str] = None) -> int:
+        """Queue the samples of a SampleTimeseries (see SampleTimeseries.upload and upload_samples)."""
+        endpoint = 'waterquality/parametersamples' if samples._return_type(
+        ) == ParameterSample else 'waterquality/analyticalsamples'
+        params = {'sample_type': sample_type} if sample_type else None
+
+        return self.put(endpoint, samples.model_dump(exclude_none=True, mode='json')['samples'], params)
+
+    def _post(self, endpoint: str, params: str, payloads: list[bytes]) -> tuple[bool, bool, Optional[str]]:
+        """Send merged payloads. Returns (sent, retry, error)."""
+        # the payloads are JSON arrays; merging them only needs the brackets removed
+        body = b'[' + b','.join(p[1:-1] for p in payloads if len(p) > 2) + b']'
+
+        request = WatersyncRequest(
+            **self.client.model_dump(),
+            endpoint=endpoint,
+            params=json.loads(params),
+            body=body
+        )
+
+        try:
+            response = request.post()
+        except RequestException as e:
+            return False, True, str(e)
+
+        if response.status_code < 300:
+            return True, False, None
+        retry = response.status_code >= 500 or response.status_code in [401, 408, 429]
+        return False, retry, response.fail
+
+    def _send(self, db: sqlite3.Connection, endpoint: str, params: str, batch: list, counts: dict) -> bool:
+        """Send a batch of queued uploads and record the outcome. Returns whether the rest must wait for a retry."""
+        sent, retry, error = self._post(endpoint, params, [row[2] for row in batch])
+
+        if not sent and not retry and len(batch) > 1:
+            # a rejected record must not fail the uploads merged with it: bisect until the rejected ones are found
+            middle = len(batch) // 2
+            if self._send(db, endpoint, params, batch[:middle], counts):
+                counts['retry'] += sum(row[1] for row in batch[middle:])
+                return True
+            return self._send(db, endpoint, params, batch[middle:], counts)
+
+        ids = [row[0] for row in batch]
+        n = sum(row[1] for row in batch)
+        placeholders = ','.join('?' * len(ids))
+        with db:
+            if sent:
+                db.execute(f'DELETE FROM outbox WHERE id IN ({placeholders})', ids)  # noqa: S608
+                counts['sent'] += n
+            else:
+                db.execute(f"UPDATE outbox SET attempts = attempts + 1, last_error = ?, "  # noqa: S608
+                           f"status = ? WHERE id IN ({placeholders})",
+                           [error, 'pending' if retry else 'failed', *ids])
+                counts['retry' if retry else 'failed'] += n
+
+        return not sent and retry
+
+    def flush(self) -> dict:
+        """Send the queued uploads, merging consecutive uploads of the same series into batches.
+
+        When the API rejects a merged batch (4xx), its uploads are sent again in halves until the rejected uploads
+        are isolated, so only those are marked as failed.
+
+        Returns:
+            dict: The number of records sent, failed permanently and left for a retry.
+        """
+        counts = {'sent': 0, 'failed': 0, 'retry': 0}
+
+        with self._flush_lock, closing(self._connect()) as db:
+            series = db.execute("SELECT DISTINCT endpoint, params FROM outbox WHERE status = 'pending'").fetchall()
+
+            for endpoint, params in series:
+                rows = db.execute("SELECT id, n, payload FROM outbox WHERE status = 'pending' "
+                                  "AND endpoint = ? AND params = ? ORDER BY id", (endpoint, params)).fetchall()
+
+                batches: list[list] = [[]]
+                size = 0
+                for row in rows:
+                    if batches[-1] and size + row[1] > self.batch_size:
+                        batches.append([])
+                        size = 0
+                    batches[-1].append(row)
+                    size += row[1]
+
+                for i, batch in enumerate(batches):
+                    if self._send(db, endpoint, params, batch, counts):
+                        # keep the order of the series: the remaining batches wait for the next flush
+                        counts['retry'] += sum(row[1] for b in batches[i + 1:] for row in b)
+                        break
+
+        return counts
+
+    def _run(self) -> None:
+        delay = self.flush_interval
+        while not self._stop.is_set():
+            try:
+                counts = self.flush()
+            except Exception as e:
+                print(f'Flushing the outbox failed: {e}')
+                counts = {'retry': 1}
+            delay = min(delay * 2, self.max_backoff) if counts['retry'] else self.flush_interval
+            self._stop.wait(delay)
+
+    def start(self) -> None:
+        """Start flushing the outbox in a background thread."""
+        if self._worker is not None and self._worker.is_alive():
+            return
+        self._stop.clear()
+        self._worker = threading.Thread(target=self._run, name='waterspy-outbox', daemon=True)
+        self._worker.start()
+
+    def stop(self, flush: bool = True) -> None:
+        """Stop the background thread.
+
+        Args:
+            flush (bool): Try to send the remaining uploads before returning. Defaults to True.
+        """
+        self._stop.set()
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
+        if flush:
+            self.flush()
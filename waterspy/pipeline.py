@@ -0,0 +1,193 @@
+"""Download logger data with many threads and parse it on all CPU cores.
+
+Fetching a network of loggers is I/O bound while turning the JSON responses into timeseries is CPU bound. The
+pipeline below downloads with a thread pool and hands the raw response bytes to a process pool as soon as they
+arrive. The worker processes decode the payload and write the timestamps and values into shared memory, so the
+results come back as plain arrays instead of pickled objects.
+"""
+import json
+from concurrent.futures import (FIRST_COMPLETED, Future, ProcessPoolExecutor,
+                                ThreadPoolExecutor, wait)
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Literal, Optional
+
+import numpy as np
+from pandas import DatetimeIndex, Series, to_datetime
+
+from waterspy.core.client import WatersyncClient, WatersyncRequest
+from waterspy.core.constants import API_ENDPOINTS
+from waterspy.core.models import LoggerMeasurement, MeteoLoggerMeasurement
+from waterspy.core.utils.profiling import stage
+
+ENDPOINTS = {
+    'groundwater': API_ENDPOINTS['groundwater-logger-measurements'],
+    'meteo': API_ENDPOINTS['meteo-logger-measurements'],
+}
+
+
+def parse_payload(payload: bytes) -> tuple[Optional[str], int]:
+    """Decode a timeseries response body into a shared memory block.
+
+    The block holds the timestamps (int64 nanoseconds since epoch, UTC) followed by the values (float64).
+    The block is handed over to the calling process, which is responsible for unlinking it.
+
+    Args:
+        payload (bytes): The raw body of a timeseries response.
+
+    Returns:
+        tuple: The name of the shared memory block (None if there are no records) and the number of records.
+    """
+    content = json.loads(payload)
+
+    values = np.asarray(content['value'], dtype='float64')
+    timestamps = to_datetime(content['timestamp'], utc=True).tz_localize(None)\
+        .to_numpy(dtype='datetime64[ns]').view('int64')
+
+    n = len(values)
+    if n == 0:
+        return None, 0
+
+    shm = SharedMemory(create=True, size=16 * n)
+    block = np.ndarray((2, n), dtype='int64', buffer=shm.buf)
+    block[0] = timestamps
+    block[1] = values.view('int64')
+    del block
+
+    # the receiving process takes over the block and unlinks it
+    resource_tracker.unregister(shm._name, 'shared_memory')  # type: ignore[attr-defined]
+    shm.close()
+
+    return shm.name, n
+
+
+def read_shared_timeseries(name: Optional[str], n: int) -> Series:
+    """Copy a block written by parse_payload into a Series and release the shared memory.
+
+    Args:
+        name (str | None): The name of the shared memory block.
+        n (int): The number of records in the block.
+
+    Returns:
+        Series: The timeseries with a UTC DatetimeIndex.
+    """
+    if name is None:
+        return Series(dtype='float64', index=DatetimeIndex([], tz='UTC'))
+
+    shm = SharedMemory(name=name)
+    try:
+        block = np.ndarray((2, n), dtype='int64', buffer=shm.buf)
+        timestamps = block[0].copy()
+        values = block[1].copy().view('float64')
+        del block
+    finally:
+        shm.close()
+        shm.unlink()
+
+    with stage('frame'):
+        index = DatetimeIndex(timestamps.view('datetime64[ns]')).tz_localize('UTC')
+        return Series(data=values, index=index)
+
+
+def release_shared_timeseries(name: Optional[str]) -> None:
+    """Unlink a block written by parse_payload without reading it.
+
+    Args:
+        name (str | None): The name of the shared memory block.
+    """
+    if name is None:
+        return
+    try:
+        shm = SharedMemory(name=name)
+    except FileNotFoundError:
+        return
+    shm.close()
+    shm.unlink()
+
+
+def fetch_logger_measurements(client: WatersyncClient,
+                              stations: list[str],
+                              measurement_type: str,
+                              kind: Literal['groundwater', 'meteo'] = 'groundwater',
+                              timestamp_start: Optional[str] = None,
+                              timestamp_end: Optional[str] = None,
+                              io_workers: int = 16,
+                              processes: Optional[int] = None) -> list[LoggerMeasurement]:
+    """Fetch logger records for many stations, parsing the responses in a process pool.
+
+    Args:
+        client (WatersyncClient): The client to fetch data from.
+        stations (list[str]): The stations to fetch.
+        measurement_type (str): The type of measurement to filter by.
+        kind (str): Either 'groundwater' or 'meteo'. Defaults to 'groundwater'.
+        timestamp_start (str, optional): The start date to filter by. Defaults to None.
+        timestamp_end (str, optional): The end date to filter by. Defaults to None.
+        io_workers (int): Number of concurrent downloads. Defaults to 16.
+        processes (int, optional): Number of parsing processes. Defaults to the number of CPUs.
+
+    Returns:
+        list[LoggerMeasurement]: The measurements (MeteoLoggerMeasurement for 'meteo') in the order of the
+            stations. Stations for which the API did not return data are skipped.
+    """
+    if kind not in ENDPOINTS:
+        raise ValueError(f"Invalid value for 'kind' parameter: {kind}. Must be 'groundwater' or 'meteo'")
+
+    station_requests = []
+    for station in stations:
+        params = {
+            'station': station,
+            'measurement_type': measurement_type,
+            'timestamp_start': timestamp_start,
+            'timestamp_end': timestamp_end,
+        }
+        station_requests.append(WatersyncRequest(
+            **{**client.model_dump(), 'coalesce': False},
+            endpoint=ENDPOINTS[kind],
+            params={k: v for k, v in params.items() if v is not None}
+        ))
+
+    headers: dict[int, dict] = {}
+    parsed: dict[int, Future] = {}
+    consumed: set[int] = set()
+    measurement_class = MeteoLoggerMeasurement if kind == 'meteo' else LoggerMeasurement
+
+    try:
+        with ThreadPoolExecutor(max_workers=io_workers) as io_pool, \
+                ProcessPoolExecutor(max_workers=processes) as cpu_pool:
+
+            downloads = {io_pool.submit(request.get): i for i, request in enumerate(station_requests)}
+            pending = set(downloads)
+
+            # hand every response to the process pool as soon as it arrives
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    i = downloads[future]
+                    response = future.result()
+                    if response.status_code != 200:
+                        print(f'Skipping {stations[i]}: {response.fail}')
+                        continue
+                    headers[i] = response.headers
+                    parsed[i] = cpu_pool.submit(parse_payload, response.response.content)
+
+            measurements = []
+            for i in sorted(parsed):
+                name, n = parsed[i].result()
+                # read_shared_timeseries unlinks the block, even when it fails
+                consumed.add(i)
+                timeseries = read_shared_timeseries(name, n)
+                measurements.append(measurement_class(
+                    timeseries=timeseries,
+                    measurement_type=headers[i]['X-MeasurementType'],
+                    unit=headers[i]['X-Unit'],
+                    station=headers[i]['X-Station'],
+                    logger=headers[i]['X-Logger'],
+                    logger_alt=headers[i].get('X-LoggerAltitude')
+                ))
+    finally:
+        # the workers no longer track their blocks: unlink the ones that were not read
+        for i, future in parsed.items():
+            if i not in consumed and not future.cancelled() and future.exception() is None:
+                release_shared_timeseries(future.result()[0])
+
+    return measurements
@@ -1,5 +1,9 @@
-from pandas import DataFrame
+from typing import Literal, Optional
+from pandas import DataFrame, Series
+import matplotlib.pyplot as plt
 import re
+import numpy as np
+from waterspy.core.utils.downsampling import downsample, pixel_width
 
 
 def assign_marker(name, pattern_dict):
@@ -16,6 +20,33 @@ def assign_color(name, color_dict):
     return '.'  # default marker if no patterns match
 
 
+def assign_styles(labels: Series, pattern_dict: dict, default: str = '.') -> Series:
+    """Assign a style to every label, like assign_marker/assign_color, resolving each unique label only once.
+
+    The patterns are compiled once and the first pattern that matches a label wins, so the cost grows with the
+    number of unique labels instead of the number of rows.
+
+    Args:
+        labels (Series): The labels (e.g. station names).
+        pattern_dict (dict): Regular expressions and the style to assign to matching labels.
+        default (str, optional): The style of labels that match no pattern. Defaults to '.'.
+
+    Returns:
+        Series: The style of every label, with the index of labels.
+    """
+    compiled = [(re.compile(pattern), style) for pattern, style in pattern_dict.items()]
+
+    def resolve(name) -> str:
+        name = str(name)
+        return next((style for pattern, style in compiled if pattern.search(name)), default)
+
+    codes, uniques = labels.factorize()
+    styles = np.array([resolve(name) for name in uniques] + [default], dtype=object)
+
+    # missing labels have code -1 and get the default style
+    return Series(styles[codes], index=labels.index)
+
+
 def fmt_triangle_piper(df: DataFrame, 
                        label: str = 'station',
                        color: str = 'black',
@@ -54,13 +85,13 @@ def fmt_triangle_piper(df: DataFrame,
     if "Color" not in df.columns:
         if "color_dict" in kwargs:
             color_dict = kwargs['color_dict']
-            df['Color'] = df['Label'].apply(lambda x: assign_color(x, color_dict))
+            df['Color'] = assign_styles(df['Label'], color_dict)
         else:
             df["Color"] = color
     if "Marker" not in df.columns:
         if "marker_dict" in kwargs:
             marker_dict = kwargs['marker_dict']
-            df['Marker'] = df['Label'].apply(lambda x: assign_marker(x, marker_dict))
+            df['Marker'] = assign_styles(df['Label'], marker_dict)
         else:
             df["Marker"] = marker
     if "Size" not in df.columns:
@@ -76,3 +107,42 @@ def fmt_triangle_piper(df: DataFrame,
         df.rename(columns={'Alkalinity': 'HCO3'}, inplace=True)
 
     return df
+
+
+def plot_timeseries(*timeseries,
+                    title: Optional[str] = None,
+                    figsize: tuple[float, float] = (12, 4),
+                    downsample_method: Optional[Literal['lttb', 'minmax']] = 'lttb',
+                    ax=None):
+    """Plot long timeseries as lines, downsampled to the width of the figure.
+
+    Args:
+        *timeseries: Series or timeseries objects with a `timeseries` attribute (e.g. LoggerMeasurement,
+            SubirriTimeseries).
+        title (str, optional): The title of the plot. Defaults to None.
+        figsize (tuple[float, float], optional): The size of a new figure in inches. Defaults to (12, 4).
+        downsample_method (str, optional): 'lttb', 'minmax' or None to plot every point. Defaults to 'lttb'.
+        ax (Axes, optional): The axes to plot on. Defaults to a new figure.
+
+    Returns:
+        Axes: The axes of the plot.
+
+    Example:
+        >>> plot_timeseries(measurement, subirri_ts, title='PZ1')
+    """
+    if ax is None:
+        _, ax = plt.subplots(figsize=figsize)
+    n_out = pixel_width(ax.figure.get_figwidth(), ax.figure.dpi)
+
+    for ts in timeseries:
+        series = ts if isinstance(ts, Series) else ts.timeseries
+        if downsample_method:
+            series = downsample(series, n_out, method=downsample_method)
+        ax.plot(series.index, series.to_numpy(), label=series.name or repr(ts))
+
+    if title:
+        ax.set_title(title)
+    ax.legend()
+    ax.grid()
+
+    return ax
@@ -0,0 +1,249 @@
+"""Resampling of many timeseries at once.
+
+Resampling a network of series one at a time with pandas costs a groupby per series. Here the records of all
+series are stacked into one array, every record gets a (series, bucket) group number, and each reducer runs once
+over the stacked array with `ufunc.reduceat`. The result is a wide frame with one column per series.
+
+Where an endpoint aggregates on the server (the `period` of the subirrigation records), get_resampled pushes the
+aggregation down and only downloads the aggregated records.
+"""
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Literal, Optional
+
+import numpy as np
+from pandas import DataFrame, DatetimeIndex, Series, Timestamp, concat, date_range
+from pandas.tseries.frequencies import to_offset
+from pandas.tseries.offsets import Tick
+from gensor.core.timeseries import Timeseries as GWLTimeseries
+
+from waterspy.core.models import LoggerMeasurement, series_of
+
+from waterspy.core.client import WatersyncClient
+from waterspy.getters import get_groundwater_logger, get_meteo_logger, get_subirri_logger
+
+Reducer = Literal['sum', 'mean', 'min', 'max', 'first', 'last', 'count'] | Callable[[np.ndarray], float]
+
+GETTERS = {
+    'groundwater': get_groundwater_logger,
+    'meteo': get_meteo_logger,
+    'subirri': get_subirri_logger,
+}
+
+# kind -> the reducers the endpoint can apply on the server with the `period` parameter
+SERVER_AGGREGATES = {
+    'subirri': ['mean'],
+}
+
+# pandas frequency -> the `period` of the server; only periods whose buckets match pandas' are pushed down
+SERVER_PERIODS = {
+    'h': 'hour',
+    'D': 'day',
+}
+
+
+def _label(item) -> str:
+    """The column label of an item: the name of a Series, otherwise station|logger|measurement_type."""
+    if isinstance(item, Series):
+        return str(item.name)
+    if isinstance(item, GWLTimeseries):
+        item = LoggerMeasurement.from_timeseries(item)
+    station = getattr(item, 'station', None) or getattr(item, 'subirri_location', None)
+    parts = [station, getattr(item, 'logger', None), getattr(item, 'measurement_type', None)]
+    return '|'.join(str(part) for part in parts if part is not None) or repr(item)
+
+
+def _labels(items: list) -> dict:
+    """Key a list of items by their labels."""
+    labels = [_label(item) for item in items]
+    duplicates = sorted(label for label, n in Counter(labels).items() if n > 1)
+    if duplicates:
+        raise ValueError(f'Several series are labelled {duplicates}. Pass a dict to label them.')
+    return dict(zip(labels, items))
+
+
+def _buckets(times: np.ndarray, tz, freq: str) -> tuple[DatetimeIndex, np.ndarray]:
+    """The bucket labels and the bucket of every timestamp, binned by pandas' resample.
+
+    Fixed-width buckets in UTC (or naive) time are computed directly: pandas anchors them on the midnight before
+    the first timestamp. Any other frequency ('W', 'ME', 'MS', local days, ...) is binned by resampling the distinct
+    timestamps with pandas, so that the closed side and the labels of the buckets are pandas' own.
+    """
+    offset = to_offset(freq)
+    if isinstance(offset, Tick) and (tz is None or str(tz) == 'UTC'):
+        first = Timestamp(times.min(), tz=tz)
+        origin = first.normalize()
+        origin = origin + (first - origin) // offset * offset
+        buckets = (times - origin.value) // offset.nanos
+        return date_range(origin, periods=int(buckets.max()) + 1, freq=offset), buckets
+
+    unique, inverse = np.unique(times, return_inverse=True)
+    index = DatetimeIndex(unique)
+    if tz is not None:
+        index = index.tz_localize('UTC').tz_convert(tz)
+    counts = Series(1, index=index).resample(freq).count()
+    buckets = np.repeat(np.arange(len(counts)), counts.to_numpy())
+    return DatetimeIndex(counts.index), buckets[inverse.ravel()]
+
+
+def _names(hows: list) -> list[str]:
+    """The column labels of the reducers; repeated names are numbered by position, like pandas' agg."""
+    names = [h.__name__ if callable(h) else h for h in hows]
+    for name in set(names):
+        positions = [i for i, other in enumerate(names) if other == name]
+        if len(positions) > 1:
+            for n, i in enumerate(positions):
+                names[i] = f'{name[:-1]}_{n}>' if name.startswith('<') else f'{name}_{n}'
+    return names
+
+
+def _reduce(how: Reducer, values: np.ndarray, starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    if how == 'sum':
+        return np.add.reduceat(values, starts)
+    if how == 'mean':
+        return np.add.reduceat(values, starts) / counts
+    if how == 'min':
+        return np.minimum.reduceat(values, starts)
+    if how == 'max':
+        return np.maximum.reduceat(values, starts)
+    if how == 'first':
+        return values[starts]
+    if how == 'last':
+        return values[starts + counts - 1]
+    if how == 'count':
+        return counts.astype('float64')
+    if callable(how):
+        return np.array([how(group) for group in np.split(values, starts[1:])], dtype='float64')
+    raise ValueError(f"Invalid reducer: {how}. Must be 'sum', 'mean', 'min', 'max', 'first', 'last', 'count' or "
+                     "a function")
+
+
+def resample(items: list | dict,
+             freq: str,
+             how: Reducer | list[Reducer] = 'mean',
+             value: str = 'timeseries') -> DataFrame:
+    """Resample many timeseries to a common frequency in one pass.
+
+    The buckets and their labels are those of pandas' resample, e.g. 'D' and 'MS' buckets are labelled by their
+    start and 'W' and 'ME' buckets by their end. Missing values are ignored. Empty buckets are NaN, except for 'sum' and 'count' where they are 0.
+
+    Args:
+        items (list | dict): Series or timeseries objects (LoggerMeasurement, SubirriTimeseries,
+            GWLevelManualMeasurement, ...), or a dict of them keyed by column label. In a list, objects are
+            labelled 'station|logger|measurement_type' (the parts they have) and Series by their name.
+        freq (str): The pandas frequency, e.g. 'h', '6h', 'D', 'W' or 'MS'.
+        how (str | Callable | list): The reducer(s): 'sum', 'mean', 'min', 'max', 'first', 'last', 'count', or a
+            function reducing an array to a value. Defaults to 'mean'.
+        value (str): The attribute of the objects holding the series, e.g. 'groundwater_depth'. Defaults to
+            'timeseries'.
+
+    Returns:
+        DataFrame: One column per series, indexed by the bucket labels. With several reducers, the columns are
+            (reducer, series); functions are labelled by their name, numbered when names repeat ('<lambda_0>').
+
+    Raises:
+        ValueError: If two items of a list get the same label.
+
+    Example:
+        >>> resample([measurement, subirri_ts], 'D', how=['mean', 'max'])
+    """
+    if not isinstance(items, dict):
+        items = _labels(items)
+    labels = list(items)
+    series = [series_of(item, value) for item in items.values()]
+
+    hows = how if isinstance(how, list) else [how]
+    names = _names(hows)
+
+    # all series are put in the timezone of the first aware series; naive series are taken as UTC then
+    tz = next((s.index.tz for s in series if getattr(s.index, 'tz', None) is not None), None)
+    indexes = []
+    for s in series:
+        index = DatetimeIndex(s.index)
+        if tz is not None:
+            index = index.tz_localize('UTC') if index.tz is None else index
+            index = index.tz_convert(tz)
+        indexes.append(index)
+
+    lengths = np.array([len(s) for s in series])
+    times = np.concatenate([index.asi8 for index in indexes]) if len(series) else np.empty(0, dtype='int64')
+    values = np.concatenate([s.to_numpy(dtype='float64') for s in series]) if len(series) else np.empty(0)
+    codes = np.repeat(np.arange(len(series)), lengths)
+
+    valid = ~np.isnan(values) & (times != np.iinfo('int64').min)
+    if not valid.all():
+        times, values, codes = times[valid], values[valid], codes[valid]
+
+    if not len(times):
+        empty = DataFrame(columns=labels, index=DatetimeIndex([], tz=tz), dtype='float64')
+        return empty if not isinstance(how, list) else concat({name: empty for name in names}, axis=1)
+
+    edges, buckets = _buckets(times, tz, freq)
+    groups = codes * len(edges) + buckets
+
+    # the groups are already sorted when every series is
+    if not all(index.is_monotonic_increasing for index in indexes):
+        order = np.argsort(groups, kind='stable')
+        groups, values = groups[order], values[order]
+
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+    counts = np.diff(np.r_[starts, len(groups)])
+    present = groups[starts]
+
+    frames = {}
+    for name, h in zip(names, hows):
+        result = np.full(len(series) * len(edges), 0.0 if isinstance(h, str) and h in ['sum', 'count'] else np.nan)
+        result[present] = _reduce(h, values, starts, counts)
+        frames[name] = DataFrame(result.reshape(len(series), len(edges)).T, index=edges, columns=labels)
+
+    if not isinstance(how, list):
+        return frames[names[0]]
+    return concat(frames, axis=1)
+
+
+def get_resampled(client: WatersyncClient,
+                  kind: Literal['groundwater', 'meteo', 'subirri'],
+                  queries: list[dict],
+                  freq: str,
+                  how: Reducer | list[Reducer] = 'mean',
+                  timestamp_start: Optional[str] = None,
+                  timestamp_end: Optional[str] = None,
+                  max_workers: int = 4) -> DataFrame:
+    """Fetch and resample many logger series, aggregating on the server where the endpoint supports it.
+
+    Args:
+        client (WatersyncClient): The client to fetch data from.
+        kind (str): 'groundwater', 'meteo' or 'subirri'.
+        queries (list[dict]): The arguments of the getter for every series, e.g.
+            [{'station': 'PZ1', 'measurement_type': 'pressure'}, ...].
+        freq (str): The pandas frequency.
+        how (str | Callable | list): The reducer(s), see resample. Defaults to 'mean'.
+        timestamp_start (str, optional): The start date to filter by. Defaults to None.
+        timestamp_end (str, optional): The end date to filter by. Defaults to None.
+        max_workers (int): The maximum number of concurrent requests. Defaults to 4.
+
+    Returns:
+        DataFrame: The resampled series, see resample.
+
+    Note:
+        The subirrigation endpoint averages the records per `period` on the server, so 'mean' is pushed down for
+        it when the frequency is one of SERVER_PERIODS. Other frequencies, reducers and endpoints are computed
+        locally.
+    """
+    if kind not in GETTERS:
+        raise ValueError(f'Invalid kind: {kind}. Must be one of {list(GETTERS)}')
+
+    hows = how if isinstance(how, list) else [how]
+    push_down = freq in SERVER_PERIODS and all(isinstance(h, str) and h in SERVER_AGGREGATES.get(kind, [])
+                                               for h in hows)
+
+    def fetch(query: dict):
+        extra = {'period': SERVER_PERIODS[freq]} if push_down else {}
+        return GETTERS[kind](client=client, timestamp_start=timestamp_start, timestamp_end=timestamp_end,
+                             **query, **extra)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        items = [item for item in pool.map(fetch, queries) if item is not None]
+
+    # server-side aggregates only need to be aligned; resampling them again leaves single-record buckets as they are
+    return resample(items, freq, how)
@@ -0,0 +1,277 @@
+"""Precomputed hourly, daily and monthly rollups of archived logger timeseries.
+
+Zooming out on years of high-frequency logger data should not mean reading and aggregating every raw record
+again. For every series in a LoggerArchive, a RollupPyramid keeps the minimum, maximum, sum and count of the
+values per hour, day and month, stored like the archive itself: one flat binary file of fixed-size records per
+level. The rollups are updated incrementally from the records appended to the archive since the last update; when
+records were merged before the start of the series (LoggerArchive.fetch downloading an earlier range), the levels
+of the series are rebuilt from all its records. An update writes the levels of a series to new files, which replace the old ones when the index is written, so an
+interrupted update never counts records twice. Queries pick the coarsest level that is still fine enough for the
+requested resolution, and fall back to the raw records below one hour.
+"""
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from pandas import DataFrame, DatetimeIndex, Timedelta, Timestamp
+
+from waterspy.archive import LoggerArchive, _to_ns
+from waterspy.core.models import LoggerMeasurement
+
+ROLLUP_DIR = 'rollups'
+INDEX_FILE = 'index.json'
+
+RECORD = np.dtype([('start', '<i8'), ('min', '<f8'), ('max', '<f8'), ('sum', '<f8'), ('count', '<i8')])
+
+# level -> the longest bucket of the level, from the coarsest to the finest level
+LEVELS = {
+    'month': Timedelta(days=31),
+    'day': Timedelta(days=1),
+    'hour': Timedelta(hours=1),
+}
+
+
+def bucket_starts(times: np.ndarray, level: str) -> np.ndarray:
+    """The start of the bucket of every timestamp.
+
+    Args:
+        times (np.ndarray): Timestamps as int64 nanoseconds since epoch (UTC).
+        level (str): 'hour', 'day' or 'month'.
+
+    Returns:
+        np.ndarray: The bucket starts as int64 nanoseconds since epoch (UTC).
+    """
+    if level == 'month':
+        return times.view('datetime64[ns]').astype('datetime64[M]').astype('datetime64[ns]').view('int64')
+    width = LEVELS[level].value
+    return times // width * width
+
+
+def aggregate(times: np.ndarray, values: np.ndarray, level: str) -> np.ndarray:
+    """Aggregate sorted records into the buckets of a level.
+
+    Args:
+        times (np.ndarray): The sorted timestamps as int64 nanoseconds since epoch (UTC).
+        values (np.ndarray): The values, without missing values.
+        level (str): 'hour', 'day' or 'month'.
+
+    Returns:
+        np.ndarray: One RECORD per non-empty bucket.
+    """
+    if not len(times):
+        return np.empty(0, dtype=RECORD)
+
+    buckets = bucket_starts(times, level)
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+
+    rollup = np.empty(len(starts), dtype=RECORD)
+    rollup['start'] = buckets[starts]
+    rollup['min'] = np.minimum.reduceat(values, starts)
+    rollup['max'] = np.maximum.reduceat(values, starts)
+    rollup['sum'] = np.add.reduceat(values, starts)
+    rollup['count'] = np.diff(np.r_[starts, len(values)])
+
+    return rollup
+
+
+class RollupPyramid:
+    """
+    Hourly, daily and monthly rollups of the series in a LoggerArchive.
+
+    The rollups are stored in the `rollups` directory of the archive.
+
+    Attributes:
+        archive (LoggerArchive): The archive holding the raw records.
+
+    Methods:
+        update: Add the records appended to the archive since the last update to the rollups of a series.
+        update_all: Update the rollups of all series in the archive.
+        append: Append a LoggerMeasurement to the archive and update its rollups.
+        level_for: The coarsest level that satisfies a resolution.
+        query: Read a range of a series at a given resolution.
+    """
+
+    def __init__(self, archive: LoggerArchive | Path | str):
+        self.archive = archive if isinstance(archive, LoggerArchive) else LoggerArchive(archive)
+        self.path = self.archive.path / ROLLUP_DIR
+        self.path.mkdir(exist_ok=True)
+        self._lock = threading.Lock()
+        index_path = self.path / INDEX_FILE
+        self._index: dict[str, dict] = json.loads(index_path.read_text()) if index_path.exists() else {}
+
+    def __repr__(self):
+        return f'RollupPyramid({self.archive.path}, {len(self._index)} series)'
+
+    def _write_index(self) -> None:
+        tmp = self.path / f'{INDEX_FILE}.tmp'
+        tmp.write_text(json.dumps(self._index, indent=1))
+        os.replace(tmp, self.path / INDEX_FILE)
+
+    def _resolve_logger(self, station: str, measurement_type: str, logger: Optional[str]) -> Optional[str]:
+        if logger is not None:
+            return logger
+        series = self.archive.series
+        loggers = series.loc[(series['station'] == station) & (series['measurement_type'] == measurement_type),
+                             'logger'].tolist()
+        if len(loggers) > 1:
+            raise ValueError(f'Several loggers recorded {measurement_type} at {station}. Specify the logger.')
+        return loggers[0] if loggers else None
+
+    def _file(self, key: str, level: str, generation: Optional[int] = None) -> Path:
+        if generation is None:
+            generation = self._index.get(key, {}).get('generation', 0)
+        name = hashlib.sha1(key.encode()).hexdigest()[:16]  # noqa: S324
+        return self.path / (f'{name}-{generation}.{level}' if generation else f'{name}.{level}')
+
+    def _read(self, key: str, level: str) -> np.ndarray:
+        file = self._file(key, level)
+        n = file.stat().st_size // RECORD.itemsize if file.exists() else 0
+        if n == 0:
+            return np.empty(0, dtype=RECORD)
+        return np.memmap(file, dtype=RECORD, mode='r', shape=(n,))
+
+    def update(self, station: str, measurement_type: str, logger: Optional[str] = None) -> int:
+        """Add the records appended to the archive since the last update to the rollups of a series.
+
+        The rollups are rebuilt from all archived records when the first archived timestamp changed since the last
+        update, i.e. when older records were merged into the archive.
+
+        Args:
+            station (str): The station name.
+            measurement_type (str): The type of measurement.
+            logger (str, optional): The logger serial number. Only needed if several loggers recorded the
+                measurement type at the station.
+
+        Returns:
+            int: The number of raw records added to the rollups.
+        """
+        logger = self._resolve_logger(station, measurement_type, logger)
+        if logger is None:
+            return 0
+        key = f'{station}|{logger}|{measurement_type}'
+
+        with self._lock:
+            first = self.archive.first_timestamp(station, measurement_type, logger)
+            first = first.value if first is not None else None
+            # records merged before the start of the series cannot be added to the stored buckets
+            rebuild = self._index.get(key, {}).get('first') != first
+            last = None if rebuild else self._index.get(key, {}).get('last')
+            start = Timestamp(last + 1, tz='UTC') if last is not None else None
+            timeseries = self.archive.query_series(station, measurement_type, logger, timestamp_start=start)
+            timeseries = timeseries.dropna()
+            if timeseries.empty:
+                return 0
+
+            times = timeseries.index.tz_localize(None).to_numpy(dtype='datetime64[ns]').view('int64')
+            values = timeseries.to_numpy(dtype='float64')
+
+            # the levels are written to new files, which only replace the current ones with the index
+            generation = self._index.get(key, {}).get('generation', 0)
+            for level in LEVELS:
+                rollup = aggregate(times, values, level)
+                existing = self._read(key, level) if not rebuild else np.empty(0, dtype=RECORD)
+                n = len(existing)
+
+                # the first new bucket may continue the last stored one
+                if n and existing['start'][-1] == rollup['start'][0]:
+                    rollup['min'][0] = min(existing['min'][-1], rollup['min'][0])
+                    rollup['max'][0] = max(existing['max'][-1], rollup['max'][0])
+                    rollup['sum'][0] += existing['sum'][-1]
+                    rollup['count'][0] += existing['count'][-1]
+                    n -= 1
+
+                with open(self._file(key, level, generation + 1), 'wb') as f:
+                    f.write(np.asarray(existing[:n]).tobytes())
+                    f.write(rollup.tobytes())
+                del existing
+
+            self._index[key] = {'station': station, 'logger': logger, 'measurement_type': measurement_type,
+                                'first': first, 'last': int(times[-1]), 'generation': generation + 1}
+            self._write_index()
+
+            for level in LEVELS:
+                self._file(key, level, generation).unlink(missing_ok=True)
+
+        return len(times)
+
+    def update_all(self) -> DataFrame:
+        """Update the rollups of all series in the archive.
+
+        Returns:
+            DataFrame: The number of raw records added per series.
+        """
+        series = self.archive.series
+        series['added'] = [self.update(row.station, row.measurement_type, row.logger)
+                           for row in series.itertuples()]
+        return series[['station', 'logger', 'measurement_type', 'added']]
+
+    def append(self, measurement: LoggerMeasurement) -> int:
+        """Append a LoggerMeasurement to the archive and update its rollups.
+
+        Returns:
+            int: The number of appended records.
+        """
+        appended = self.archive.append(measurement)
+        self.update(measurement.station, measurement.measurement_type, measurement.logger)
+        return appended
+
+    @staticmethod
+    def level_for(resolution: Optional[str | Timedelta]) -> Optional[str]:
+        """The coarsest level whose buckets are not longer than the resolution, or None for raw records."""
+        if resolution is None:
+            return None
+        resolution = Timedelta(resolution)
+        return next((level for level, width in LEVELS.items() if width <= resolution), None)
+
+    def query(self,
+              station: str,
+              measurement_type: str,
+              logger: Optional[str] = None,
+              timestamp_start: Optional[str | Timestamp] = None,
+              timestamp_end: Optional[str | Timestamp] = None,
+              resolution: Optional[str | Timedelta] = None) -> DataFrame:
+        """Read a range of a series at a given resolution.
+
+        Args:
+            station (str): The station name.
+            measurement_type (str): The type of measurement.
+            logger (str, optional): The logger serial number.
+            timestamp_start (str | Timestamp, optional): The start of the range (inclusive).
+            timestamp_end (str | Timestamp, optional): The end of the range (inclusive).
+            resolution (str | Timedelta, optional): The coarsest acceptable spacing of the result, e.g. the time
+                span of one pixel of a chart. Defaults to None, which returns the raw records.
+
+        Returns:
+            DataFrame: The min, max, mean and count per bucket, indexed by the bucket start (UTC). The chosen level
+                ('hour', 'day', 'month' or 'raw') is stored in `attrs['level']`. Buckets are selected by their start.
+        """
+        level = self.level_for(resolution)
+        logger = self._resolve_logger(station, measurement_type, logger)
+
+        if level is None or logger is None:
+            raw = self.archive.query_series(station, measurement_type, logger, timestamp_start, timestamp_end)
+            frame = DataFrame({'min': raw, 'max': raw, 'mean': raw, 'count': raw.notna().astype('int64')})
+            frame.attrs['level'] = 'raw'
+            return frame
+
+        # make sure the rollups include everything archived so far
+        self.update(station, measurement_type, logger)
+        rollup = self._read(f'{station}|{logger}|{measurement_type}', level)
+
+        start, end = _to_ns(timestamp_start), _to_ns(timestamp_end)
+        if start is not None:
+            # the bucket containing the start is included
+            start = int(bucket_starts(np.array([start], dtype='int64'), level)[0])
+        i = np.searchsorted(rollup['start'], start, side='left') if start is not None else 0
+        j = np.searchsorted(rollup['start'], end, side='right') if end is not None else len(rollup)
+        rollup = np.array(rollup[i:j])
+
+        index = DatetimeIndex(rollup['start'].view('datetime64[ns]')).tz_localize('UTC')
+        frame = DataFrame({'min': rollup['min'], 'max': rollup['max'], 'mean': rollup['sum'] / rollup['count'],
+                           'count': rollup['count']}, index=index)
+        frame.attrs['level'] = level
+        return frame
@@ -0,0 +1,283 @@
+"""Screening of logger records for spikes, implausible jumps and flat lines before they are uploaded.
+
+Screening a network one series at a time with pandas' rolling windows costs a rolling object per series. Here the
+records of all series are stacked into one array, with the series separated by missing values so that no window
+spans two series, and every detector runs once over the stacked array:
+
+- `spikes`: the Hampel filter. A record is a spike when it lies more than `threshold` scaled median absolute
+  deviations (MAD) from the median of the centred window around it.
+- `rate_of_change`: a record is flagged when the change from the previous record is faster than `max_rate` per
+  hour.
+- `flat_lines`: records in runs of at least `min_length` consecutive (nearly) identical values, e.g. a stuck
+  sensor or a logger that lost power.
+
+`screen` runs the detectors over many series and returns per series a frame of boolean flags, whose `flagged`
+column can be passed as the `mask` of LoggerMeasurement.upload.
+"""
+from typing import Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from pandas import DataFrame, DatetimeIndex, Series
+
+from waterspy.core.models import series_of
+
+# scales the MAD to the standard deviation of normally distributed values
+MAD_SCALE = 1.4826
+
+# the number of window values processed at a time, which bounds the memory of the partitioned windows
+CHUNK_SIZE = 1_048_576
+
+# the largest window whose medians are selected with element-wise min/max across the columns of the windows;
+# larger windows are partitioned row by row
+NETWORK_WINDOW = 15
+
+# the number of windows selected at a time, small enough for the columns to stay in the CPU cache
+NETWORK_CHUNK = 16_384
+
+FLAGS = ['spike', 'rate', 'flat']
+
+
+def _stack(series: list[Series]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Concatenate the timestamps (int64 nanoseconds, UTC), values and series codes of many series."""
+    lengths = np.array([len(s) for s in series], dtype='int64')
+    if not len(series):
+        return np.empty(0, dtype='int64'), np.empty(0), np.empty(0, dtype='int64')
+
+    times = []
+    for s in series:
+        index = DatetimeIndex(s.index)
+        times.append((index.tz_localize('UTC') if index.tz is None else index.tz_convert('UTC')).asi8)
+
+    values = np.concatenate([s.to_numpy(dtype='float64') for s in series])
+    return np.concatenate(times), values, np.repeat(np.arange(len(series)), lengths)
+
+
+def _select_median(columns: list[np.ndarray]) -> np.ndarray:
+    """The median across equally long arrays, selected in place with passes of element-wise min/max.
+
+    Every pass moves the largest remaining value to the end, so after half + 1 passes the median is in the middle
+    column. The arrays are overwritten.
+    """
+    buffer = np.empty_like(columns[0])
+    for i in range(len(columns) // 2 + 1):
+        for j in range(len(columns) - 1 - i):
+            np.minimum(columns[j], columns[j + 1], out=buffer)
+            np.maximum(columns[j], columns[j + 1], out=columns[j + 1])
+            columns[j], buffer = buffer, columns[j]
+    return columns[len(columns) // 2]
+
+
+def _partial_median(rows: np.ndarray) -> np.ndarray:
+    """The median of every row, ignoring the +inf padding; NaN for rows of padding only."""
+    rows = np.sort(rows, axis=1)
+    n = (rows < np.inf).sum(axis=1)
+    r = np.arange(len(rows))
+    with np.errstate(invalid='ignore'):
+        return np.where(n > 0, (rows[r, (n - 1) // 2] + rows[r, n // 2]) / 2, np.nan)
+
+
+def _median(windows: np.ndarray, partial: np.ndarray) -> np.ndarray:
+    """The median of every row of sliding windows, ignoring the +inf padding of the partial windows."""
+    half = windows.shape[1] // 2
+    if windows.shape[1] <= NETWORK_WINDOW:
+        median = _select_median([windows[:, k].copy() for k in range(windows.shape[1])])
+    else:
+        median = np.partition(windows, half, axis=1)[:, half]
+
+    if len(partial):
+        median[partial] = _partial_median(windows[partial])
+
+    return median
+
+
+def _mad_below(windows: np.ndarray, centre: np.ndarray, limit: np.ndarray, partial: np.ndarray) -> np.ndarray:
+    """Whether the median absolute deviation of every window from its median is below a limit.
+
+    The MAD of a full window (an odd number of values) is below the limit when more than half of the deviations
+    are, which takes a comparison instead of a selection per value. The MAD of the partial windows is computed.
+    """
+    half = windows.shape[1] // 2
+    deviations = windows - centre[:, None]
+    np.abs(deviations, out=deviations)
+    with np.errstate(invalid='ignore'):
+        below = np.count_nonzero(deviations < limit[:, None], axis=1) > half
+
+    if partial.any():
+        with np.errstate(invalid='ignore'):
+            below[partial] = _partial_median(np.abs(windows[partial] - centre[partial, None])) < limit[partial]
+
+    return below
+
+
+def spikes(values: np.ndarray,
+           codes: np.ndarray,
+           window: int = 7,
+           threshold: float = 3.5,
+           min_scale: float = 0.0) -> np.ndarray:
+    """Flag spikes with a rolling median and MAD (Hampel filter) over stacked series.
+
+    Args:
+        values (np.ndarray): The values of all series, each series sorted by time. Missing values are skipped.
+        codes (np.ndarray): The series of every value, grouped (all values of a series are adjacent).
+        window (int): The number of records in the centred window, odd. Defaults to 7.
+        threshold (float): The number of scaled MADs a record may deviate from the median. Defaults to 3.5.
+        min_scale (float): The smallest deviation that can be flagged, e.g. the resolution of the sensor. Without
+            it, any deviation from a window of identical values is a spike. Defaults to 0.
+
+    Returns:
+        np.ndarray: True for the spikes.
+    """
+    if window < 3 or window % 2 == 0:
+        raise ValueError(f'Invalid window: {window}. Must be an odd number of at least 3')
+    if not len(values):
+        return np.zeros(0, dtype=bool)
+
+    half = window // 2
+    # every series is preceded by `half` padding values, and the last one is followed by `half` of them; +inf
+    # sorts after every value, so the medians of the full windows need no special treatment
+    positions = np.arange(len(values)) + half * (codes + 1)
+    padded = np.full(len(values) + half * (int(codes[-1]) + 2), np.inf)
+    padded[positions] = np.where(np.isnan(values), np.inf, values)
+
+    windows = sliding_window_view(padded, window)
+    # the windows that hold padding, from the number of padding values before every position
+    padding = np.r_[0, np.cumsum(padded == np.inf)]
+    partial = padding[window:] > padding[:-window]
+
+    flags = np.zeros(len(padded), dtype=bool)
+    rows = NETWORK_CHUNK if window <= NETWORK_WINDOW else max(CHUNK_SIZE // window, 1)
+    for start in range(0, len(windows), rows):
+        # the windows centred on start + half ... stop + half
+        stop = min(start + rows, len(windows))
+        chunk = windows[start:stop]
+        centre = _median(chunk, np.flatnonzero(partial[start:stop]))
+
+        # a record is a spike when its deviation exceeds threshold * min_scale and threshold * MAD_SCALE * MAD;
+        # the MAD is only needed for the records that pass the first test
+        deviation = np.abs(padded[start + half:stop + half] - centre)
+        with np.errstate(invalid='ignore'):
+            candidate = (deviation > threshold * min_scale) & (deviation < np.inf)
+        # the windows of few candidates are gathered, otherwise the whole chunk is compared
+        selected = np.flatnonzero(candidate) if 2 * np.count_nonzero(candidate) < len(candidate) else slice(None)
+        with np.errstate(divide='ignore'):
+            limit = deviation[selected] / (threshold * MAD_SCALE)
+        spike = np.zeros(len(candidate), dtype=bool)
+        spike[selected] = _mad_below(chunk[selected], centre[selected], limit, partial[start:stop][selected])
+        flags[start + half:stop + half] = spike & candidate
+
+    return flags[positions] & ~np.isnan(values)
+
+
+def rate_of_change(times: np.ndarray, values: np.ndarray, codes: np.ndarray, max_rate: float) -> np.ndarray:
+    """Flag records that change faster than a maximum rate since the previous record of their series.
+
+    Args:
+        times (np.ndarray): The timestamps as int64 nanoseconds, each series sorted by time.
+        values (np.ndarray): The values of all series.
+        codes (np.ndarray): The series of every value, grouped.
+        max_rate (float): The largest plausible change per hour, in the unit of the values.
+
+    Returns:
+        np.ndarray: True for the records reached too fast.
+    """
+    flags = np.zeros(len(values), dtype=bool)
+    if len(values) < 2:
+        return flags
+
+    hours = np.diff(times) / 3.6e12
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rate = np.abs(np.diff(values)) / hours
+    flags[1:] = (rate > max_rate) & (codes[1:] == codes[:-1])
+    return flags
+
+
+def flat_lines(values: np.ndarray, codes: np.ndarray, min_length: int, tolerance: float = 0.0) -> np.ndarray:
+    """Flag runs of consecutive (nearly) identical values.
+
+    Args:
+        values (np.ndarray): The values of all series, each series sorted by time.
+        codes (np.ndarray): The series of every value, grouped.
+        min_length (int): The number of records from which a run is flagged.
+        tolerance (float): The largest difference between consecutive records of a run. Defaults to 0.
+
+    Returns:
+        np.ndarray: True for the records in flat lines.
+    """
+    if not len(values):
+        return np.zeros(0, dtype=bool)
+
+    same = (np.abs(np.diff(values)) <= tolerance) & (codes[1:] == codes[:-1])
+    runs = np.cumsum(np.r_[True, ~same])
+    return np.bincount(runs)[runs] >= min_length
+
+
+def screen(items: list | dict,
+           window: int = 7,
+           threshold: float = 3.5,
+           min_scale: float = 0.0,
+           max_rate: Optional[float] = None,
+           flat_length: Optional[int] = None,
+           flat_tolerance: float = 0.0,
+           value: str = 'timeseries') -> list[DataFrame] | dict[str, DataFrame]:
+    """Screen many series for spikes, implausible jumps and flat lines in one pass.
+
+    Missing values are never flagged, and are skipped by the detectors.
+
+    Args:
+        items (list | dict): Series or timeseries objects (e.g. LoggerMeasurement), or a dict of them.
+        window (int): The window of the spike detector, see spikes. Defaults to 7.
+        threshold (float): The threshold of the spike detector, see spikes. Defaults to 3.5.
+        min_scale (float): The smallest deviation flagged as spike, see spikes. Defaults to 0.
+        max_rate (float, optional): The largest plausible change per hour. Defaults to None, which skips the
+            rate-of-change detector.
+        flat_length (int, optional): The number of identical consecutive records flagged as flat line. Defaults to
+            None, which skips the flat-line detector.
+        flat_tolerance (float): The largest difference between records of a flat line. Defaults to 0.
+        value (str): The attribute of the objects holding the series. Defaults to 'timeseries'.
+
+    Returns:
+        list[DataFrame] | dict[str, DataFrame]: Per series, in the order (or with the keys) of the items, a frame
+            indexed like the series with the boolean columns 'spike', 'rate', 'flat' and 'flagged' (any of them).
+
+    Example:
+        >>> flags = screen(measurements, max_rate=0.5, flat_length=96)
+        >>> for measurement, flag in zip(measurements, flags):
+        ...     measurement.upload(client, mask=flag['flagged'])
+    """
+    keys = list(items) if isinstance(items, dict) else None
+    objects = list(items.values()) if isinstance(items, dict) else list(items)
+    series = [series_of(item, value) for item in objects]
+
+    # the detectors work on the valid records of every series in time order
+    orders: list[Optional[np.ndarray]] = []
+    for i, s in enumerate(series):
+        if not s.hasnans and s.index.is_monotonic_increasing:
+            orders.append(None)
+            continue
+        valid = np.flatnonzero(s.notna().to_numpy())
+        index = DatetimeIndex(s.index[valid])
+        orders.append(valid if index.is_monotonic_increasing else valid[np.argsort(index.asi8, kind='stable')])
+        series[i] = s.iloc[orders[-1]]
+
+    times, values, codes = _stack(series)
+    detected = np.zeros((len(values), len(FLAGS) + 1), dtype=bool)
+    detected[:, 0] = spikes(values, codes, window=window, threshold=threshold, min_scale=min_scale)
+    if max_rate is not None:
+        detected[:, 1] = rate_of_change(times, values, codes, max_rate)
+    if flat_length is not None:
+        detected[:, 2] = flat_lines(values, codes, flat_length, flat_tolerance)
+    detected[:, 3] = detected[:, 0] | detected[:, 1] | detected[:, 2]
+
+    bounds = np.r_[0, np.cumsum([len(s) for s in series])]
+    results = []
+    for i, (item, order) in enumerate(zip(objects, orders)):
+        original = series_of(item, value)
+        if order is None:
+            flags = detected[bounds[i]:bounds[i + 1]]
+        else:
+            flags = np.zeros((len(original), len(FLAGS) + 1), dtype=bool)
+            flags[order] = detected[bounds[i]:bounds[i + 1]]
+        results.append(DataFrame(flags, index=original.index, columns=[*FLAGS, 'flagged']))
+
+    return dict(zip(keys, results)) if keys is not None else results
@@ -0,0 +1,129 @@
+"""Seed the option lists of a project with the reference data in waterspy.core.preload."""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from pandas import DataFrame
+
+from waterspy.core.client import WatersyncClient
+from waterspy.core.models import Option
+from waterspy.core.preload import (ANALYTES, ANALYTICAL_TECHNIQUES, DRILLING_TECHNIQUES, METHODS, PARAMETERS,
+                                   PIEZOMETER_MATERIALS, UNITS)
+from waterspy.getters import iter_pages
+
+# Option target -> reference list
+PRELOADS = {
+    'units': UNITS,
+    'analytes': ANALYTES,
+    'parameters': PARAMETERS,
+    'analytical-techniques': ANALYTICAL_TECHNIQUES,
+    'methods': METHODS,
+    'drilling-techniques': DRILLING_TECHNIQUES,
+    'piezometer-materials': PIEZOMETER_MATERIALS,
+}
+
+
+def _as_record(target: str, entry: str | dict) -> dict:
+    """Plain strings in the preload lists are stored under the first field of the option."""
+    if isinstance(entry, dict):
+        return entry
+    return {Option.OPTIONS[target]['fields'][0]: entry}
+
+
+def _natural_key(target: str, record: dict) -> tuple:
+    """The value identifying an entry: its first option field (e.g. the unit), or the whole entry otherwise."""
+    name = Option.OPTIONS[target]['fields'][0]
+    if name in record:
+        return (record[name],)
+    return tuple(sorted((k, str(v)) for k, v in record.items()))
+
+
+def fetch_existing(client: WatersyncClient, target: str) -> list[dict]:
+    """Fetch the entries of an option list from the API.
+
+    Args:
+        client (WatersyncClient): The client to fetch data from.
+        target (str): The option target (see Option.OPTIONS).
+
+    Returns:
+        list[dict]: The entries currently stored on the server, from all pages of a paginated response.
+    """
+    return [entry for page in iter_pages(client, Option.OPTIONS[target]['endpoint'], {}) for entry in page]
+
+
+def missing_options(target: str, existing: list[dict]) -> list[Option]:
+    """Compare a preload list with the entries on the server.
+
+    Args:
+        target (str): The option target (see PRELOADS).
+        existing (list[dict]): The entries currently stored on the server.
+
+    Returns:
+        list[Option]: The options that are in the preload list but not on the server.
+    """
+    present = set()
+    for record in existing:
+        # the server may return more fields (id, ...) than the preload entries have
+        key_fields = {k: record.get(k) for k in _as_record(target, PRELOADS[target][0]) if k in record}
+        present.add(_natural_key(target, key_fields))
+
+    missing = {}
+    for entry in PRELOADS[target]:
+        record = _as_record(target, entry)
+        key = _natural_key(target, record)
+        if key not in present:
+            missing.setdefault(key, Option(target=target, object=record))
+
+    return list(missing.values())
+
+
+def seed_options(client: WatersyncClient,
+                 targets: Optional[list[str]] = None,
+                 dry_run: bool = False,
+                 batch_size: int = 100,
+                 max_workers: int = 4) -> DataFrame:
+    """Upload the reference lists that are missing on the server.
+
+    The current lists are fetched once (concurrently), compared with waterspy.core.preload locally, and only the
+    missing entries are bulk uploaded. Running the function again is a no-op when nothing changed.
+
+    Args:
+        client (WatersyncClient): The client to use.
+        targets (list[str], optional): The lists to seed. Defaults to all lists in PRELOADS.
+        dry_run (bool): Only report what would be uploaded. Defaults to False.
+        batch_size (int): The maximum number of entries per request. Defaults to 100.
+        max_workers (int): The maximum number of concurrent requests. Defaults to 4.
+
+    Returns:
+        DataFrame: Per target, the number of entries already present, missing, uploaded and failed, and the
+            missing entries.
+    """
+    targets = targets or list(PRELOADS)
+    invalid = [target for target in targets if target not in PRELOADS]
+    if invalid:
+        raise ValueError(f'Invalid target(s): {invalid}. Must be one of {list(PRELOADS)}')
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        existing = dict(zip(targets, pool.map(lambda target: fetch_existing(client, target), targets)))
+
+    missing = {target: missing_options(target, existing[target]) for target in targets}
+    to_upload = [option for target in targets for option in missing[target]]
+
+    failed: dict[str, int] = {}
+    if to_upload and not dry_run:
+        report = Option.bulk_upload(to_upload, client, batch_size=batch_size, max_workers=max_workers)
+        for result in report.failed:
+            target = to_upload[result.index].target
+            failed[target] = failed.get(target, 0) + 1
+
+    summary = DataFrame([{
+        'target': target,
+        'existing': len(existing[target]),
+        'missing': len(missing[target]),
+        'uploaded': 0 if dry_run else len(missing[target]) - failed.get(target, 0),
+        'failed': failed.get(target, 0),
+        'entries': [option.object for option in missing[target]],
+    } for target in targets]).set_index('target')
+
+    print(summary.drop(columns='entries'))
+
+    return summary
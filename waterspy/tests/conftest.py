@@ -0,0 +1,18 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from waterspy.core.models import LoggerMeasurement
+
+
+@pytest.fixture
+def logger_measurement():
+    """Build the LoggerMeasurement of a station, recorded by logger L-<station>. The values default to ones."""
+
+    def make(station, index, values=None, measurement_type='pressure', unit='cmH2O'):
+        values = np.ones(len(index)) if values is None else values
+        return LoggerMeasurement(timeseries=pd.Series(values, index=index, dtype='float64'),
+                                 measurement_type=measurement_type, unit=unit, station=station,
+                                 logger=f'L-{station}')
+
+    return make
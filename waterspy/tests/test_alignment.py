@@ -0,0 +1,70 @@
+import os
+from pathlib import Path
+
+import gensor
+import gensor.testdata
+import numpy as np
+import pandas as pd
+import pytest
+
+from waterspy.alignment import align
+from waterspy.core.models import LoggerDataset
+from waterspy.core.utils.utils import load_from_csv
+
+TESTDATA = Path(os.path.dirname(gensor.testdata.__file__))
+
+
+@pytest.fixture
+def logger(logger_measurement):
+    def make(station, start, periods, freq):
+        index = pd.date_range(start, periods=periods, freq=freq, tz='UTC')
+        return logger_measurement(station, index, np.arange(periods, dtype='float64'))
+
+    return make
+
+
+def test_align_nearest_matches_reindex(logger):
+    loggers = [logger('PZ1', '2024-01-01 00:02', 500, '15min'),
+               logger('PZ2', '2024-01-02 00:07', 200, '30min')]
+
+    block = align(loggers, freq='15min')
+
+    assert block.values.shape == (len(block.grid), 2)
+    assert block.grid[0] == pd.Timestamp('2024-01-01', tz='UTC')
+    assert block.metadata['interval'].tolist() == [pd.Timedelta('15min'), pd.Timedelta('30min')]
+
+    frame = block.to_frame()
+    for m, interval in zip(loggers, ['15min', '30min']):
+        expected = m.timeseries.reindex(block.grid, method='nearest', tolerance=pd.Timedelta(interval) / 2)
+        np.testing.assert_array_equal(frame[m.station].to_numpy(), expected.to_numpy())
+
+
+def test_align_linear_does_not_bridge_gaps(logger):
+    pz1 = logger('PZ1', '2024-01-01', 100, 'h')
+    pz1 = pz1.model_copy(update={'ts': pz1.timeseries.drop(pz1.timeseries.index[40:50])})
+
+    block = align([pz1], freq='30min', method='linear', how='inner')
+    values = block.to_frame()['PZ1']
+
+    assert values['2024-01-01 00:30'] == 0.5
+    assert values['2024-01-02 18:00':'2024-01-02 23:00'].isna().all()
+    assert values['2024-01-02 14:30'] == 38.5
+
+
+def test_align_datasets_read_from_csv():
+    dataset = LoggerDataset(timeseries=load_from_csv(TESTDATA / 'PB01A_moni_AV319_220427183019_AV319.csv') +
+                            load_from_csv(TESTDATA / 'Barodiver_220427183008_BY222.csv'))
+
+    block = dataset.to_grid(freq='1h')
+
+    assert block.metadata[['station', 'logger', 'measurement_type']].values.tolist() == [
+        ['PB01A', 'AV319', 'pressure'], ['PB01A', 'AV319', 'temperature'],
+        ['Barodiver', 'BY222', 'pressure'], ['Barodiver', 'BY222', 'temperature']]
+    for column, ts in enumerate(dataset):
+        expected = ts.ts.reindex(block.grid, method='nearest', tolerance=block.metadata.loc[column, 'interval'] / 2)
+        np.testing.assert_array_equal(block.values[:, column], expected.to_numpy())
+    # gensor's own datasets of Timeseries are aligned alike
+    raw = gensor.read_from_csv(TESTDATA / 'PB01A_moni_AV319_220427183019_AV319.csv')
+    raw_block = align(raw, freq='1h', start=block.grid[0], end=block.grid[-1])
+    np.testing.assert_array_equal(raw_block.values, block.values[:, :2])
+    assert raw_block.metadata['station'].tolist() == ['PB01A', 'PB01A']
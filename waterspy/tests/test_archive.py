@@ -0,0 +1,82 @@
+from unittest.mock import patch
+
+import numpy as np
+from pandas import Series, Timestamp, date_range
+
+from waterspy.archive import LoggerArchive
+from waterspy.core.models import LoggerMeasurement
+
+
+def test_append_and_range_query(tmp_path):
+    archive = LoggerArchive(tmp_path)
+    index = date_range('2024-01-01', periods=10, freq='min', tz='UTC')
+
+    assert archive.append_series(Series(range(5), index=index[:5], dtype=float), 'PZ1', 'L1', 'pressure',
+                                 unit='cmH2O') == 5
+    # overlapping records are skipped, only the newer ones are appended
+    assert archive.append_series(Series(range(3, 10), index=index[3:], dtype=float), 'PZ1', 'L1', 'pressure') == 5
+
+    reopened = LoggerArchive(tmp_path)
+    ts = reopened.query_series('PZ1', 'pressure', timestamp_start=index[2], timestamp_end=index[6])
+
+    assert ts.index.equals(index[2:7])
+    assert ts.tolist() == [2.0, 3.0, 4.0, 5.0, 6.0]
+    assert reopened.last_timestamp('PZ1', 'pressure') == Timestamp(index[-1])
+    assert reopened.series.loc[0, 'unit'] == 'cmH2O'
+
+
+def test_query_unknown_series(tmp_path):
+    archive = LoggerArchive(tmp_path)
+
+    assert archive.query_series('PZ1', 'pressure').empty
+    assert archive.query('PZ1', 'pressure') is None
+
+
+def test_interrupted_append_does_not_shift_values(tmp_path):
+    archive = LoggerArchive(tmp_path)
+    index = date_range('2024-01-01', periods=6, freq='min', tz='UTC')
+    archive.append_series(Series([0.0, 1.0], index=index[:2]), 'PZ1', 'L1', 'pressure')
+
+    # an append interrupted after writing the values, but not the timestamps
+    entry = archive._find('PZ1', 'pressure')
+    with open(tmp_path / f"{entry['file']}.value", 'ab') as f:
+        f.write(np.array([99.0, 99.0]).tobytes())
+
+    assert archive.append_series(Series([2.0, 3.0], index=index[2:4]), 'PZ1', 'L1', 'pressure') == 2
+    assert archive.append_series(Series([4.0, 5.0], index=index[4:]), 'PZ1', 'L1', 'pressure') == 2
+
+    ts = archive.query_series('PZ1', 'pressure')
+    assert ts.index.equals(index)
+    assert ts.tolist() == [0.0, 1.0, 2.0, 3.0, 4.0, 5.0]
+
+
+def test_fetch_downloads_the_missing_head_and_tail(tmp_path):
+    archive = LoggerArchive(tmp_path)
+    server = Series(np.arange(10.0), index=date_range('2024-01-01', periods=10, freq='h', tz='UTC'))
+    requested = []
+
+    def get_logger(client, station, logger, measurement_type, timestamp_start, timestamp_end):
+        requested.append((timestamp_start, timestamp_end))
+        ts = server
+        if timestamp_start is not None:
+            ts = ts[ts.index >= Timestamp(timestamp_start)]
+        if timestamp_end is not None:
+            ts = ts[ts.index <= Timestamp(timestamp_end)]
+        return LoggerMeasurement(timeseries=ts, measurement_type=measurement_type, unit='cmH2O', station=station,
+                                 logger='L1')
+
+    with patch.dict('waterspy.archive.GETTERS', {'groundwater': get_logger}):
+        first = archive.fetch(None, 'PZ1', 'pressure', timestamp_start='2024-01-01T04:00:00+00:00',
+                              timestamp_end='2024-01-01T06:00:00+00:00')
+        earlier = archive.fetch(None, 'PZ1', 'pressure', timestamp_start='2024-01-01T01:00:00+00:00')
+        again = archive.fetch(None, 'PZ1', 'pressure', timestamp_start='2024-01-01T02:00:00+00:00')
+
+    assert first.timeseries.tolist() == [4.0, 5.0, 6.0]
+    assert earlier.timeseries.tolist() == [1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0, 9.0]
+    assert again.timeseries.tolist() == earlier.timeseries.tolist()[1:]
+    # the head is downloaded once, and the bounds sent to the server have whole seconds
+    assert requested == [('2024-01-01T04:00:00+00:00', '2024-01-01T06:00:00+00:00'),
+                         ('2024-01-01T01:00:00+00:00', '2024-01-01T04:00:00+00:00'),
+                         ('2024-01-01T06:00:00+00:00', None),
+                         ('2024-01-01T09:00:00+00:00', None)]
+    assert len(list(tmp_path.glob('*.time'))) == 1
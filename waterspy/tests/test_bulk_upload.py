@@ -0,0 +1,75 @@
+import json
+from unittest.mock import patch
+
+import requests
+
+from waterspy.core.client import WatersyncClient
+from waterspy.core.models import Option, Project
+
+
+def _created(method, url, json=None, **kwargs):
+    response = requests.Response()
+    response.status_code = 201
+    response._content = b'[]'
+    return response
+
+
+def test_bulk_upload_batches_and_reports_invalid_items():
+    client = WatersyncClient(base_url='https://example.com', project='demo', token='secret')
+    items = [Project(name=f'P{i}') for i in range(5)] + [{'description': 'no name'}]
+
+    with patch('requests.Session.request', side_effect=_created) as mock_request:
+        report = Project.bulk_upload(items, client, batch_size=2)
+
+    assert mock_request.call_count == 3
+    assert sorted(len(call.kwargs['json']) for call in mock_request.call_args_list) == [1, 2, 2]
+    assert [result.ok for result in report.results] == [True] * 5 + [False]
+    assert 'name' in report.failed[0].message
+
+
+def test_option_bulk_upload_groups_by_target():
+    client = WatersyncClient(base_url='https://example.com', project='demo', token='secret')
+    options = [Option(target='units', object={'unit': 'mg/L'}),
+               Option(target='parameters', object={'parameter': 'pH'}),
+               Option(target='units', object={'unit': 'mV'})]
+
+    with patch('requests.Session.request', side_effect=_created) as mock_request:
+        report = Option.bulk_upload(options, client)
+
+    posted = {call.args[1]: call.kwargs['json'] for call in mock_request.call_args_list}
+    assert posted == {'https://example.com/base/units/': [{'unit': 'mg/L'}, {'unit': 'mV'}],
+                      'https://example.com/waterquality/parameters/': [{'parameter': 'pH'}]}
+    assert [result.index for result in report.results] == [0, 1, 2]
+    assert json.loads(report.to_frame().to_json())['ok'] == {'0': True, '1': True, '2': True}
+
+
+def test_bulk_upload_reports_batches_that_cannot_be_sent():
+    client = WatersyncClient(base_url='https://example.com', project='demo', token='secret')
+    items = [{'name': f'P{i}'} for i in range(4)]
+
+    def flaky(method, url, json=None, **kwargs):
+        if json[0]['name'] == 'P2':
+            raise requests.ConnectionError('connection reset')
+        return _created(method, url, json=json, **kwargs)
+
+    with patch('requests.Session.request', side_effect=flaky):
+        report = Project.bulk_upload(items, client, batch_size=2)
+
+    assert [result.ok for result in report.results] == [True, True, False, False]
+    assert report.failed[0].message == 'connection reset' and report.failed[0].status_code is None
+    assert [result.item for result in report.results] == [repr(item) for item in items]
+
+
+def test_option_bulk_upload_reports_invalid_options():
+    client = WatersyncClient(base_url='https://example.com', project='demo', token='secret')
+    options = [{'target': 'units', 'object': {'unit': 'mg/L'}},
+               {'target': 'colours', 'object': {'colour': 'red'}},
+               {'target': 'units'}]
+
+    with patch('requests.Session.request', side_effect=_created) as mock_request:
+        report = Option.bulk_upload(options, client)
+
+    assert mock_request.call_count == 1
+    assert [result.ok for result in report.results] == [True, False, False]
+    assert 'colours' in report.results[1].message and 'object' in report.results[2].message
+    assert [result.item for result in report.results] == [repr(option) for option in options]
@@ -0,0 +1,166 @@
+import json
+import os
+import shutil
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import gensor.testdata
+import numpy as np
+import pandas as pd
+import pytest
+import requests
+
+from waterspy import cli
+from waterspy.core.client import AuthenticationError
+from waterspy.core.utils.utils import load_from_csv
+from waterspy.screening import screen
+
+TESTDATA = Path(os.path.dirname(gensor.testdata.__file__))
+DIVER = 'PB01A_moni_AV319_220427183019_AV319.csv'
+BARO = 'Barodiver_220427183008_BY222.csv'
+
+CONFIG = """
+[client]
+base_url = "https://example.com"
+project = "demo"
+workers = 2
+
+[pull]
+measurement_types = ["pressure"]
+stations = ["PZ1", "PZ2", "PZ3"]
+timestamp_start = "2024-01-01"
+
+[push]
+files = ["{incoming}/*.csv"]
+
+[push.screen]
+flat_length = 5
+min_scale = 0.5
+"""
+
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    monkeypatch.setenv('WATERSPY_TOKEN', 'secret')
+    (tmp_path / 'incoming').mkdir()
+    path = tmp_path / 'waterspy.toml'
+    path.write_text(CONFIG.format(incoming=(tmp_path / 'incoming').as_posix()))
+    return path
+
+
+@pytest.fixture
+def measurement(logger_measurement):
+    def make(station, values):
+        index = pd.date_range('2024-01-01', periods=len(values), freq='h', tz='UTC')
+        return logger_measurement(station, index, values)
+
+    return make
+
+
+def test_pull_overrides_config_and_writes_series(config, tmp_path, capsys, measurement):
+    fetched = [measurement('PZ1', [1.0, 2.0]), measurement('PZ2', [3.0])]
+
+    with patch('waterspy.cli.fetch_logger_measurements', return_value=fetched) as mock_fetch:
+        status = cli.main(['--config', str(config), 'pull', '--stations', 'PZ1', 'PZ2',
+                           '--output', str(tmp_path / 'export')])
+
+    assert status == 0
+    args, kwargs = mock_fetch.call_args
+    assert args[1:] == (['PZ1', 'PZ2'], 'pressure')
+    assert kwargs['timestamp_start'] == '2024-01-01' and kwargs['io_workers'] == 2
+    assert kwargs['timestamp_end'] is None
+
+    written = pd.read_csv(tmp_path / 'export' / 'PZ1_L-PZ1_pressure.csv')
+    assert written['value'].tolist() == [1.0, 2.0]
+    assert 'pull: 2 series, 3 records' in capsys.readouterr().out
+
+
+def test_push_screens_and_reports_failures(config, tmp_path, capsys, measurement):
+    for name in ['a.csv', 'b.csv']:
+        (tmp_path / 'incoming' / name).write_text('')
+
+    def load(path):
+        if path.endswith('a.csv'):
+            return [measurement('PZ1', [1.0, 2.0, 2.0, 2.0, 2.0, 2.0, 3.0])]
+        return [measurement('PZ2', [1.0, 2.0])]
+
+    uploads = {}
+
+    def respond(method, url, params=None, data=None, **kwargs):
+        uploads[params['station']] = [r['value'] for r in json.loads(b''.join(data))]
+        response = requests.Response()
+        response.status_code = 201 if params['station'] == 'PZ1' else 500
+        return response
+
+    with patch('waterspy.cli.load_from_csv', side_effect=load), \
+            patch('requests.Session.request', side_effect=respond):
+        status = cli.main(['--config', str(config), 'push'])
+
+    assert status == 1
+    # the flat line of PZ1 is not uploaded
+    assert uploads == {'PZ1': [1.0, 3.0], 'PZ2': [1.0, 2.0]}
+    assert 'push: 2 series, 4 records' in capsys.readouterr().out
+
+
+@pytest.mark.parametrize('outbox', [False, True])
+def test_push_uploads_van_essen_files(config, tmp_path, capsys, outbox):
+    for name in [DIVER, BARO]:
+        shutil.copy(TESTDATA / name, tmp_path / 'incoming' / name)
+    if outbox:
+        config.write_text(config.read_text().replace('[push.screen]', f"""outbox = "{(tmp_path / 'outbox.sqlite').as_posix()}"
+
+[push.screen]"""))
+
+    uploaded = {}
+
+    def accept(method, url, params=None, data=None, **kwargs):
+        body = data if isinstance(data, bytes) else b''.join(data)
+        endpoint = url.rstrip('/').rsplit('/', 2)[-2]
+        uploaded.setdefault((endpoint, params['station'], params['logger'], params['measurement_type']),
+                            []).extend(json.loads(body))
+        response = requests.Response()
+        response.status_code = 201
+        return response
+
+    with patch('requests.Session.request', side_effect=accept):
+        status = cli.main(['--config', str(config), 'push'])
+
+    assert status == 0
+    measurements = load_from_csv(TESTDATA / BARO) + load_from_csv(TESTDATA / DIVER)
+    flags = screen(measurements, flat_length=5, min_scale=0.5)
+    # the Barodiver records go to the meteo endpoint
+    assert sorted(uploaded) == [('groundwater', 'PB01A', 'AV319', 'pressure'),
+                                ('groundwater', 'PB01A', 'AV319', 'temperature'),
+                                ('meteo', 'Barodiver', 'BY222', 'pressure'),
+                                ('meteo', 'Barodiver', 'BY222', 'temperature')]
+    for m, flag in zip(measurements, flags):
+        kept = m.timeseries[~flag['flagged'].to_numpy()]
+        endpoint = 'meteo' if m.station == 'Barodiver' else 'groundwater'
+        records = uploaded[(endpoint, m.station, m.logger, m.measurement_type)]
+        assert 0 < len(kept) <= len(m.timeseries)
+        if endpoint == 'groundwater':
+            assert len(kept) < len(m.timeseries)
+        assert [r['value'] for r in records] == kept.tolist()
+    assert f"push: 4 series, {sum(len(r) for r in uploaded.values()):,} records" in capsys.readouterr().out
+
+
+def test_connect_without_terminal_fails_fast(config, monkeypatch, tmp_path):
+    monkeypatch.delenv('WATERSPY_TOKEN')
+    monkeypatch.delenv('WATERSPY_PASSWORD', raising=False)
+    monkeypatch.setenv('WATERSPY_TOKEN_CACHE', str(tmp_path / 'tokens.json'))
+    monkeypatch.setattr('sys.stdin', SimpleNamespace(isatty=lambda: False))
+
+    with patch('builtins.input', side_effect=AssertionError('prompted')), \
+            patch('waterspy.core.client.getpass', side_effect=AssertionError('prompted')):
+        with pytest.raises(AuthenticationError):
+            cli.main(['--config', str(config), 'push'])
+
+
+def test_barometric_loggers_are_told_apart_by_name(logger_measurement):
+    index = pd.date_range('2024-01-01', periods=2, freq='h', tz='UTC')
+
+    assert cli.is_barometric(logger_measurement('Barodiver', index), cli.DEFAULT_BAROMETRIC)
+    assert not cli.is_barometric(logger_measurement('PZ1', index), cli.DEFAULT_BAROMETRIC)
+    # the logger serial numbers can be listed too
+    assert cli.is_barometric(logger_measurement('Roof', index), ['L-ROOF'])
@@ -17,3 +17,127 @@ def test_watersync_response_fail_message():
     mock_response._content = b'Not Found'
     ws_response = WatersyncResponse(response=mock_response)
     assert ws_response.fail == 'Status 404: Not Found'
+
+
+def _slow_response(*args, **kwargs):
+    import time
+    time.sleep(0.05)
+    response = requests.Response()
+    response.status_code = 200
+    response._content = b'{"value": [1.0], "timestamp": ["2024-01-01T00:00:00Z"]}'
+    return response
+
+
+def test_watersync_request_coalesces_identical_gets():
+    from concurrent.futures import ThreadPoolExecutor
+
+    request = WatersyncRequest(base_url='https://example.com', endpoint='groundwater/manualmeasurements',
+                               params={'station': 'PZ1'})
+
+    with patch('requests.Session.request', side_effect=_slow_response) as mock_get:
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            responses = list(pool.map(lambda _: request.model_copy(deep=True).get(), range(8)))
+
+    assert mock_get.call_count == 1
+    assert all(response is responses[0] for response in responses)
+
+
+def test_watersync_request_without_coalescing():
+    request = WatersyncRequest(base_url='https://example.com', endpoint='groundwater/manualmeasurements',
+                               coalesce=False)
+
+    with patch('requests.Session.request', side_effect=_slow_response) as mock_get:
+        request.get()
+        request.get()
+
+    assert mock_get.call_count == 2
+
+
+def _json_response(status_code, content):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = content.encode()
+    return response
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    from waterspy.core import client as client_module
+    from waterspy.core.token_cache import TokenCache
+
+    token_cache = TokenCache(tmp_path / 'waterspy' / 'tokens.json')
+    monkeypatch.setattr(client_module, 'token_cache', token_cache)
+    return token_cache
+
+
+def test_login_reuses_cached_token(cache):
+    import os
+
+    with patch('requests.Session.request', return_value=_json_response(200, '{"token": "abc"}')) as mock_post:
+        WatersyncClient(base_url='https://example.com', project='demo').login('user@example.com', 'secret')
+    assert mock_post.call_count == 1
+    assert os.stat(cache.path).st_mode & 0o777 == 0o600
+
+    # a new process logs in without a request, and without the email when only one user is cached
+    client = WatersyncClient(base_url='https://example.com/', project='demo')
+    with patch('requests.Session.request') as mock_post:
+        client.login()
+    assert mock_post.call_count == 0
+    assert client.token.get_secret_value() == 'abc'
+
+    # a cache that other users can read is ignored
+    os.chmod(cache.path, 0o644)
+    assert cache.get('https://example.com', 'user@example.com') is None
+
+
+def test_rejected_token_is_renewed(cache):
+    cache.set('https://example.com', 'user@example.com', 'expired')
+    client = WatersyncClient(base_url='https://example.com', project='demo')
+    client.login('user@example.com', 'secret')
+
+    def api(method, url, headers=None, **kwargs):
+        if url.endswith('auth/token/login/'):
+            return _json_response(200, '{"token": "fresh"}')
+        if headers['Authorization'] == 'Token expired':
+            return _json_response(401, '{"detail": "Invalid token."}')
+        return _json_response(200, '{"results": []}')
+
+    request = WatersyncRequest(**client.model_dump(), endpoint='groundwater/piezometers')
+    with patch('requests.Session.request', side_effect=api) as mock_request:
+        response = request.get()
+
+    assert response.status_code == 200
+    assert mock_request.call_count == 3
+    assert client.token.get_secret_value() == 'fresh'
+    assert cache.get('https://example.com', 'user@example.com') == 'fresh'
+
+
+def test_rejected_cached_token_without_password_fails_fast(cache):
+    from waterspy.core.client import AuthenticationError
+
+    cache.set('https://example.com', 'user@example.com', 'expired')
+    client = WatersyncClient(base_url='https://example.com', project='demo')
+    client.login('user@example.com')
+
+    request = WatersyncRequest(**client.model_dump(), endpoint='groundwater/piezometers')
+    with patch('requests.Session.request', return_value=_json_response(401, '{"detail": "Invalid token."}')), \
+            patch('waterspy.core.client.getpass', side_effect=AssertionError('prompted')), \
+            patch('builtins.input', side_effect=AssertionError('prompted')):
+        with pytest.raises(AuthenticationError):
+            request.get()
+
+        # a token cached by another process in the meantime is used instead
+        cache.set('https://example.com', 'user@example.com', 'fresh')
+        assert client._renew_token('expired').get_secret_value() == 'fresh'
+
+
+def test_token_cache_path_follows_the_environment(tmp_path, monkeypatch):
+    from waterspy.core.token_cache import TokenCache
+
+    token_cache = TokenCache()
+    monkeypatch.setenv('WATERSPY_TOKEN_CACHE', str(tmp_path / 'tokens.json'))
+    token_cache.set('https://example.com', 'user@example.com', 'abc')
+
+    assert token_cache.path == tmp_path / 'tokens.json'
+    assert TokenCache(tmp_path / 'other.json').get('https://example.com', 'user@example.com') is None
+    assert TokenCache().get('https://example.com', 'user@example.com') == 'abc'
@@ -0,0 +1,78 @@
+import os
+from pathlib import Path
+
+import gensor.testdata
+import numpy as np
+import pandas as pd
+import pytest
+
+from waterspy.compensation import compensate_network, nearest
+from waterspy.core.models import LoggerMeasurement
+from waterspy.core.utils.utils import load_from_csv
+
+TESTDATA = Path(os.path.dirname(gensor.testdata.__file__))
+
+
+def logger(station, start, values, unit='cmH2O', logger_alt=10.0, freq='15min'):
+    index = pd.date_range(start, periods=len(values), freq=freq, tz='UTC')
+    return LoggerMeasurement(station=station, logger=f'L-{station}', measurement_type='pressure', unit=unit,
+                             logger_alt=logger_alt, timeseries=pd.Series(values, index=index, dtype='float64'))
+
+
+def test_nearest_prefers_the_earlier_time_on_ties():
+    reference = np.array([0, 10, 20, 21])
+
+    matched = nearest(np.array([-5, 4, 5, 6, 15, 20, 21, 30, 40]), reference, tolerance=9)
+
+    assert matched.tolist() == [0, 0, 0, 1, 1, 2, 3, 3, -1]
+    assert nearest(np.array([1, 2]), np.array([], dtype='int64'), tolerance=9).tolist() == [-1, -1]
+
+
+def test_compensate_network_matches_merge_asof():
+    rng = np.random.default_rng(0)
+    baro = logger('BARO', '2024-01-01 00:07', 1000 + rng.normal(0, 5, 200), freq='1h')
+    pz1 = logger('PZ1', '2024-01-01', 1200 + rng.normal(0, 5, 500))
+    pz2 = logger('PZ2', '2024-01-02', 12 + rng.normal(0, 0.05, 500), unit='mH2O', logger_alt=None)
+
+    heads = compensate_network([pz1, pz2], baro, tolerance='1h')
+
+    for m, factor, alt in [(pz1, 1, 10.0), (pz2, 100, 0.0)]:
+        merged = pd.merge_asof(m.timeseries.rename('p').to_frame(), baro.timeseries.rename('b').to_frame(),
+                               left_index=True, right_index=True, direction='nearest',
+                               tolerance=pd.Timedelta('1h')).dropna()
+        expected = (merged['p'] * factor - merged['b']) / 100 + alt
+        result = heads[heads['station'] == m.station]
+        np.testing.assert_allclose(result['head'].to_numpy(), expected.to_numpy())
+        assert (result['timestamp'].to_numpy() == expected.index.to_numpy()).all()
+
+    # records more than an hour after the last barometric record are dropped
+    assert heads.loc[heads['station'] == 'PZ2', 'timestamp'].max() <= baro.timeseries.index.max() + pd.Timedelta('1h')
+
+
+def test_compensate_network_pairing_and_threshold():
+    baro_n = logger('BARO-N', '2024-01-01', [1000.0] * 10)
+    baro_s = logger('BARO-S', '2024-01-01', [1010.0] * 10)
+    pz1 = logger('PZ1', '2024-01-01', [1100.0] * 10)
+    pz2 = logger('PZ2', '2024-01-01', [1011.0] * 10)
+
+    with pytest.raises(ValueError):
+        compensate_network([pz1, pz2], [baro_n, baro_s])
+
+    heads = compensate_network([pz1, pz2], [baro_n, baro_s], pairing={'PZ1': 'BARO-N', 'PZ2': 'BARO-S'},
+                               threshold_wc=0.05)
+
+    assert heads['station'].unique().tolist() == ['PZ1']
+    assert np.allclose(heads['head'], 11.0)
+
+
+def test_compensate_van_essen_files():
+    diver = next(t for t in load_from_csv(TESTDATA / 'PB01A_moni_AV319_220427183019_AV319.csv')
+                 if t.variable == 'pressure')
+    baro = next(t for t in load_from_csv(TESTDATA / 'Barodiver_220427183008_BY222.csv') if t.variable == 'pressure')
+
+    heads = compensate_network([diver], baro)
+
+    merged = pd.merge_asof(diver.ts.rename('p').to_frame(), baro.ts.rename('b').to_frame(), left_index=True,
+                           right_index=True, direction='nearest', tolerance=pd.Timedelta('1h')).dropna()
+    assert heads['station'].unique().tolist() == ['PB01A'] and heads['logger'].unique().tolist() == ['AV319']
+    np.testing.assert_allclose(heads['water_column'].to_numpy(), ((merged['p'] - merged['b']) / 100).to_numpy())
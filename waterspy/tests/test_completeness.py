@@ -0,0 +1,122 @@
+import os
+from pathlib import Path
+
+import gensor
+import gensor.testdata
+import numpy as np
+import pandas as pd
+import pytest
+
+from waterspy.completeness import CompletenessIndex, infer_interval
+from waterspy.core.models import LoggerDataset
+from waterspy.core.utils.utils import load_from_csv
+
+TESTDATA = Path(os.path.dirname(gensor.testdata.__file__))
+
+
+@pytest.fixture
+def network(logger_measurement):
+    # PZ1: 15 minute records for January with a 2 day gap and 3 duplicated timestamps
+    pz1 = pd.date_range('2024-01-01', '2024-01-31 23:45', freq='15min', tz='UTC')
+    pz1 = pz1[(pz1 < '2024-01-10') | (pz1 >= '2024-01-12')]
+    pz1 = pz1.append(pz1[:3]).sort_values()
+    # PZ2: hourly records, complete
+    pz2 = pd.date_range('2024-01-01', '2024-02-29 23:00', freq='h', tz='UTC')
+    return [logger_measurement('PZ1', pz1), logger_measurement('PZ2', pz2)]
+
+
+def test_infer_interval(network):
+    assert infer_interval(network[0].timeseries) == pd.Timedelta('15min')
+
+
+def test_index_gaps_duplicates_and_completeness(tmp_path, network, logger_measurement):
+    index = CompletenessIndex(tmp_path / 'qa.sqlite')
+
+    # index PZ1 in two parts, the second one starting inside the gap
+    first = logger_measurement('PZ1', network[0].timeseries.index[network[0].timeseries.index < '2024-01-05'])
+    index.update([first, network[1]])
+    summary = index.update(network)
+
+    assert summary.loc['PZ1|L-PZ1|pressure', 'gaps'] == 1
+    assert summary.loc['PZ2|L-PZ2|pressure', 'records'] == 0
+
+    series = index.series
+    assert series.loc['PZ1|L-PZ1|pressure', 'duplicates'] == 3
+    assert series.loc['PZ1|L-PZ1|pressure', 'records'] == 29 * 96
+    assert series.loc['PZ2|L-PZ2|pressure', 'interval'] == pd.Timedelta('1h')
+
+    gaps = index.gaps()
+    assert len(gaps) == 1
+    assert gaps.loc[0, 'start'] == pd.Timestamp('2024-01-09 23:45', tz='UTC')
+    assert gaps.loc[0, 'missing'] == 2 * 96
+
+    report = index.completeness('MS').set_index(['key', 'period'])['completeness']
+    assert report[('PZ1|L-PZ1|pressure', pd.Timestamp('2024-01-01', tz='UTC'))] == pytest.approx(100 * 29 / 31)
+    assert report[('PZ2|L-PZ2|pressure', pd.Timestamp('2024-02-01', tz='UTC'))] == 100
+    assert ('PZ1|L-PZ1|pressure', pd.Timestamp('2024-02-01', tz='UTC')) not in report.index
+
+    # the index is persistent
+    assert len(CompletenessIndex(tmp_path / 'qa.sqlite').completeness('D')) == 31 + 60
+
+
+def test_duplicates_of_the_last_indexed_record(tmp_path, logger_measurement):
+    index = CompletenessIndex(tmp_path / 'qa.sqlite')
+    times = pd.date_range('2024-01-01', periods=10, freq='h', tz='UTC')
+    key = 'PZ1|L-PZ1|pressure'
+
+    index.update([logger_measurement('PZ1', times.append(times[-1:]))])
+    # the same records again are not new, a third record at the last timestamp is a duplicate
+    assert index.update([logger_measurement('PZ1', times.append(times[-1:]))]).loc[key, 'duplicates'] == 0
+    assert index.update([logger_measurement('PZ1', times.append(times[-1:].repeat(2)))]).loc[key, 'duplicates'] == 1
+
+    series = index.series.loc[key]
+    assert (series['records'], series['duplicates']) == (10, 2)
+
+
+@pytest.mark.parametrize('freq', ['W', 'ME', '2D'])
+def test_completeness_matches_pandas(tmp_path, freq, logger_measurement):
+    # hourly records from a Wednesday morning to a Thursday evening, with a gap of a day
+    times = pd.date_range('2024-01-03 10:00', '2024-02-15 17:00', freq='h', tz='UTC')
+    times = times[(times < '2024-01-20') | (times >= '2024-01-21')]
+    index = CompletenessIndex(tmp_path / 'qa.sqlite')
+    index.update([logger_measurement('PZ1', times)])
+
+    report = index.completeness(freq).set_index('period')
+    records = pd.Series(1, index=times).resample(freq).count()
+    expected = pd.Series(1, index=pd.date_range(times[0], times[-1], freq='h')).resample(freq).count()
+
+    pd.testing.assert_index_equal(report.index, records.index, check_names=False)
+    np.testing.assert_array_equal(report['records'], records)
+    np.testing.assert_array_equal(report['expected'], expected)
+    # periods without missing records are complete, including the partial first and last ones
+    assert (report['completeness'][(records == expected).to_numpy()] == 100).all()
+    assert report['completeness'].iloc[-1] == 100
+
+
+def test_completeness_clips_to_the_range(tmp_path, network):
+    index = CompletenessIndex(tmp_path / 'qa.sqlite')
+    index.update(network)
+
+    report = index.completeness('MS', timestamp_start='2024-01-15', timestamp_end='2024-02-09')
+    pz2 = report[report['key'] == 'PZ2|L-PZ2|pressure'].set_index('period')
+
+    assert pz2['expected'].tolist() == [17 * 24, 9 * 24]
+    assert pz2['completeness'].tolist() == [100, 100]
+
+
+@pytest.mark.parametrize('read', [load_from_csv, lambda path: list(gensor.read_from_csv(path))])
+def test_index_a_dataset_read_from_csv(tmp_path, read):
+    dataset = LoggerDataset(timeseries=read(TESTDATA / 'PB01A_moni_AV319_220427183019_AV319.csv') +
+                            read(TESTDATA / 'Barodiver_220427183008_BY222.csv'))
+    index = CompletenessIndex(tmp_path / 'qa.sqlite')
+
+    summary = index.update(dataset)
+
+    assert summary.index.tolist() == ['PB01A|AV319|pressure', 'PB01A|AV319|temperature',
+                                      'Barodiver|BY222|pressure', 'Barodiver|BY222|temperature']
+    for ts in dataset:
+        key = f'{ts.location}|{ts.sensor}|{ts.variable}'
+        assert summary.loc[key, 'records'] == ts.ts.dropna().index.nunique()
+    # the same dataset again adds nothing, and gensor's own datasets are indexed alike
+    assert index.update(dataset)['records'].sum() == 0
+    assert index.update(gensor.read_from_csv(TESTDATA / 'Barodiver_220427183008_BY222.csv'))['records'].sum() == 0
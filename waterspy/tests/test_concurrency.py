@@ -0,0 +1,54 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import requests
+
+from waterspy.core.client import WatersyncClient, WatersyncRequest
+from waterspy.getters import get_options
+
+N_CALLS = 2000
+N_THREADS = 32
+
+
+def _fake_request(method, url, params=None, headers=None, **kwargs):
+    response = requests.Response()
+    response.status_code = 200
+    response._content = json.dumps([{'unit': params.get('station', 'mg/L'),
+                                     'auth': headers.get('Authorization')}]).encode()
+    return response
+
+
+def test_concurrent_getters_share_one_client():
+    client = WatersyncClient(base_url='https://example.com', project='demo', token='secret')
+
+    with patch('requests.Session.request', side_effect=_fake_request) as mock_request:
+        with ThreadPoolExecutor(max_workers=N_THREADS) as pool:
+            frames = list(pool.map(lambda _: get_options(client, 'units'), range(N_CALLS)))
+
+    assert len(frames) == N_CALLS
+    assert 1 <= mock_request.call_count <= N_CALLS
+    assert all(frame.loc[0, 'auth'] == 'Token secret' for frame in frames)
+    assert client.project == 'demo'
+
+
+def test_concurrent_requests_do_not_leak_state():
+    shared_params = {'station': 'PZ0'}
+    request = WatersyncRequest(base_url='https://example.com', endpoint='groundwater/loggerrecords',
+                               project='demo', token='secret', params=shared_params, coalesce=False)
+    barrier = threading.Barrier(N_THREADS)
+
+    def send(i):
+        if i < N_THREADS:
+            barrier.wait()
+        own = request.model_copy(update={'params': {'station': f'PZ{i}'}}) if i % 2 else request
+        return i, own.get().content[0]['unit']
+
+    with patch('requests.Session.request', side_effect=_fake_request):
+        with ThreadPoolExecutor(max_workers=N_THREADS) as pool:
+            results = list(pool.map(send, range(N_CALLS)))
+
+    assert all(unit == (f'PZ{i}' if i % 2 else 'PZ0') for i, unit in results)
+    assert request.params == shared_params == {'station': 'PZ0'}
+    assert request.headers == {}
@@ -0,0 +1,46 @@
+from unittest.mock import patch
+
+import pytest
+import requests
+
+from waterspy.core.client import WatersyncClient
+from waterspy.deleters import bulk_delete_logger_records
+
+
+def _deleted(method, url, params=None, **kwargs):
+    response = requests.Response()
+    response.status_code = 200
+    response._content = b'{"deleted": 10}'
+    return response
+
+
+def test_bulk_delete_splits_ranges_into_windows():
+    client = WatersyncClient(base_url='https://example.com', project='demo', token='secret')
+    filters = [
+        {'station': 'PZ1', 'measurement_type': 'pressure',
+         'timestamp_start': '2024-01-01', 'timestamp_end': '2024-03-15'},
+        {'logger': 'L2', 'measurement_type': 'temperature'},
+    ]
+
+    with patch('requests.Session.request', side_effect=_deleted) as mock_request:
+        summary = bulk_delete_logger_records(client, filters, window='30D', progress=False)
+
+    assert {call.args[0] for call in mock_request.call_args_list} == {'DELETE'}
+    assert summary['requests'].tolist() == [3, 1]
+    assert summary['deleted'].tolist() == [30, 10]
+    assert summary['failed'].tolist() == [0, 0]
+
+
+def test_bulk_delete_rejects_reversed_ranges_before_sending():
+    client = WatersyncClient(base_url='https://example.com', project='demo', token='secret')
+    filters = [
+        {'station': 'PZ1', 'measurement_type': 'pressure'},
+        {'station': 'PZ2', 'measurement_type': 'pressure',
+         'timestamp_start': '2024-03-15', 'timestamp_end': '2024-01-01'},
+    ]
+
+    with patch('requests.Session.request', side_effect=_deleted) as mock_request:
+        with pytest.raises(ValueError, match='after timestamp_end'):
+            bulk_delete_logger_records(client, filters, window='30D', progress=False)
+
+    mock_request.assert_not_called()
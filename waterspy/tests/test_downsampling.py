@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from waterspy.core.utils.downsampling import downsample, lttb, minmax
+
+
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(0)
+    index = pd.date_range('2020-01-01', periods=100_000, freq='min', tz='UTC')
+    values = np.sin(np.arange(len(index)) / 5_000) + rng.normal(0, 0.01, len(index))
+    values[54_321] = 10.0  # a spike
+    return pd.Series(values, index=index, name='pressure')
+
+
+def test_lttb_keeps_endpoints_and_spike(series):
+    selected = lttb(series.index.asi8, series.to_numpy(), 500)
+
+    assert len(selected) == 500
+    assert selected[0] == 0 and selected[-1] == len(series) - 1
+    assert (np.diff(selected) > 0).all()
+    assert 54_321 in selected
+
+
+def test_minmax_keeps_extremes(series):
+    selected = minmax(series.to_numpy(), 500)
+
+    assert len(selected) <= 500
+    assert series.to_numpy()[selected].max() == series.max()
+    assert series.to_numpy()[selected].min() == series.min()
+
+
+@pytest.mark.parametrize('method', ['lttb', 'minmax'])
+def test_downsample(series, method):
+    result = downsample(series, 1000, method=method)
+
+    assert len(result) <= 1000
+    assert result.name == 'pressure'
+    assert result.index.is_monotonic_increasing
+    assert result.index.isin(series.index).all()
+
+
+def test_downsample_short_series_unchanged(series):
+    short = series.iloc[:100]
+    pd.testing.assert_series_equal(downsample(short, 1000), short)
+
+
+def test_downsample_invalid_method(series):
+    with pytest.raises(ValueError):
+        downsample(series, 1000, method='mean')
@@ -0,0 +1,76 @@
+from datetime import datetime, timezone
+
+import pytest
+from pandas import Series, date_range
+
+from waterspy.core.models import (AnalysisSample, Analyte, GWLevelManualMeasurement, LoggerMeasurement,
+                                  MeteoLoggerMeasurement, SampleTimeseries, SubirriTimeseries)
+
+pytest.importorskip('pyarrow')
+
+from waterspy.exporters import from_arrow, read_parquet, to_arrow, to_parquet  # noqa: E402
+
+
+def test_subirri_timeseries_roundtrip():
+    ts = Series([1.0, 2.5, 3.0], index=date_range('2024-01-01', periods=3, freq='h', tz='Europe/Brussels'))
+    obj = SubirriTimeseries(timeseries=ts, measurement_type='flow', logger='L1', subirri_location='S1', unit='m3/h')
+
+    restored = from_arrow(to_arrow(obj))
+
+    assert isinstance(restored, SubirriTimeseries)
+    assert restored.subirri_location == 'S1' and restored.unit == 'm3/h'
+    assert restored.timeseries.index.equals(ts.index)
+    assert restored.timeseries.tolist() == ts.tolist()
+
+
+def test_manual_measurement_parquet_roundtrip(tmp_path):
+    ts = Series([4.2, 4.3], index=date_range('2024-01-01', periods=2, freq='D', tz='UTC'))
+    obj = GWLevelManualMeasurement(timeseries=ts, station='PZ1', toc_altitude=12.5, toc_height=0.8)
+
+    to_parquet(obj, tmp_path / 'pz1.parquet')
+    restored = read_parquet(tmp_path / 'pz1.parquet')
+
+    assert (restored.station, restored.toc_altitude, restored.toc_height) == ('PZ1', 12.5, 0.8)
+    assert restored.timeseries.equals(ts)
+
+
+def test_sample_timeseries_roundtrip():
+    samples = SampleTimeseries(samples=[
+        AnalysisSample(station='PZ1', timestamp=datetime(2024, 1, 1, tzinfo=timezone.utc), method='IC',
+                       measurements=[Analyte(value=1.0, unit='mg/L', parameter='Cl'),
+                                     Analyte(value=2.0, unit='mg/L', parameter='Na')]),
+        AnalysisSample(station='PZ2', timestamp=datetime(2024, 2, 1, tzinfo=timezone.utc), method='IC',
+                       comment='turbid', measurements=[Analyte(value=3.0, unit='mg/L', parameter='Cl')]),
+    ])
+
+    restored = from_arrow(to_arrow(samples))
+
+    assert [s.station for s in restored.samples] == ['PZ1', 'PZ2']
+    assert restored[1].comment == 'turbid' and restored[0].institution is None
+    assert restored[0].method == 'IC'
+    assert restored.wide_ts().equals(samples.wide_ts())
+
+
+@pytest.mark.parametrize('cls', [LoggerMeasurement, MeteoLoggerMeasurement])
+def test_logger_measurement_roundtrip(cls):
+    ts = Series([101.5, 101.25], index=date_range('2024-01-01', periods=2, freq='h', tz='UTC'))
+    obj = cls(timeseries=ts, measurement_type='pressure', unit='cmH2O', station='PZ1', logger='AV319',
+              logger_alt=12.5)
+
+    restored = from_arrow(to_arrow(obj))
+
+    assert type(restored) is cls
+    assert (restored.station, restored.logger, restored.measurement_type, restored.unit, restored.logger_alt) == \
+        ('PZ1', 'AV319', 'pressure', 'cmH2O', 12.5)
+    assert restored.barometric == obj.barometric
+    assert restored.timeseries.equals(obj.timeseries)
+
+
+def test_subclass_is_exported_as_its_base():
+    class CheckedMeasurement(LoggerMeasurement):
+        pass
+
+    ts = Series([1.0], index=date_range('2024-01-01', periods=1, tz='UTC'))
+    obj = CheckedMeasurement(timeseries=ts, measurement_type='pressure', unit='cmH2O', station='PZ1', logger='L1')
+
+    assert type(from_arrow(to_arrow(obj))) is LoggerMeasurement
@@ -0,0 +1,67 @@
+import json
+from unittest.mock import patch
+
+import requests
+
+from waterspy.core.client import WatersyncClient
+from waterspy.getters import get_samples
+
+STATIONS = [f'PZ{i}' for i in range(5)]
+
+
+def sample(station, i):
+    return {'content_object': station, 'timestamp': f'2024-01-{i + 1:02d}T00:00:00Z',
+            'measurements': [{'value': float(i), 'unit': '-', 'parameter': 'pH'}]}
+
+
+def respond(url, params, pagination):
+    """Serve 3 samples per station, 2 per page."""
+    stations = params['stations'].split(',')
+    results = [sample(station, i) for station in stations for i in range(3)]
+
+    if pagination == 'page':
+        page = int(params.get('page', 1))
+        start = (page - 1) * 2
+        following = f'{url}?page={page + 1}' if start + 2 < len(results) else None
+    else:
+        start = int(params.get('cursor', 0))
+        following = f'{url}?cursor={start + 2}' if start + 2 < len(results) else None
+
+    content = {'count': len(results) if pagination == 'page' else None, 'next': following,
+               'results': results[start:start + 2]}
+
+    response = requests.Response()
+    response.status_code = 200
+    response._content = json.dumps(content).encode()
+    return response
+
+
+def fetch(pagination):
+    client = WatersyncClient(base_url='https://example.com', project='demo', token='secret')
+    requested = []
+
+    def side_effect(method, url, params=None, **kwargs):
+        requested.append(params)
+        return respond(url, params, pagination)
+
+    with patch('requests.Session.request', side_effect=side_effect):
+        samples = get_samples(client, 'parameters', 'groundwater', stations=STATIONS, stations_per_query=2)
+
+    return samples, requested
+
+
+def test_get_samples_follows_page_numbers_and_splits_stations():
+    samples, requested = fetch('page')
+
+    assert [(s.station, s.measurements[0].value) for s in samples.samples] == \
+        [(station, float(i)) for station in STATIONS for i in range(3)]
+    # 3 sub-queries (2 + 2 + 1 stations) of 3, 3 and 2 pages
+    assert len(requested) == 8
+    assert {p['stations'] for p in requested} == {'PZ0,PZ1', 'PZ2,PZ3', 'PZ4'}
+
+
+def test_get_samples_follows_cursors():
+    samples, requested = fetch('cursor')
+
+    assert len(samples.samples) == 15
+    assert len(requested) == 8
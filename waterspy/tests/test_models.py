@@ -0,0 +1,149 @@
+import dataclasses
+
+import numpy as np
+import pandas as pd
+
+from waterspy.core.models import GWLevelManualMeasurement, groundwater_levels
+
+
+def make_measurement(station, start, toc_altitude=12.5, toc_height=0.8):
+    index = pd.date_range(start, periods=5, freq='D', tz='UTC')
+    return GWLevelManualMeasurement(timeseries=pd.Series(np.arange(5.0), index=index),
+                                    station=station, toc_altitude=toc_altitude, toc_height=toc_height)
+
+
+def test_derived_series_are_cached_until_an_input_changes():
+    measurement = make_measurement('PZ1', '2024-01-01')
+
+    depth = measurement.groundwater_depth
+    elevation = measurement.groundwater_elevation
+    assert measurement.groundwater_depth is depth
+
+    measurement.station = 'PZ1b'
+    assert measurement.groundwater_depth is depth
+
+    measurement.toc_height = 1.0
+    assert measurement.groundwater_depth.iloc[0] == -1.0
+
+    measurement.toc_altitude = 10.0
+    assert measurement.groundwater_elevation.iloc[0] == -10.0
+
+    measurement.timeseries = measurement.timeseries + 1
+    assert measurement.groundwater_depth.iloc[0] == 0.0
+    assert measurement.groundwater_elevation.iloc[0] == 1 - 10.0
+    assert elevation.iloc[0] == -12.5
+    assert [f.name for f in dataclasses.fields(measurement)] == ['timeseries', 'station', 'toc_altitude',
+                                                                 'toc_height']
+
+
+def test_groundwater_levels_accepts_frames():
+    frame = pd.DataFrame({'timestamp': ['2024-01-01 10:00:00', None, '2024-01-02 10:00:00', '2024-01-02 10:00:00'],
+                          'depth': [1.25, 1.5, 1.75, 2.25], 'comment': [None, 'lost', 'dry', None]})
+    measurement = GWLevelManualMeasurement(timeseries=frame, station='PZ1', toc_altitude=12.0, toc_height=0.5)
+    series = GWLevelManualMeasurement(timeseries=pd.Series([1.0], index=pd.DatetimeIndex(['2024-01-01 10:00:00'])),
+                                      station='PZ2', toc_altitude=20.0, toc_height=0.5)
+
+    assert measurement.groundwater_depth.tolist() == [0.75, 1.25, 1.75]
+
+    levels = groundwater_levels([measurement, series])
+
+    assert levels.index.tolist() == list(pd.to_datetime(['2024-01-01 10:00:00', '2024-01-02 10:00:00']))
+    assert levels['depth']['PZ1'].tolist() == [0.75, 1.5]
+    assert levels['elevation']['PZ1'].tolist() == [1.25 - 12.0, 2.0 - 12.0]
+    assert levels['depth']['PZ2'].tolist()[0] == 0.5
+
+
+def test_groundwater_levels_matches_properties():
+    measurements = [make_measurement('PZ1', '2024-01-01'),
+                    make_measurement('PZ2', '2024-01-03', toc_altitude=20.0, toc_height=0.5)]
+
+    levels = groundwater_levels(measurements)
+
+    assert len(levels) == 7
+    for m in measurements:
+        pd.testing.assert_series_equal(levels['depth'][m.station].dropna(), m.groundwater_depth, check_names=False)
+        pd.testing.assert_series_equal(levels['elevation'][m.station].dropna(), m.groundwater_elevation,
+                                       check_names=False)
+
+
+def test_groundwater_levels_averages_repeated_measurements():
+    index = pd.DatetimeIndex(['2024-01-01', '2024-01-01', '2024-01-02'], tz='UTC')
+    repeated = GWLevelManualMeasurement(timeseries=pd.Series([1.0, 2.0, 3.0], index=index), station='PZ1',
+                                        toc_altitude=10.0, toc_height=0.5)
+
+    levels = groundwater_levels([repeated, make_measurement('PZ2', '2024-01-01')])
+
+    assert levels['depth']['PZ1'].tolist()[:2] == [1.0, 2.5]
+    assert levels.index.is_unique
+
+
+def test_get_samples_without_validation_uses_records():
+    import json
+    from unittest.mock import patch
+
+    import requests
+
+    from waterspy.core.client import WatersyncClient
+    from waterspy.core.models import AnalyteRecord
+    from waterspy.getters import get_samples
+
+    content = [{'content_object': 'PZ1', 'timestamp': '2024-01-01T10:00:00Z', 'method': 'ICP-MS',
+                'measurements': [{'value': 250.0, 'unit': 'µg/L', 'parameter': 'NO3'},
+                                 {'value': 2.0, 'unit': 'mM', 'parameter': 'Alkalinity'},
+                                 {'value': 9999, 'unit': 'mg/L', 'parameter': 'PO4'}]}]
+
+    def respond(*args, **kwargs):
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps(content).encode()
+        return response
+
+    client = WatersyncClient(base_url='https://example.com', project='demo', token='secret')
+    with patch('requests.Session.request', side_effect=respond):
+        validated = get_samples(client, 'analytes', 'groundwater')
+        light = get_samples(client, 'analytes', 'groundwater', validate=False)
+
+    assert all(isinstance(m, AnalyteRecord) for m in light[0].measurements)
+    assert light[0].timestamp == validated[0].timestamp
+    assert light.model_dump(mode='json', by_alias=True) == validated.model_dump(mode='json', by_alias=True)
+
+
+def test_logger_measurement_upload_drops_masked_records():
+    import json
+    import os
+    from pathlib import Path
+    from unittest.mock import patch
+
+    import gensor.testdata
+    import requests
+
+    from waterspy.core.client import WatersyncClient
+    from waterspy.core.models import LoggerMeasurement
+    from waterspy.core.utils.utils import load_from_csv
+
+    testdata = Path(os.path.dirname(gensor.testdata.__file__))
+    diver = next(t for t in load_from_csv(testdata / 'PB01A_moni_AV319_220427183019_AV319.csv')
+                 if t.variable == 'pressure')
+    measurement = LoggerMeasurement.from_timeseries(diver)
+    mask = np.zeros(len(measurement.timeseries), dtype=bool)
+    mask[::2] = True
+
+    uploaded = []
+
+    def accept(method, url, params=None, data=None, **kwargs):
+        body = b''.join(data) if not isinstance(data, bytes) else data
+        uploaded.append((params['station'], params['logger'], json.loads(body)))
+        response = requests.Response()
+        response.status_code = 201
+        return response
+
+    client = WatersyncClient(base_url='https://example.com', project='demo', token='secret')
+    with patch('requests.Session.request', side_effect=accept):
+        for stream in [False, True]:
+            assert measurement.upload(client, stream=stream, mask=mask).status_code == 201
+
+    kept = measurement.timeseries[~mask]
+    for station, logger, records in uploaded:
+        assert (station, logger) == ('PB01A', 'AV319')
+        assert [r['value'] for r in records] == kept.tolist()
+        assert records[0]['timestamp'] == kept.index[0].strftime('%Y-%m-%dT%H:%M:%SZ')
@@ -0,0 +1,91 @@
+import json
+from unittest.mock import patch
+
+import requests
+from pandas import Series, date_range
+
+from waterspy.core.client import WatersyncClient
+from waterspy.core.models import LoggerMeasurement, MeteoLoggerMeasurement
+from waterspy.outbox import UploadOutbox
+
+
+def test_outbox_retries_and_merges_uploads_of_a_series(tmp_path):
+    client = WatersyncClient(base_url='https://example.com', project='demo', token='secret')
+    outbox = UploadOutbox(client, path=tmp_path / 'outbox.sqlite')
+    params = {'station': 'PZ1', 'measurement_type': 'pressure'}
+
+    outbox.put('groundwater/loggerrecords', [{'timestamp': 't1', 'value': 1.0}], params)
+    outbox.put('groundwater/loggerrecords', [{'timestamp': 't2', 'value': 2.0}], params)
+    outbox.put('groundwater/loggerrecords', [{'timestamp': 't1', 'value': 5.0}], {'station': 'PZ2'})
+
+    with patch('requests.Session.request', side_effect=requests.ConnectionError('offline')):
+        assert outbox.flush() == {'sent': 0, 'failed': 0, 'retry': 3}
+
+    bodies = []
+
+    def accept(method, url, params=None, data=None, **kwargs):
+        bodies.append((params['station'], json.loads(data)))
+        response = requests.Response()
+        response.status_code = 201
+        return response
+
+    with patch('requests.Session.request', side_effect=accept):
+        assert outbox.flush() == {'sent': 3, 'failed': 0, 'retry': 0}
+
+    assert sorted(bodies) == [
+        ('PZ1', [{'timestamp': 't1', 'value': 1.0}, {'timestamp': 't2', 'value': 2.0}]),
+        ('PZ2', [{'timestamp': 't1', 'value': 5.0}]),
+    ]
+    assert outbox.pending.empty
+
+
+def test_rejected_upload_does_not_fail_the_uploads_merged_with_it(tmp_path):
+    client = WatersyncClient(base_url='https://example.com', project='demo', token='secret')
+    outbox = UploadOutbox(client, path=tmp_path / 'outbox.sqlite')
+    params = {'station': 'PZ1', 'measurement_type': 'pressure'}
+    for i in range(5):
+        outbox.put('groundwater/loggerrecords', [{'timestamp': f't{i}', 'value': 'bad' if i == 3 else i}], params)
+
+    saved = []
+
+    def validate(method, url, params=None, data=None, **kwargs):
+        records = json.loads(data)
+        response = requests.Response()
+        response.status_code = 400 if any(r['value'] == 'bad' for r in records) else 201
+        response._content = b'{"value": ["A valid number is required."]}' if response.status_code == 400 else b''
+        if response.status_code == 201:
+            saved.extend(r['timestamp'] for r in records)
+        return response
+
+    with patch('requests.Session.request', side_effect=validate):
+        assert outbox.flush() == {'sent': 4, 'failed': 1, 'retry': 0}
+
+    assert sorted(saved) == ['t0', 't1', 't2', 't4']
+    assert outbox.pending.to_dict('records') == [
+        {'endpoint': 'groundwater/loggerrecords', 'status': 'failed', 'uploads': 1, 'records': 1}]
+
+
+def test_put_measurement(tmp_path):
+    client = WatersyncClient(base_url='https://example.com', project='demo', token='secret')
+    outbox = UploadOutbox(client, path=tmp_path / 'outbox.sqlite')
+    index = date_range('2024-01-01', periods=2, freq='h', tz='UTC')
+    for cls in [LoggerMeasurement, MeteoLoggerMeasurement]:
+        outbox.put_measurement(cls(timeseries=Series([1.5, 2.0], index=index), measurement_type='pressure',
+                                   unit='cmH2O', station='PZ1', logger='AV319'))
+
+    requested = []
+
+    def accept(method, url, params=None, data=None, **kwargs):
+        requested.append((url, params, json.loads(data)))
+        response = requests.Response()
+        response.status_code = 201
+        return response
+
+    with patch('requests.Session.request', side_effect=accept):
+        assert outbox.flush() == {'sent': 4, 'failed': 0, 'retry': 0}
+
+    records = [{'timestamp': '2024-01-01T00:00:00Z', 'value': 1.5}, {'timestamp': '2024-01-01T01:00:00Z', 'value': 2.0}]
+    assert sorted((url, params['logger'], params['unit'], data) for url, params, data in requested) == [
+        ('https://example.com/groundwater/loggerrecords/', 'AV319', 'cmH2O', records),
+        ('https://example.com/meteo/loggerrecords/', 'AV319', 'cmH2O', records),
+    ]
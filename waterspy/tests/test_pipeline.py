@@ -0,0 +1,70 @@
+import json
+import os
+from unittest.mock import patch
+
+import pytest
+import requests
+
+from waterspy.core.client import WatersyncClient
+from waterspy.pipeline import fetch_logger_measurements, parse_payload, read_shared_timeseries
+
+
+def test_payload_roundtrip_through_shared_memory():
+    payload = json.dumps({'timestamp': ['2024-01-01T00:00:00Z', '2024-01-01T01:00:00+01:00'],
+                          'value': [1.5, None]}).encode()
+
+    ts = read_shared_timeseries(*parse_payload(payload))
+
+    assert str(ts.index.tz) == 'UTC'
+    assert ts.iloc[0] == 1.5
+    assert ts.isna().iloc[1]
+    assert ts.index[0] == ts.index[1]
+
+
+def test_empty_payload():
+    ts = read_shared_timeseries(*parse_payload(b'{"timestamp": [], "value": []}'))
+
+    assert ts.empty
+
+
+def _logger_response(station, headers=True):
+    response = requests.Response()
+    response.status_code = 200
+    response._content = json.dumps({'timestamp': ['2024-01-01T00:00:00Z', '2024-01-01T01:00:00Z'],
+                                    'value': [1.0, 2.5]}).encode()
+    if headers:
+        response.headers.update({'X-MeasurementType': 'pressure', 'X-Unit': 'cmH2O', 'X-Station': station,
+                                 'X-Logger': f'L-{station}', 'X-LoggerAltitude': '12.5'})
+    return response
+
+
+def _shared_blocks():
+    return set(os.listdir('/dev/shm')) if os.path.isdir('/dev/shm') else set()
+
+
+def test_fetch_logger_measurements():
+    client = WatersyncClient(base_url='https://example.com', project='demo', token='secret')
+
+    def request(method, url, params=None, **kwargs):
+        return _logger_response(params['station'])
+
+    with patch('requests.Session.request', side_effect=request):
+        measurements = fetch_logger_measurements(client, ['PZ1', 'PZ2'], 'pressure', io_workers=2, processes=1)
+
+    assert [(m.station, m.logger, m.measurement_type, m.unit, m.logger_alt) for m in measurements] == \
+        [('PZ1', 'L-PZ1', 'pressure', 'cmH2O', 12.5), ('PZ2', 'L-PZ2', 'pressure', 'cmH2O', 12.5)]
+    assert measurements[0].timeseries.tolist() == [1.0, 2.5]
+    assert str(measurements[0].timeseries.index.tz) == 'UTC'
+
+
+def test_fetch_logger_measurements_releases_shared_memory_on_errors():
+    client = WatersyncClient(base_url='https://example.com', project='demo', token='secret')
+    before = _shared_blocks()
+
+    def request(method, url, params=None, **kwargs):
+        return _logger_response(params['station'], headers=params['station'] != 'PZ1')
+
+    with patch('requests.Session.request', side_effect=request), pytest.raises(KeyError):
+        fetch_logger_measurements(client, ['PZ1', 'PZ2', 'PZ3'], 'pressure', io_workers=3, processes=1)
+
+    assert _shared_blocks() <= before
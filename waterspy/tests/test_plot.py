@@ -0,0 +1,19 @@
+import numpy as np
+import pandas as pd
+
+from waterspy.plot import assign_color, assign_marker, fmt_triangle_piper
+
+
+def test_fmt_triangle_piper_styles_match_row_wise_assignment():
+    rng = np.random.default_rng(0)
+    stations = [f'{prefix}{i}' for prefix in ['PZ', 'WELL', 'RIVER'] for i in range(20)]
+    df = pd.DataFrame({'station': rng.choice(stations, 1_000)})
+    color_dict = {r'^PZ1': 'red', r'^PZ': 'blue', r'RIVER': 'green'}
+    marker_dict = {r'\d$': 's', r'^WELL': 'o'}
+
+    result = fmt_triangle_piper(df.copy(), color_dict=color_dict, marker_dict=marker_dict)
+
+    expected_colors = df['station'].apply(lambda x: assign_color(x, color_dict))
+    expected_markers = df['station'].apply(lambda x: assign_marker(x, marker_dict))
+    assert result['Color'].tolist() == expected_colors.tolist()
+    assert result['Marker'].tolist() == expected_markers.tolist()
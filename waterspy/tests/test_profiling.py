@@ -0,0 +1,73 @@
+import json
+from unittest.mock import patch
+
+import pandas as pd
+import requests
+
+import waterspy
+from waterspy.core.client import WatersyncRequest
+from waterspy.core.utils.profiling import stage
+from waterspy.core.utils.serializers import iter_timeseries_json
+
+
+def _response(*args, data=None, **kwargs):
+    if data is not None:
+        # consume a streamed body like the transport would
+        b''.join(data)
+    response = requests.Response()
+    response.status_code = 200
+    response._content = b'{"value": [1.0, 2.0], "timestamp": ["2024-01-01T00:00:00Z", "2024-01-01T01:00:00Z"]}'
+    return response
+
+
+def test_profile_records_stages_and_writes_speedscope(tmp_path):
+    request = WatersyncRequest(base_url='https://example.com', endpoint='groundwater/loggerrecords', coalesce=False)
+    output = tmp_path / 'sync.speedscope.json'
+
+    @waterspy.profile(output=output, report=False)
+    def fetch():
+        return request.get().timeseries
+
+    with patch('requests.Session.request', side_effect=_response):
+        fetch()
+        # nothing is recorded outside of a profile
+        with waterspy.profile(report=False) as outside:
+            pass
+        request.get()
+
+    assert outside.stats.empty
+
+    document = json.loads(output.read_text())
+    frames = [frame['name'] for frame in document['shared']['frames']]
+    assert frames == ['http', 'json_decode', 'timestamps', 'frame']
+
+    events = document['profiles'][0]['events']
+    stack = []
+    for event in events:
+        if event['type'] == 'O':
+            stack.append(event['frame'])
+        else:
+            assert stack.pop() == event['frame']
+    assert not stack and len(events) == 8
+
+
+def test_profile_nests_streamed_serialisation_and_traces_memory(tmp_path, capsys):
+    timeseries = pd.Series(range(10), index=pd.date_range('2024-01-01', periods=10, freq='h', tz='UTC'))
+    request = WatersyncRequest(base_url='https://example.com', endpoint='groundwater/loggerrecords',
+                               body=iter_timeseries_json(timeseries, chunk_size=4))
+
+    with patch('requests.Session.request', side_effect=_response), \
+            waterspy.profile(output=tmp_path / 'push.folded', memory=True, top=3) as profile:
+        request.post()
+        with stage('custom'):
+            list(range(100_000))
+
+    stats = profile.stats
+    assert stats.loc['http > serialize', 'calls'] == 3
+    assert stats.loc['http', 'calls'] == 1
+    assert 'memory_mb' in stats.columns
+    assert 0 < len(profile.allocations) <= 3
+
+    folded = (tmp_path / 'push.folded').read_text().splitlines()
+    assert {line.rsplit(' ', 1)[0] for line in folded} == {'http', 'http;serialize', 'custom'}
+    assert 'waterspy profile' in capsys.readouterr().out
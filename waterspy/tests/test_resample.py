@@ -0,0 +1,104 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from waterspy.core.models import LoggerMeasurement, SubirriTimeseries
+from waterspy.resample import get_resampled, resample
+
+
+@pytest.fixture
+def items():
+    rng = np.random.default_rng(0)
+    a = pd.Series(rng.normal(size=5_000), index=pd.date_range('2024-01-01', periods=5_000, freq='17min', tz='UTC'))
+    a.iloc[100:400] = np.nan
+    b = pd.Series(rng.normal(size=300), index=pd.date_range('2024-01-20', periods=300, freq='3h', tz='UTC'))
+    return {'a': a, 'b': SimpleNamespace(timeseries=b)}
+
+
+def spread(values):
+    return values.max() - values.min()
+
+
+@pytest.mark.parametrize('freq', ['h', '7h', 'D', '2D', 'W', 'ME', 'MS'])
+def test_resample_matches_pandas(items, freq):
+    hows = ['sum', 'mean', 'min', 'max', 'first', 'last', 'count', spread]
+
+    result = resample(items, freq, how=hows)
+
+    # pandas resamples the columns of a frame on one grid, anchored on the first record of all series
+    frame = pd.concat({label: (item if isinstance(item, pd.Series) else item.timeseries).dropna()
+                       for label, item in items.items()}, axis=1)
+    for label in items:
+        for how in hows:
+            name = how.__name__ if callable(how) else how
+            expected = frame[label].dropna().resample(freq, origin=frame.index[0].normalize()).agg(how)
+            expected = expected.reindex(result.index)
+            if name in ['sum', 'count']:
+                expected = expected.fillna(0)
+            pd.testing.assert_series_equal(result[name][label], expected.astype('float64'), check_names=False,
+                                           check_freq=False)
+    pd.testing.assert_index_equal(result.index, frame.resample(freq).count().index, check_names=False)
+
+
+def test_resample_single_reducer_and_attribute():
+    index = pd.date_range('2024-01-01', periods=4, freq='12h')
+    measurement = SimpleNamespace(timeseries=pd.Series([1.0, 2.0, 3.0, 4.0], index=index),
+                                  groundwater_depth=pd.Series([0.5, 1.5, 2.5, 3.5], index=index))
+
+    result = resample({'PZ1': measurement}, 'D', how='last', value='groundwater_depth')
+
+    assert result['PZ1'].tolist() == [1.5, 3.5]
+    assert result.index.tz is None
+
+
+def test_resample_local_time_matches_pandas(items):
+    items = {label: (item if isinstance(item, pd.Series) else item.timeseries).tz_convert('Europe/Amsterdam')
+             for label, item in items.items()}
+
+    result = resample(items, 'W', how='max')
+
+    for label, series in items.items():
+        expected = series.resample('W').max().reindex(result.index)
+        pd.testing.assert_series_equal(result[label], expected, check_names=False, check_freq=False)
+
+
+def test_resample_keys_functions_by_position(items):
+    result = resample(items, 'D', how=[lambda v: v.min(), lambda v: v.max(), 'max'])
+
+    assert list(result.columns.levels[0]) == ['<lambda_0>', '<lambda_1>', 'max']
+    pd.testing.assert_frame_equal(result['<lambda_1>'], result['max'])
+    pd.testing.assert_frame_equal(result['<lambda_0>'], resample(items, 'D', how='min'))
+
+
+@pytest.mark.parametrize('freq, period', [('D', 'day'), ('W', None)])
+def test_get_resampled_translates_the_server_period(freq, period):
+    index = pd.date_range('2024-01-01', periods=48, freq='h', tz='UTC')
+    getter = patch.dict('waterspy.resample.GETTERS',
+                        {'subirri': lambda **kwargs: SimpleNamespace(timeseries=pd.Series(1.0, index=index))})
+
+    with getter as getters, patch.dict(getters, {'subirri': getters['subirri']}):
+        calls = []
+        fetch = getters['subirri']
+        getters['subirri'] = lambda **kwargs: calls.append(kwargs) or fetch(**kwargs)
+        get_resampled(client=None, kind='subirri', queries=[{'station': 'S1'}], freq=freq)
+
+    assert calls[0].get('period') == period
+
+
+def test_resample_labels_list_items_by_series_and_rejects_duplicates():
+    index = pd.date_range('2024-01-01', periods=48, freq='h', tz='UTC')
+    flow = [SubirriTimeseries(timeseries=pd.Series(float(i), index=index), measurement_type='flow', logger=f'F{i}',
+                              subirri_location='S1', unit='m3/h') for i in range(2)]
+    pressure = LoggerMeasurement(timeseries=pd.Series(1.0, index=index), measurement_type='pressure', unit='cmH2O',
+                                 station='PZ1', logger='L1')
+
+    result = resample([*flow, pressure], 'D')
+
+    assert list(result.columns) == ['S1|F0|flow', 'S1|F1|flow', 'PZ1|L1|pressure']
+    assert result['S1|F1|flow'].tolist() == [1.0, 1.0]
+
+    with pytest.raises(ValueError, match='S1'):
+        resample([flow[0], flow[0]], 'D')
@@ -0,0 +1,99 @@
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from waterspy.archive import LoggerArchive
+from waterspy.core.models import LoggerMeasurement
+from waterspy.rollups import RollupPyramid
+
+
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(0)
+    index = pd.date_range('2023-12-30', periods=6_000, freq='15min', tz='UTC')
+    return pd.Series(rng.normal(10, 1, len(index)), index=index)
+
+
+@pytest.mark.parametrize('level, freq', [('hour', 'h'), ('day', 'D'), ('month', 'MS')])
+def test_incremental_rollups_match_resample(tmp_path, series, level, freq):
+    archive = LoggerArchive(tmp_path)
+    pyramid = RollupPyramid(archive)
+
+    # append in three parts, splitting buckets, and update after each part
+    for part in [series.iloc[:1_001], series.iloc[1_001:4_003], series.iloc[4_003:]]:
+        archive.append_series(part, station='PZ1', logger='L1', measurement_type='pressure')
+        pyramid.update('PZ1', 'pressure')
+
+    resolution = {'hour': '3h', 'day': '7D', 'month': '90D'}[level]
+    rollup = RollupPyramid(tmp_path).query('PZ1', 'pressure', resolution=resolution)
+    expected = series.resample(freq).agg(['min', 'max', 'mean', 'count'])
+
+    assert rollup.attrs['level'] == level
+    pd.testing.assert_frame_equal(rollup, expected, check_freq=False, check_names=False)
+
+
+def test_query_range_and_raw_fallback(tmp_path, series):
+    pyramid = RollupPyramid(tmp_path)
+    pyramid.archive.append_series(series, station='PZ1', logger='L1', measurement_type='pressure')
+
+    daily = pyramid.query('PZ1', 'pressure', timestamp_start='2024-01-10 12:00', timestamp_end='2024-01-20',
+                          resolution='1D')
+    assert daily.index[0] == pd.Timestamp('2024-01-10', tz='UTC')
+    assert daily.index[-1] == pd.Timestamp('2024-01-20', tz='UTC')
+
+    raw = pyramid.query('PZ1', 'pressure', resolution='15min')
+    assert raw.attrs['level'] == 'raw'
+    assert len(raw) == len(series)
+
+
+def test_month_level_needs_the_longest_month():
+    assert RollupPyramid.level_for('30D') == 'day'
+    assert RollupPyramid.level_for('31D') == 'month'
+
+
+def test_interrupted_update_does_not_count_twice(tmp_path, series):
+    archive = LoggerArchive(tmp_path)
+    pyramid = RollupPyramid(archive)
+    archive.append_series(series.iloc[:1_001], station='PZ1', logger='L1', measurement_type='pressure')
+    pyramid.update('PZ1', 'pressure')
+    archive.append_series(series.iloc[1_001:], station='PZ1', logger='L1', measurement_type='pressure')
+
+    # crash after the level files are written, before the index is
+    with patch.object(RollupPyramid, '_write_index', side_effect=OSError('disk full')):
+        with pytest.raises(OSError):
+            pyramid.update('PZ1', 'pressure')
+
+    pyramid = RollupPyramid(tmp_path)
+    pyramid.update('PZ1', 'pressure')
+    rollup = pyramid.query('PZ1', 'pressure', resolution='1D')
+    expected = series.resample('D').agg(['min', 'max', 'mean', 'count'])
+
+    pd.testing.assert_frame_equal(rollup, expected, check_freq=False, check_names=False)
+    assert len(list((tmp_path / 'rollups').glob('*.day'))) == 1
+
+
+def test_records_fetched_before_the_start_rebuild_the_rollups(tmp_path):
+    server = pd.Series(np.arange(96.0), index=pd.date_range('2024-01-01', periods=96, freq='h', tz='UTC'))
+
+    def get_logger(client, station, logger, measurement_type, timestamp_start, timestamp_end):
+        ts = server
+        if timestamp_start is not None:
+            ts = ts[ts.index >= pd.Timestamp(timestamp_start)]
+        if timestamp_end is not None:
+            ts = ts[ts.index <= pd.Timestamp(timestamp_end)]
+        return LoggerMeasurement(timeseries=ts, measurement_type=measurement_type, unit='cmH2O', station=station,
+                                 logger='L1')
+
+    pyramid = RollupPyramid(tmp_path)
+    with patch.dict('waterspy.archive.GETTERS', {'groundwater': get_logger}):
+        pyramid.archive.fetch(None, 'PZ1', 'pressure', timestamp_start='2024-01-03T00:00:00+00:00')
+        assert pyramid.query('PZ1', 'pressure', resolution='1D')['count'].sum() == 48
+
+        pyramid.archive.fetch(None, 'PZ1', 'pressure', timestamp_start='2024-01-01T00:00:00+00:00')
+
+    rollup = RollupPyramid(tmp_path).query('PZ1', 'pressure', resolution='1D')
+    expected = server.resample('D').agg(['min', 'max', 'mean', 'count'])
+
+    pd.testing.assert_frame_equal(rollup, expected, check_freq=False, check_names=False)
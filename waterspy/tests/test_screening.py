@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from waterspy.screening import screen, spikes
+
+
+def series(name, values, start='2024-01-01', freq='15min'):
+    index = pd.date_range(start, periods=len(values), freq=freq, tz='UTC')
+    return pd.Series(values, index=index, dtype='float64', name=name)
+
+
+def hampel(s, window, threshold, min_scale=0.0):
+    """Reference implementation with pandas' rolling windows."""
+    median = s.rolling(window, center=True, min_periods=1).median()
+    mad = s.rolling(window, center=True, min_periods=1).apply(
+        lambda w: np.median(np.abs(w - np.median(w))), raw=True)
+    return ((s - median).abs() > threshold * np.maximum(1.4826 * mad, min_scale)).to_numpy()
+
+
+@pytest.mark.parametrize('min_scale', [0.0, 0.5])
+@pytest.mark.parametrize('window', [7, 15, 17, 51])
+def test_spikes_match_rolling_hampel(window, min_scale):
+    rng = np.random.default_rng(0)
+    items = [series(f'PZ{i}', rng.normal(0, 1, n)) for i, n in enumerate([300, 2, 150])]
+    items[0].iloc[[0, 100, 299]] = [15, -20, 12]
+
+    values = np.concatenate([s.to_numpy() for s in items])
+    codes = np.repeat(np.arange(3), [len(s) for s in items])
+    flags = spikes(values, codes, window=window, threshold=3.5, min_scale=min_scale)
+
+    expected = np.concatenate([hampel(s, window, 3.5, min_scale) for s in items])
+    np.testing.assert_array_equal(flags, expected)
+    assert flags[[0, 100, 299]].all()
+
+    with pytest.raises(ValueError):
+        spikes(values, codes, window=4)
+
+
+def test_screen_flags_rate_and_flat_lines():
+    level = series('PZ1', np.linspace(0, 1, 200))
+    level.iloc[50] = 5.0
+    level.iloc[120:150] = 0.6
+    level.iloc[10] = np.nan
+    # a shuffled series with missing values gets flags at the positions of its records
+    shuffled = level.sample(frac=1, random_state=1)
+
+    flags = screen({'a': level, 'b': shuffled}, max_rate=2.0, flat_length=10)
+
+    a = flags['a']
+    assert a.columns.tolist() == ['spike', 'rate', 'flat', 'flagged']
+    assert a['spike'].sum() == 1 and a['spike'].iloc[50]
+    # the jump to the spike and back are both too fast
+    assert a.index[a['rate']].tolist() == level.index[[50, 51]].tolist()
+    assert a['flat'].iloc[120:150].all() and a['flat'].sum() == 30
+    assert not a.iloc[10].any()
+    pd.testing.assert_frame_equal(flags['b'], a.loc[shuffled.index])
@@ -0,0 +1,62 @@
+import json
+from unittest.mock import patch
+
+import requests
+
+from waterspy.core.client import WatersyncClient
+from waterspy.core.preload import UNITS
+from waterspy.seeders import seed_options
+
+
+def test_seed_uploads_only_missing_entries():
+    client = WatersyncClient(base_url='https://example.com', project='demo', token='secret')
+    posted = []
+
+    def fake_request(method, url, json=None, **kwargs):
+        response = requests.Response()
+        if method == 'GET':
+            response.status_code = 200
+            response._content = b'[' + b','.join(
+                b'{"id": %d, "unit": %s}' % (i, _dumps(unit)) for i, unit in enumerate(UNITS[2:])) + b']'
+        else:
+            posted.extend(json)
+            response.status_code = 201
+            response._content = b'[]'
+        return response
+
+    with patch('requests.Session.request', side_effect=fake_request):
+        summary = seed_options(client, targets=['units'])
+
+    assert posted == [{'unit': unit} for unit in UNITS[:2]]
+    assert summary.loc['units', 'missing'] == 2
+    assert summary.loc['units', 'uploaded'] == 2
+
+
+def _dumps(value):
+    return json.dumps(value).encode()
+
+
+def test_seed_reads_all_pages_of_the_existing_entries():
+    client = WatersyncClient(base_url='https://example.com', project='demo', token='secret')
+    existing = [{'id': i, 'unit': unit} for i, unit in enumerate(UNITS[1:])]
+    posted = []
+
+    def fake_request(method, url, params=None, json=None, **kwargs):
+        response = requests.Response()
+        if method == 'GET':
+            page = int(params.get('page', 1))
+            following = f'{url}?page={page + 1}' if page * 3 < len(existing) else None
+            response.status_code = 200
+            response._content = _dumps({'count': len(existing), 'next': following,
+                                        'results': existing[(page - 1) * 3:page * 3]})
+        else:
+            posted.extend(json)
+            response.status_code = 201
+            response._content = b'[]'
+        return response
+
+    with patch('requests.Session.request', side_effect=fake_request):
+        summary = seed_options(client, targets=['units'])
+
+    assert posted == [{'unit': UNITS[0]}]
+    assert summary.loc['units', 'existing'] == len(existing)
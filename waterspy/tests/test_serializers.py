@@ -0,0 +1,95 @@
+import json
+
+import numpy as np
+from pandas import DataFrame, DatetimeIndex, Series, date_range, to_datetime
+
+from waterspy.core.utils.serializers import iso_timestamps, iter_json_records, iter_timeseries_json, records_to_json
+
+
+def test_iso_timestamps():
+    aware = date_range('2024-01-01 01:00', periods=2, freq='1500ms', tz='Europe/Brussels')
+    naive = DatetimeIndex(['2024-01-01 10:00:00'])
+
+    assert iso_timestamps(aware).tolist() == ['2024-01-01T00:00:00.000000Z', '2024-01-01T00:00:01.500000Z']
+    assert iso_timestamps(naive).tolist() == ['2024-01-01T10:00:00']
+
+
+def test_chunked_records_match_json():
+    frame = DataFrame({'timestamp': ['a', 'b', 'c'], 'value': [1.5, np.nan, 3.0], 'station': 'PZ "1"'})
+
+    chunks = list(iter_json_records(frame, chunk_size=2))
+
+    assert len(chunks) == 5
+    assert json.loads(b''.join(chunks)) == [
+        {'timestamp': 'a', 'value': 1.5, 'station': 'PZ "1"'},
+        {'timestamp': 'b', 'value': None, 'station': 'PZ "1"'},
+        {'timestamp': 'c', 'value': 3.0, 'station': 'PZ "1"'},
+    ]
+    assert records_to_json(frame.iloc[:0]) == b'[]'
+
+
+def test_timeseries_stream_matches_records():
+    from pandas import NaT, Series
+
+    index = DatetimeIndex(['2024-01-01 00:00', NaT, '2024-01-01 02:00', '2024-01-01 03:00'], tz='UTC')
+    ts = Series([1.0, 2.0, np.nan, 4.0], index=index)
+
+    streamed = b''.join(iter_timeseries_json(ts, value_name='depth', chunk_size=2, station='PZ1'))
+
+    assert json.loads(streamed) == [
+        {'timestamp': '2024-01-01T00:00:00Z', 'depth': 1.0, 'station': 'PZ1'},
+        {'timestamp': '2024-01-01T02:00:00Z', 'depth': None, 'station': 'PZ1'},
+        {'timestamp': '2024-01-01T03:00:00Z', 'depth': 4.0, 'station': 'PZ1'},
+    ]
+
+
+def test_streaming_body_is_passed_to_the_session():
+    from unittest.mock import patch
+
+    import requests
+
+    from waterspy.core.client import WatersyncRequest
+
+    body = iter_json_records(DataFrame({'value': [1.0]}))
+    request = WatersyncRequest(base_url='https://example.com', endpoint='groundwater/loggerrecords', body=body)
+
+    with patch('requests.Session.request', return_value=requests.Response()) as mock_request:
+        request.post()
+
+    kwargs = mock_request.call_args.kwargs
+    assert kwargs['data'] is body
+    assert kwargs['headers']['Content-Type'] == 'application/json'
+
+
+def test_floats_are_encoded_exactly():
+    values = [0.1 + 0.2, 1 / 3, 1e-300, 123456789.12345679]
+    frame = DataFrame({'value': values, 'count': [1, 2, 3, 4]})
+    ts = Series(values, index=date_range('2024-01-01', periods=4, freq='h', tz='UTC'))
+
+    assert [r['value'] for r in json.loads(records_to_json(frame))] == values
+    assert [r['value'] for r in json.loads(b''.join(iter_timeseries_json(ts)))] == values
+
+
+def test_manual_levels_without_timestamp_are_skipped():
+    from unittest.mock import patch
+
+    import requests
+
+    from waterspy.core.client import WatersyncClient
+    from waterspy.core.models import GWLevelManualMeasurement
+    from waterspy.uploaders import upload_manual_groundwater_levels
+
+    frame = DataFrame({'timestamp': to_datetime(['2024-01-01 10:00:00', None, '2024-01-02 10:00:00']),
+                       'depth': [1.25, 1.5, 1.75], 'comment': [None, 'lost', 'dry']})
+    measurement = GWLevelManualMeasurement(timeseries=frame, station='PZ1', toc_altitude=12.0, toc_height=0.5)
+    client = WatersyncClient(base_url='https://example.com', project='demo', token='secret')
+
+    response = requests.Response()
+    response.status_code = 201
+    with patch('requests.Session.request', return_value=response) as mock_request:
+        upload_manual_groundwater_levels(client, measurement)
+
+    assert json.loads(mock_request.call_args.kwargs['data']) == [
+        {'timestamp': '2024-01-01T10:00:00', 'depth': 1.25, 'comment': None, 'station': 'PZ1'},
+        {'timestamp': '2024-01-02T10:00:00', 'depth': 1.75, 'comment': 'dry', 'station': 'PZ1'},
+    ]
@@ -1,9 +1,11 @@
 from waterspy.core.utils.handle_errors import handle_errors
+from waterspy.core.utils.serializers import iso_timestamps, iter_json_records, iter_timeseries_json
 from typing import Union
-from pandas import Series, DataFrame, DatetimeIndex
-from waterspy.core.client import WatersyncClient
+from pandas import Series, DataFrame, DatetimeIndex, to_datetime
+from pandas.api.types import is_datetime64_any_dtype
+from waterspy.core.client import WatersyncClient, WatersyncRequest, WatersyncResponse
+from waterspy.core.constants import API_ENDPOINTS
 from waterspy.core.models import SampleTimeseries, LoggerMeasurement, MeteoLoggerMeasurement, SampleTimeseries, SubirriTimeseries, GWLevelManualMeasurement
-from datetime import datetime
 
 
 def deploy_logger(client: WatersyncClient,
@@ -121,8 +123,13 @@ def upload_logger(client: WatersyncClient,
 
 @handle_errors
 def upload_subirrigation_data(client: WatersyncClient,
-                              timeseries: SubirriTimeseries) -> dict:
-    """Load raw measurements data to the API."""
+                              timeseries: SubirriTimeseries,
+                              stream: bool = False) -> WatersyncResponse:
+    """Load raw measurements data to the API.
+
+    With stream=True the records are encoded while they are sent (chunked transfer encoding), which keeps the
+    memory use constant for very long series.
+    """
 
     params = {
         'station': timeseries.subirri_location,
@@ -131,21 +138,18 @@ def upload_subirrigation_data(client: WatersyncClient,
         'unit': timeseries.unit
     }
 
-    records = timeseries.timeseries.to_dict()
+    body = iter_timeseries_json(timeseries.timeseries)
 
     print(f'Uploading subirrigation timeseries: {timeseries}')
 
-    response = client.post_data(
+    request = WatersyncRequest(
+        **client.model_dump(),
         endpoint="subirri/measurement",
-        data=[{'timestamp': k.isoformat(), 'value': v}
-              for k, v in records.items() if isinstance(k, datetime)],
-        params=params
+        params=params,
+        body=body if stream else b''.join(body)
     )
 
-    if 'error' in response:
-        print(f"Error uploading data: {response['error']}")
-
-    return response
+    return request.post()
 
 
 def upload_samples(client: WatersyncClient,
@@ -174,35 +178,41 @@ def upload_samples(client: WatersyncClient,
 
 
 @handle_errors
-def upload_manual_groundwater_levels(client: WatersyncClient, timeseries: GWLevelManualMeasurement) -> dict:
+def upload_manual_groundwater_levels(client: WatersyncClient,
+                                     timeseries: GWLevelManualMeasurement,
+                                     stream: bool = False) -> WatersyncResponse:
+    """Load manual groundwater level measurements to the API.
+
+    The timeseries can be either a Series of depths indexed by timestamps or a DataFrame with timestamp, depth
+    and comment columns. Timestamps given as strings must be formatted as '%Y-%m-%d %H:%M:%S'. Records without a
+    timestamp are skipped. With stream=True the records are encoded while they are sent (chunked transfer
+    encoding).
+    """
 
     if isinstance(timeseries.timeseries, Series):
-        # make sure the index is a datetime object
-        timeseries.timeseries.index = DatetimeIndex(
-            timeseries.timeseries.index)
-
-        data = [{'timestamp': k.isoformat(),
-                 'depth': v,
-                 'station': timeseries.piezometer,
-                 }
-                for k, v in timeseries.timeseries.items() if isinstance(k, datetime)]
+        body = iter_timeseries_json(timeseries.timeseries, value_name='depth', station=timeseries.station)
 
     elif isinstance(timeseries.timeseries, DataFrame):
-        # make sure the timestamp is a datetime object
-        timeseries.timeseries['timestamp'] = timeseries.timeseries['timestamp'].apply(
-            lambda x: x if isinstance(x, datetime) else datetime.strptime(x, '%Y-%m-%d %H:%M:%S'))
-
-        data = [{'timestamp': row['timestamp'].isoformat(),
-                 'depth': row['depth'],
-                 'comment': row['comment'],
-                 'station': timeseries.piezometer,
-                 } for index, row in timeseries.timeseries.iterrows()]
+        df = timeseries.timeseries
+        timestamps = df['timestamp'] if is_datetime64_any_dtype(df['timestamp']) else to_datetime(
+            df['timestamp'], format='%Y-%m-%d %H:%M:%S')
+
+        # like the Series path, records without a timestamp are skipped
+        valid = timestamps.notna().to_numpy()
+        records = DataFrame({
+            'timestamp': iso_timestamps(timestamps[valid]),
+            'depth': df['depth'].to_numpy()[valid],
+            'comment': df['comment'].to_numpy()[valid],
+            'station': timeseries.station,
+        })
+        body = iter_json_records(records)
     else:
         raise ValueError("Invalid timeseries type")
 
-    response = client.post_data(
-        endpoint="groundwater/manualmeasurements",
-        data=data
+    request = WatersyncRequest(
+        **client.model_dump(),
+        endpoint=API_ENDPOINTS['groundwater-manual-measurements'],
+        body=body if stream else b''.join(body)
     )
 
-    return response
+    return request.post()